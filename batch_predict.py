@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+PREDICCIÓN POR LOTES EN STREAMING
+=================================
+Clasifica carpetas o listas de cientos de miles de imágenes con memoria
+constante:
+
+    rutas (generador) → decodificación en paralelo (hilos, cola acotada)
+      → lotes → modelo → escritor asíncrono (CSV o JSONL)
+
+La salida conserva el orden de entrada. Tras un fallo se puede relanzar
+el mismo comando: se descarta la última línea incompleta y se saltan las
+entradas ya escritas.
+
+Uso:
+    python batch_predict.py --input ../fotos --output predicciones.csv --top_k 3
+    python batch_predict.py --file_list rutas.txt --output predicciones.jsonl --model fruit360_int8.tflite
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from inference_utils import load_class_names, preprocess_image_file, top_k_predictions
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# ==============================================================================
+# ENTRADA
+# ==============================================================================
+def iter_image_paths(input_dir=None, file_list=None):
+    """
+    GENERADOR DE RUTAS (ORDEN DETERMINISTA)
+    Carpeta: recorrido recursivo con directorios y archivos ordenados.
+    Lista: una ruta por línea.
+    """
+    if file_list:
+        with open(file_list) as f:
+            for line in f:
+                path = line.strip()
+                if path:
+                    yield path
+        return
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for fname in sorted(files):
+            if fname.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(root, fname)
+
+def load_predict_fn(model_path, precision=None, num_threads=None):
+    """Función imágenes → probabilidades para .h5/SavedModel, .tflite o .onnx"""
+    if os.path.splitext(model_path)[1].lower() in ('.tflite', '.onnx'):
+        from lite_predictor import LitePredictor
+        return LitePredictor(model_path, num_threads=num_threads).predict
+    from inference_server import load_cpu_model
+    _, predict = load_cpu_model(model_path, precision)
+    return predict
+
+# ==============================================================================
+# SALIDA (REANUDABLE)
+# ==============================================================================
+def _truncate_partial_line(path):
+    """Elimina una última línea sin '\\n' (escritura interrumpida)"""
+    with open(path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return
+        block = min(size, 1 << 16)
+        f.seek(size - block)
+        tail = f.read(block)
+        if tail.endswith(b'\n'):
+            return
+        cut = tail.rfind(b'\n')
+        f.truncate(size - block + cut + 1 if cut >= 0 else 0)
+
+def _read_written_entries(path, output_format):
+    """
+    (número de entradas escritas, última ruta escrita)
+    Lee el archivo en streaming sin guardar las rutas en memoria.
+    """
+    if not os.path.exists(path):
+        return 0, None
+    _truncate_partial_line(path)
+    count, last_path = 0, None
+    with open(path, newline='') as f:
+        if output_format == 'csv':
+            reader = csv.reader(f)
+            next(reader, None)  # cabecera
+            for row in reader:
+                count, last_path = count + 1, row[0]
+        else:
+            for line in f:
+                count, last_path = count + 1, json.loads(line)['path']
+    return count, last_path
+
+class AsyncWriter(threading.Thread):
+    """Escribe filas desde una cola acotada en un hilo aparte"""
+
+    def __init__(self, path, output_format, top_k, append, max_pending=8):
+        super().__init__(daemon=True)
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.output_format = output_format
+        self.error = None
+        write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self.file = open(path, 'a' if append else 'w', newline='')
+        if output_format == 'csv':
+            self.csv = csv.writer(self.file)
+            if write_header:
+                header = ['path']
+                for i in range(1, top_k + 1):
+                    header += [f'label_{i}', f'probability_{i}']
+                self.csv.writerow(header + ['error'])
+
+    def run(self):
+        try:
+            while True:
+                rows = self.queue.get()
+                if rows is None:
+                    break
+                for path, predictions, error in rows:
+                    self._write(path, predictions, error)
+                self.file.flush()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.file.close()
+
+    def _write(self, path, predictions, error):
+        if self.output_format == 'csv':
+            row = [path]
+            for p in predictions:
+                row += [p['label'], f"{p['probability']:.6f}"]
+            self.csv.writerow(row + [error or ''])
+        else:
+            record = {'path': path, 'predictions': predictions}
+            if error:
+                record['error'] = error
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def put(self, rows):
+        if self.error is not None:
+            raise self.error
+        self.queue.put(rows)
+
+    def close(self):
+        self.queue.put(None)
+        self.join()
+        if self.error is not None:
+            raise self.error
+
+# ==============================================================================
+# PIPELINE
+# ==============================================================================
+def _decode(path, target_size):
+    try:
+        return preprocess_image_file(path, target_size), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def batch_predict(model_path="fruit360_transfer_learning.h5", input_dir=None, file_list=None,
+                  output="predicciones.csv", classes="class_names.json", top_k=5,
+                  batch_size=64, decode_workers=8, target_size=(100, 100),
+                  resume=True, precision=None, report_every=10.0):
+    """
+    CLASIFICA UN FLUJO DE IMÁGENES Y ESCRIBE LAS PREDICCIONES EN ORDEN
+    ================================================================
+    Parámetros:
+    -----------
+    input_dir / file_list : str
+        Carpeta (recursiva) o archivo con una ruta por línea
+    output : str
+        .csv o .jsonl (path, top-k etiquetas y probabilidades)
+    decode_workers : int
+        Hilos de decodificación; como mucho 2 × batch_size imágenes en vuelo
+    resume : bool
+        Saltar las entradas que ya están en output
+
+    Retorna:
+    --------
+    dict: imágenes procesadas, errores, segundos e imágenes/s
+    """
+    output_format = 'jsonl' if output.lower().endswith(('.jsonl', '.json')) else 'csv'
+    class_names = load_class_names(classes)
+    predict = load_predict_fn(model_path, precision)
+
+    paths = iter_image_paths(input_dir, file_list)
+    skip, last_written = _read_written_entries(output, output_format) if resume else (0, None)
+    if skip:
+        skipped_path = None
+        for _ in range(skip):
+            skipped_path = next(paths, None)
+        if skipped_path != last_written:
+            raise ValueError(f"❌ {output} no corresponde a esta entrada (última ruta escrita "
+                             f"{last_written!r}, esperada {skipped_path!r}); usa --no_resume")
+        print(f"⏭️  Reanudando: {skip} entradas ya escritas")
+
+    writer = AsyncWriter(output, output_format, top_k, append=resume)
+    writer.start()
+
+    print("🔮 PREDICCIÓN POR LOTES")
+    print("=" * 50)
+    processed, errors = 0, 0
+    start = last_report = time.time()
+    max_in_flight = 2 * batch_size
+    in_flight = deque()
+
+    def flush_batch(batch):
+        nonlocal errors
+        valid = [i for i, (_, image, _) in enumerate(batch) if image is not None]
+        predictions = [[] for _ in batch]
+        if valid:
+            probs = predict(np.stack([batch[i][1] for i in valid]))
+            for i, top in zip(valid, top_k_predictions(probs, class_names, top_k)):
+                predictions[i] = top
+        errors += len(batch) - len(valid)
+        writer.put([(path, predictions[i], error) for i, (path, _, error) in enumerate(batch)])
+
+    try:
+        with ThreadPoolExecutor(max_workers=decode_workers) as executor:
+            batch = []
+            exhausted = False
+            while in_flight or not exhausted:
+                # Mantener la cola de decodificación llena, pero acotada
+                while not exhausted and len(in_flight) < max_in_flight:
+                    path = next(paths, None)
+                    if path is None:
+                        exhausted = True
+                        break
+                    in_flight.append((path, executor.submit(_decode, path, target_size)))
+                if not in_flight:
+                    break
+                path, future = in_flight.popleft()
+                image, error = future.result()
+                batch.append((path, image, error))
+                if len(batch) == batch_size:
+                    flush_batch(batch)
+                    processed += len(batch)
+                    batch = []
+                now = time.time()
+                if now - last_report >= report_every:
+                    print(f"   ⏱️  {processed} imágenes · {processed / (now - start):.1f} img/s")
+                    last_report = now
+            if batch:
+                flush_batch(batch)
+                processed += len(batch)
+    finally:
+        writer.close()
+
+    elapsed = time.time() - start
+    summary = {
+        'processed': processed,
+        'skipped': skip,
+        'errors': errors,
+        'seconds': round(elapsed, 2),
+        'images_per_sec': round(processed / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    print(f"✅ {processed} imágenes en {elapsed:.1f}s ({summary['images_per_sec']} img/s), "
+          f"{errors} errores")
+    print(f"💾 Predicciones: {output}")
+    return summary
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--input', type=str, help='Carpeta de imágenes (recursiva)')
+    source.add_argument('--file_list', type=str, help='Archivo con una ruta por línea')
+    parser.add_argument('--output', type=str, default='predicciones.csv',
+                        help='.csv o .jsonl')
+    parser.add_argument('--model', type=str, default='fruit360_transfer_learning.h5')
+    parser.add_argument('--classes', type=str, default='class_names.json')
+    parser.add_argument('--top_k', type=int, default=5)
+    parser.add_argument('--batch_size', type=int, default=64)
+    parser.add_argument('--decode_workers', type=int, default=8)
+    parser.add_argument('--precision', type=str, default=None,
+                        choices=['float32', 'mixed_bfloat16'])
+    parser.add_argument('--no_resume', action='store_true',
+                        help='Sobrescribir la salida en vez de reanudar')
+
+    args = parser.parse_args()
+
+    summary = batch_predict(
+        model_path=args.model,
+        input_dir=args.input,
+        file_list=args.file_list,
+        output=args.output,
+        classes=args.classes,
+        top_k=args.top_k,
+        batch_size=args.batch_size,
+        decode_workers=args.decode_workers,
+        resume=not args.no_resume,
+        precision=args.precision
+    )
+    # Error solo si no se pudo decodificar ninguna imagen
+    sys.exit(1 if summary['processed'] and summary['errors'] == summary['processed'] else 0)
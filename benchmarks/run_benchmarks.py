@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+SUITE DE BENCHMARKS DE RENDIMIENTO
+==================================
+Mide sobre datos sintéticos con forma de Fruit360 (100x100 RGB, clases de
+class_names.json):
+    - loader.<backend>.images_per_sec   cargadores de preprocess_fruit360_data
+    - train_step.<modelo>.images_per_sec   pasos de entrenamiento por backbone
+    - predict.<modelo>.single_p50_ms / single_p99_ms   latencia de 1 imagen
+    - predict.<modelo>.batch<N>_images_per_sec   predict por lotes
+    - startup.<subcomando>_ms   arranque de fruit360.py (sin TensorFlow)
+Guarda un JSON con metadatos de la máquina y puede compararse contra un
+baseline, fallando (código 1) si alguna métrica empeora más del umbral.
+
+Uso:
+    python benchmarks/run_benchmarks.py --quick
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --threshold 0.1
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+import tempfile
+from datetime import datetime
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_data import make_synthetic_fruit360, load_benchmark_class_names
+
+BACKBONES = ('EfficientNetB0', 'MobileNetV2', 'ResNet50')
+LOADER_BACKENDS = ('keras', 'tfdata', 'packed')
+
+def machine_metadata():
+    """Metadatos de la máquina y del código medido"""
+    metadata = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+    }
+    try:
+        import tensorflow as tf
+        metadata['tensorflow'] = tf.__version__
+    except ImportError:
+        pass
+    try:
+        metadata['git_commit'] = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+            capture_output=True, text=True).stdout.strip()
+    except OSError:
+        pass
+    return metadata
+
+def _time_iterations(fn, iterations, warmup=1):
+    """Ejecuta fn warmup+iterations veces y devuelve los tiempos medidos"""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return np.array(times)
+
+def _endless(loader):
+    """Itera el loader indefinidamente (los backends finitos se reinician)"""
+    while True:
+        exhausted = True
+        for batch in loader:
+            exhausted = False
+            yield batch
+        if exhausted:
+            raise ValueError("❌ El loader no produjo ningún lote")
+
+# ==============================================================================
+# BENCHMARKS
+# ==============================================================================
+def bench_loaders(data_dir, packed_dir, batch_size=64, num_batches=20):
+    """Imágenes/s de cada backend de preprocess_fruit360_data"""
+    from preprocess_data import preprocess_fruit360_data
+    from packed_dataset import pack_fruit360_data
+
+    pack_fruit360_data(data_dir, packed_dir)
+    results = {}
+    for backend in LOADER_BACKENDS:
+        train, _, _, _, _ = preprocess_fruit360_data(
+            data_dir=data_dir, batch_size=batch_size, backend=backend,
+            packed_dir=packed_dir
+        )
+        # Con --quick el dataset tiene menos lotes que warmup + num_batches
+        iterator = _endless(train)
+        next(iterator)  # warmup
+        images, start = 0, time.perf_counter()
+        for _ in range(num_batches):
+            batch_x, _ = next(iterator)
+            images += len(batch_x)
+        elapsed = time.perf_counter() - start
+        results[f'loader.{backend}.images_per_sec'] = round(images / elapsed, 1)
+    return results
+
+def bench_train_steps(num_classes, backbones=BACKBONES, batch_size=32, steps=10):
+    """Imágenes/s de train_on_batch (cabeza entrenable, backbone congelado)"""
+    from transferLearning import create_transfer_learning_model
+
+    rng = np.random.default_rng(0)
+    x = rng.random((batch_size, 100, 100, 3), dtype=np.float32)
+    y = np.eye(num_classes, dtype=np.float32)[rng.integers(0, num_classes, batch_size)]
+
+    results = {}
+    for name in backbones:
+        model = create_transfer_learning_model(name, num_classes, weights=None)
+        times = _time_iterations(lambda: model.train_on_batch(x, y), steps, warmup=2)
+        results[f'train_step.{name}.images_per_sec'] = round(batch_size / float(np.median(times)), 1)
+    return results
+
+def bench_predict(num_classes, backbones=BACKBONES, iterations=50,
+                  batch_sizes=(32, 128)):
+    """Latencia de 1 imagen (p50/p99) e imágenes/s por lotes"""
+    from transferLearning import create_transfer_learning_model
+
+    rng = np.random.default_rng(0)
+    results = {}
+    for name in backbones:
+        model = create_transfer_learning_model(name, num_classes, weights=None)
+        single = rng.random((1, 100, 100, 3), dtype=np.float32)
+        times = _time_iterations(lambda: model(single, training=False), iterations, warmup=3)
+        results[f'predict.{name}.single_p50_ms'] = round(float(np.percentile(times, 50)) * 1000, 3)
+        results[f'predict.{name}.single_p99_ms'] = round(float(np.percentile(times, 99)) * 1000, 3)
+        for batch_size in batch_sizes:
+            batch = rng.random((batch_size, 100, 100, 3), dtype=np.float32)
+            times = _time_iterations(lambda: model(batch, training=False),
+                                     max(iterations // 10, 3), warmup=1)
+            results[f'predict.{name}.batch{batch_size}_images_per_sec'] = \
+                round(batch_size / float(np.median(times)), 1)
+    return results
+
+# (subcomando, argumentos): solo los que no necesitan TensorFlow
+STARTUP_COMMANDS = (
+    ('help', ['--help']),
+    ('check', ['--help']),
+    ('report', ['--help']),
+    ('predict', ['--help']),
+    ('download', ['--help']),
+)
+
+def bench_startup(commands=STARTUP_COMMANDS, iterations=5):
+    """Tiempo de arranque (proceso nuevo) de los subcomandos de fruit360.py"""
+    cli = os.path.join(REPO_DIR, "fruit360.py")
+    results = {}
+    for name, argv in commands:
+        cmd = [sys.executable, cli] + ([] if name == 'help' else [name]) + argv
+        times = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            proc = subprocess.run(cmd, cwd=REPO_DIR, capture_output=True)
+            times.append(time.perf_counter() - start)
+            if proc.returncode != 0:
+                break
+        if proc.returncode != 0:
+            print(f"   ⚠️  startup.{name}: código {proc.returncode}, se omite")
+            continue
+        results[f'startup.{name}_ms'] = round(float(np.median(times)) * 1000, 1)
+    return results
+
+# ==============================================================================
+# COMPARACIÓN CONTRA BASELINE
+# ==============================================================================
+def _lower_is_better(metric):
+    return metric.endswith('_ms') or metric.endswith('_seconds')
+
+def compare_to_baseline(results, baseline, threshold=0.1):
+    """
+    COMPARA MÉTRICAS CONTRA UN BASELINE
+
+    Retorna:
+    --------
+    list: regresiones (métrica, baseline, actual, cambio relativo)
+    """
+    regressions = []
+    print(f"\n{'Métrica':<52} {'Baseline':>11} {'Actual':>11} {'Cambio':>8}")
+    for metric, current in sorted(results.items()):
+        base = baseline.get(metric)
+        if not base:
+            continue
+        change = (current - base) / base
+        worse = change > threshold if _lower_is_better(metric) else change < -threshold
+        flag = "  ❌" if worse else ""
+        print(f"{metric:<52} {base:>11.2f} {current:>11.2f} {change:>+8.1%}{flag}")
+        if worse:
+            regressions.append((metric, base, current, change))
+    return regressions
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--quick', action='store_true', help='Menos iteraciones y clases')
+    parser.add_argument('--backbones', type=str, nargs='+', default=list(BACKBONES))
+    parser.add_argument('--skip', type=str, nargs='*', default=[],
+                        choices=['loaders', 'train', 'predict', 'startup'])
+    parser.add_argument('--work_dir', type=str,
+                        default=os.path.join(tempfile.gettempdir(), "fruit360_bench"))
+    parser.add_argument('--output', type=str, default=None)
+    parser.add_argument('--baseline', type=str, default=None)
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Empeoramiento relativo permitido (0.1 = 10%%)')
+    parser.add_argument('--save_baseline', action='store_true',
+                        help='Guardar los resultados como nuevo baseline')
+
+    args = parser.parse_args()
+
+    num_classes = len(load_benchmark_class_names())
+    print("⏱️  BENCHMARKS DE RENDIMIENTO - FRUIT360")
+    print("=" * 50)
+    print(f"   - Clases: {num_classes}")
+    print(f"   - Backbones: {', '.join(args.backbones)}")
+
+    results = {}
+    if 'loaders' not in args.skip:
+        data_dir = make_synthetic_fruit360(
+            os.path.join(args.work_dir, "raw"),
+            num_classes=20 if args.quick else None,
+            train_per_class=20 if args.quick else 40
+        )
+        results.update(bench_loaders(data_dir, os.path.join(args.work_dir, "packed"),
+                                     num_batches=5 if args.quick else 20))
+    if 'train' not in args.skip:
+        results.update(bench_train_steps(num_classes, args.backbones,
+                                         steps=3 if args.quick else 10))
+    if 'predict' not in args.skip:
+        results.update(bench_predict(num_classes, args.backbones,
+                                     iterations=10 if args.quick else 50))
+
+    if 'startup' not in args.skip:
+        results.update(bench_startup(iterations=3 if args.quick else 5))
+
+    report = {'metadata': machine_metadata(), 'results': results}
+    output = args.output or os.path.join(
+        BENCH_DIR, "results", f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Resultados: {output}")
+
+    if args.save_baseline:
+        baseline_path = args.baseline or os.path.join(BENCH_DIR, "baseline.json")
+        with open(baseline_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline actualizado: {baseline_path}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline['results'], args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regresión(es) por encima del {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n✅ Sin regresiones")
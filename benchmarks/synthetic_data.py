@@ -0,0 +1,69 @@
+"""
+DATOS SINTÉTICOS CON FORMA DE FRUIT360
+======================================
+Genera un árbol Training/ y Test/ de JPEGs RGB 100x100 con los nombres de
+class_names.json, para medir rendimiento sin descargar el dataset.
+"""
+
+import os
+import json
+import shutil
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_benchmark_class_names(num_classes=None):
+    """Clases de class_names.json (o genéricas si no existe)"""
+    path = os.path.join(REPO_DIR, "class_names.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            names = json.load(f)
+    else:
+        names = [f"Class {i}" for i in range(num_classes or 208)]
+    return names[:num_classes] if num_classes else names
+
+def make_synthetic_fruit360(root, num_classes=None, train_per_class=20,
+                            test_per_class=5, size=(100, 100), seed=0):
+    """
+    CREA UN DATASET SINTÉTICO (SI NO EXISTE YA)
+
+    Retorna:
+    --------
+    str: directorio base con Training/ y Test/
+    """
+    from PIL import Image
+
+    class_names = load_benchmark_class_names(num_classes)
+    marker = os.path.join(root, ".synthetic.json")
+    config = {'classes': len(class_names), 'train': train_per_class,
+              'test': test_per_class, 'size': list(size), 'seed': seed}
+    if os.path.exists(marker):
+        with open(marker) as f:
+            if json.load(f) == config:
+                return root
+
+    # Configuración distinta: se borran las imágenes viejas para no mezclarlas
+    for split in ("Training", "Test"):
+        shutil.rmtree(os.path.join(root, split), ignore_errors=True)
+    if os.path.exists(marker):
+        os.remove(marker)
+
+    rng = np.random.default_rng(seed)
+    for split, per_class in (("Training", train_per_class), ("Test", test_per_class)):
+        for class_index, class_name in enumerate(class_names):
+            class_dir = os.path.join(root, split, class_name)
+            os.makedirs(class_dir, exist_ok=True)
+            # Color base por clase + ruido, fondo blanco como en Fruit360
+            color = rng.integers(0, 256, size=3)
+            for i in range(per_class):
+                image = np.full((size[0], size[1], 3), 255, dtype=np.uint8)
+                noise = rng.integers(-30, 31, size=(size[0] // 2, size[1] // 2, 3))
+                top, left = size[0] // 4, size[1] // 4
+                image[top:top + size[0] // 2, left:left + size[1] // 2] = \
+                    np.clip(color + noise, 0, 255).astype(np.uint8)
+                Image.fromarray(image).save(os.path.join(class_dir, f"{i}_100.jpg"),
+                                            quality=90)
+
+    with open(marker, 'w') as f:
+        json.dump(config, f)
+    return root
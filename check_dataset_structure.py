@@ -1,4 +1,5 @@
 import os
+from dataset_index import get_dataset_index
 
 def check_dataset_structure(dataset_dir="../data_raw"):
     """
@@ -49,24 +50,20 @@ def check_dataset_structure(dataset_dir="../data_raw"):
             print(f"   ⚠️  Sin permisos para listar: {base_path}")
             continue
         
-        # ===== BUSQUEDA RECURSIVA =====
+        # ===== BUSQUEDA RECURSIVA (CONSULTANDO EL ÍNDICE) =====
         print(f"   🔎 Buscando recursivamente...")
         found_in_recursion = False
         
-        for root, dirs, files in os.walk(base_path):
-            if "Training" in dirs and "Test" in dirs:
-                train_path = os.path.join(root, "Training")
-                test_path = os.path.join(root, "Test")
+        index = get_dataset_index(base_path, verbose=True)
+        for train_name, test_name in (("Training", "Test"), ("train", "test")):
+            candidates = index.find_dirs_with_children([train_name, test_name])
+            if candidates:
+                root = os.path.join(base_path, candidates[0])
+                train_path = os.path.join(root, train_name)
+                test_path = os.path.join(root, test_name)
                 print(f"   ✅ Encontrado en: {root}")
                 found_in_recursion = True
                 break
-                
-            if "train" in dirs and "test" in dirs:
-                train_path = os.path.join(root, "train")
-                test_path = os.path.join(root, "test")
-                print(f"   ✅ Encontrado en: {root} (minúsculas)")
-                found_in_recursion = True
-                break
         
         # Si encontró en la búsqueda recursiva, salir del bucle principal
         if found_in_recursion:
@@ -83,22 +80,17 @@ def check_dataset_structure(dataset_dir="../data_raw"):
         print(f"   - Entrenamiento: {train_path}")
         print(f"   - Prueba: {test_path}")
         
-        # Contar clases
+        # Contar clases e imágenes desde el índice (sin recorrer el árbol)
         try:
-            train_classes = len([d for d in os.listdir(train_path) 
-                               if os.path.isdir(os.path.join(train_path, d))])
-            test_classes = len([d for d in os.listdir(test_path) 
-                              if os.path.isdir(os.path.join(test_path, d))])
-            
-            # Contar imágenes (muestra progreso para datasets grandes)
-            print("   📊 Contando imágenes...")
-            train_samples = 0
-            for root, dirs, files in os.walk(train_path):
-                train_samples += len(files)
+            # Mismo índice que la búsqueda recursiva (base_path), con rutas relativas
+            index = get_dataset_index(base_path, verbose=True)
+            train_name = os.path.relpath(train_path, base_path)
+            test_name = os.path.relpath(test_path, base_path)
             
-            test_samples = 0
-            for root, dirs, files in os.walk(test_path):
-                test_samples += len(files)
+            train_classes = len(index.list_subdirs(train_name))
+            test_classes = len(index.list_subdirs(test_name))
+            train_samples = index.count_files(train_name)
+            test_samples = index.count_files(test_name)
             
             print(f"📊 Estadísticas del dataset:")
             print(f"   - Clases en entrenamiento: {train_classes}")
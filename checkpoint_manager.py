@@ -0,0 +1,257 @@
+"""
+CHECKPOINTS ASÍNCRONOS
+======================
+Sustituye a ModelCheckpoint(...h5): al terminar cada época se copian los
+pesos a memoria (get_weights, rápido) y un hilo en segundo plano los
+escribe en formato nativo .keras (o SavedModel) usando un clon del
+modelo, así el entrenamiento sigue sin esperar al disco.
+
+Cada ejecución escribe en su propio directorio (checkpoints/run_<id>/)
+con retención: se conservan los últimos keep_last checkpoints y los
+keep_best mejores según monitor. checkpoints.json lista los que quedan.
+
+Por época se mide el tiempo que bloquea al entrenamiento (copia de pesos
+y espera si el hilo va atrasado) frente al que costaría guardar en
+síncrono (copia + escritura): la diferencia es el tiempo ahorrado.
+"""
+
+import os
+import json
+import time
+import queue
+import shutil
+import threading
+from datetime import datetime
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.callbacks import Callback
+
+SAVE_FORMATS = ('keras', 'savedmodel')
+MANIFEST_FILENAME = "checkpoints.json"
+
+def run_checkpoint_dir(root="checkpoints", run_id=None):
+    """Directorio propio de la ejecución: root/run_<id> (o run_<timestamp>)"""
+    name = f"run_{run_id}" if run_id is not None else \
+        f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+    path = os.path.join(root, name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _remove_path(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        os.remove(path)
+
+class CheckpointManager:
+    """
+    ESCRITURA DE CHECKPOINTS EN SEGUNDO PLANO CON RETENCIÓN
+    ======================================================
+    Parámetros:
+    -----------
+    directory : str
+        Directorio de la ejecución (ver run_checkpoint_dir)
+    keep_last : int
+        Checkpoints más recientes que se conservan
+    keep_best : int
+        Mejores checkpoints (según monitor) que se conservan
+    monitor / mode : str
+        Métrica de los logs y 'min' o 'max'
+    save_format : str
+        'keras' (archivo .keras) o 'savedmodel' (directorio)
+    max_pending : int
+        Snapshots en cola como máximo (acota la memoria; si se llena, el
+        entrenamiento espera)
+    """
+
+    def __init__(self, directory, keep_last=2, keep_best=1, monitor='val_loss',
+                 mode='min', save_format='keras', max_pending=1):
+        if save_format not in SAVE_FORMATS:
+            raise ValueError(f"Formato no soportado: {save_format}")
+        if mode not in ('min', 'max'):
+            raise ValueError(f"mode debe ser 'min' o 'max': {mode}")
+        self.directory = directory
+        self.keep_last = max(int(keep_last), 0)
+        self.keep_best = max(int(keep_best), 0)
+        self.monitor = monitor
+        self.mode = mode
+        self.save_format = save_format
+        self.entries = []  # {'epoch', 'path', 'value'} escritos y conservados
+        self.timings = []
+        self.error = None
+        self._clones = {}
+        self._queue = queue.Queue(maxsize=max(int(max_pending), 1))
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+        os.makedirs(directory, exist_ok=True)
+
+    # --------------------------------------------------------------------------
+    # Hilo principal
+    # --------------------------------------------------------------------------
+    def _ensure_clone(self, model):
+        """Clon con la misma arquitectura (uno por forma de entrada, creado en este hilo)"""
+        key = str(model.input_shape)
+        if key not in self._clones:
+            self._clones[key] = tf.keras.models.clone_model(model)
+        return self._clones[key]
+
+    def save(self, model, epoch, logs=None, path=None, on_written=None):
+        """
+        ENCOLA UN CHECKPOINT
+
+        Parámetros:
+        -----------
+        epoch : int
+            Época (para nombre y retención)
+        logs : dict
+            Métricas de la época (de aquí se lee monitor)
+        path : str o None
+            Ruta explícita (no entra en la retención), p. ej. el modelo final
+        on_written : callable o None
+            Se llama en el hilo de escritura cuando el archivo ya está en su
+            sitio (p. ej. para registrar la posición del stream asociada)
+
+        Retorna:
+        --------
+        float: milisegundos que el entrenamiento estuvo bloqueado
+        """
+        if self.error is not None:
+            raise self.error
+        start = time.perf_counter()
+        clone = self._ensure_clone(model)
+        weights = model.get_weights()  # copia en memoria (numpy)
+        timing = {'epoch': epoch, 'snapshot_ms': (time.perf_counter() - start) * 1000,
+                  'explicit': path is not None}
+        with self._lock:
+            self.timings.append(timing)
+        value = (logs or {}).get(self.monitor)
+        self._queue.put((clone, epoch, weights, None if value is None else float(value), path,
+                         timing, on_written))
+        timing['blocking_ms'] = (time.perf_counter() - start) * 1000
+        return timing['blocking_ms']
+
+    def close(self):
+        """Espera a que se escriban los checkpoints pendientes"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    # --------------------------------------------------------------------------
+    # Hilo de escritura
+    # --------------------------------------------------------------------------
+    def _checkpoint_path(self, epoch, value):
+        metric = f"-{self.monitor}_{value:.4f}" if value is not None else ""
+        name = f"epoch_{epoch + 1:03d}{metric}"
+        return os.path.join(self.directory,
+                            name + ".keras" if self.save_format == 'keras' else name)
+
+    def _write(self, clone, weights, path):
+        clone.set_weights(weights)
+        # Mismo nombre (y extensión, que decide el formato) con prefijo .tmp_
+        tmp_path = os.path.join(os.path.dirname(path), ".tmp_" + os.path.basename(path))
+        _remove_path(tmp_path)
+        if path.endswith(('.keras', '.h5')):
+            clone.save(tmp_path)
+        else:
+            tf.saved_model.save(clone, tmp_path)
+        # Renombrado: nunca queda un checkpoint a medio escribir
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+
+    def _writer(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue
+            clone, epoch, weights, value, path, timing, on_written = item
+            try:
+                start = time.perf_counter()
+                explicit = path is not None
+                path = path or self._checkpoint_path(epoch, value)
+                self._write(clone, weights, path)
+                with self._lock:
+                    timing['write_ms'] = (time.perf_counter() - start) * 1000
+                if not explicit:
+                    self.entries.append({'epoch': epoch, 'path': path, 'value': value})
+                    self._apply_retention()
+                if on_written is not None:
+                    on_written()
+            except Exception as e:
+                self.error = e
+
+    def _apply_retention(self):
+        """Conserva los keep_last más recientes y los keep_best mejores"""
+        keep = {id(e) for e in self.entries[-self.keep_last:]} if self.keep_last else set()
+        if self.keep_best:
+            scored = [e for e in self.entries if e['value'] is not None]
+            scored.sort(key=lambda e: e['value'], reverse=self.mode == 'max')
+            keep |= {id(e) for e in scored[:self.keep_best]}
+        for entry in [e for e in self.entries if id(e) not in keep]:
+            _remove_path(entry['path'])
+        self.entries = [e for e in self.entries if id(e) in keep]
+        with open(os.path.join(self.directory, MANIFEST_FILENAME), 'w') as f:
+            json.dump({'monitor': self.monitor, 'mode': self.mode,
+                       'best': self.best_path(), 'checkpoints': self.entries}, f, indent=2)
+
+    # --------------------------------------------------------------------------
+    # Consultas
+    # --------------------------------------------------------------------------
+    def best_path(self):
+        """Ruta del mejor checkpoint conservado (o None)"""
+        scored = [e for e in self.entries if e['value'] is not None]
+        if not scored:
+            return None
+        pick = min if self.mode == 'min' else max
+        return pick(scored, key=lambda e: e['value'])['path']
+
+    def summary(self):
+        """
+        COSTE DEL CHECKPOINTING
+
+        Retorna:
+        --------
+        dict: checkpoints de época, ms bloqueado por época (media/máx), ms
+              de escritura en segundo plano y ms ahorrados por época frente
+              a guardar en síncrono (los guardados con ruta explícita, como
+              el modelo final, no cuentan)
+        """
+        with self._lock:
+            timings = [t for t in self.timings
+                       if 'write_ms' in t and 'blocking_ms' in t and not t['explicit']]
+        if not timings:
+            return {}
+        blocking = np.array([t['blocking_ms'] for t in timings])
+        sync = np.array([t['snapshot_ms'] + t['write_ms'] for t in timings])
+        return {
+            'checkpoints': len(timings),
+            'save_format': self.save_format,
+            'blocking_ms_mean': round(float(blocking.mean()), 1),
+            'blocking_ms_max': round(float(blocking.max()), 1),
+            'write_ms_mean': round(float(np.mean([t['write_ms'] for t in timings])), 1),
+            'sync_equivalent_ms_mean': round(float(sync.mean()), 1),
+            'saved_ms_per_epoch': round(float((sync - blocking).mean()), 1),
+            'directory': self.directory,
+            'best': self.best_path(),
+        }
+
+class AsyncCheckpoint(Callback):
+    """
+    CALLBACK: CHECKPOINT ASÍNCRONO AL FINAL DE CADA ÉPOCA
+    La numeración de épocas sigue entre llamadas a fit (fase 1 y etapas de
+    fine-tuning comparten directorio y retención).
+    """
+
+    def __init__(self, manager):
+        super().__init__()
+        self.manager = manager
+        self.epoch = 0
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.manager.save(self.model, self.epoch, logs)
+        self.epoch += 1
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+DESCARGA REANUDABLE Y EXTRACCIÓN PARALELA DEL DATASET
+=====================================================
+- Descarga por trozos con peticiones HTTP Range en varias conexiones. El
+  progreso (trozos completos) se guarda junto al .part, así que una
+  descarga interrumpida continúa donde se quedó.
+- Extracción del .zip en paralelo (un handle de ZipFile por hilo),
+  escribiendo cada archivo de forma atómica y saltando los que ya están
+  extraídos con el tamaño correcto.
+- Verificación contra un manifest (tamaño + CRC32 de cada archivo) que se
+  genera desde el directorio central del zip y se guarda junto a los datos.
+
+Solo usa la librería estándar; cualquier servidor HTTP con soporte de
+Range sirve (Kaggle o un servidor local de pruebas).
+"""
+
+import os
+import json
+import time
+import zlib
+import base64
+import shutil
+import zipfile
+import threading
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+KAGGLE_DOWNLOAD_URL = "https://www.kaggle.com/api/v1/datasets/download/{dataset}"
+MANIFEST_NAME = "fruit360_manifest.json"
+CHUNK_SIZE = 8 * 2**20
+
+# ==============================================================================
+# DESCARGA
+# ==============================================================================
+def kaggle_auth_headers():
+    """Cabecera Basic auth con KAGGLE_USERNAME/KAGGLE_KEY o ~/.kaggle/kaggle.json"""
+    username, key = os.environ.get('KAGGLE_USERNAME'), os.environ.get('KAGGLE_KEY')
+    if not (username and key):
+        config_path = os.path.join(os.path.expanduser("~"), ".kaggle", "kaggle.json")
+        if not os.path.exists(config_path):
+            raise ValueError("❌ Faltan credenciales de Kaggle (~/.kaggle/kaggle.json)")
+        with open(config_path) as f:
+            config = json.load(f)
+        username, key = config['username'], config['key']
+    token = base64.b64encode(f"{username}:{key}".encode()).decode()
+    return {'Authorization': f"Basic {token}"}
+
+def probe_url(url, headers=None, timeout=30):
+    """
+    URL FINAL, TAMAÑO Y SOPORTE DE RANGE
+    Pide el primer byte: sigue redirecciones (p. ej. a una URL firmada) y
+    lee el tamaño total de Content-Range.
+
+    Retorna:
+    --------
+    tuple: (url_final, tamaño o None, acepta_range)
+    """
+    request = urllib.request.Request(url, headers={**(headers or {}), 'Range': 'bytes=0-0'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        final_url = response.geturl()
+        content_range = response.headers.get('Content-Range')
+        if response.status == 206 and content_range and '/' in content_range:
+            total = content_range.rsplit('/', 1)[1]
+            return final_url, int(total) if total.isdigit() else None, True
+        length = response.headers.get('Content-Length')
+        return final_url, int(length) if length else None, False
+
+def _fetch_range(url, headers, start, end, timeout):
+    request = urllib.request.Request(url, headers={**headers, 'Range': f'bytes={start}-{end}'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        if response.status != 206:
+            raise IOError(f"El servidor ignoró Range (HTTP {response.status})")
+        data = response.read()
+    if len(data) != end - start + 1:
+        raise IOError(f"Trozo incompleto: {len(data)} de {end - start + 1} bytes")
+    return data
+
+def download_with_resume(url, dest_path, headers=None, chunk_size=CHUNK_SIZE,
+                         num_connections=4, retries=5, timeout=60, verbose=True):
+    """
+    DESCARGA REANUDABLE POR TROZOS
+    ==============================
+    Escribe en dest_path.part y registra los trozos completos en
+    dest_path.part.json; al terminar renombra a dest_path.
+
+    Parámetros:
+    -----------
+    url : str
+        URL del archivo (Kaggle o servidor local)
+    headers : dict
+        Cabeceras extra (autenticación); no se reenvían a la URL redirigida
+    num_connections : int
+        Trozos descargados en paralelo
+    retries : int
+        Reintentos por trozo (espera exponencial)
+
+    Retorna:
+    --------
+    str: dest_path
+    """
+    if os.path.exists(dest_path):
+        if verbose:
+            print(f"✅ Ya descargado: {dest_path}")
+        return dest_path
+
+    final_url, total, ranges = probe_url(url, headers, timeout)
+    # Las URL firmadas no necesitan (ni aceptan) la autenticación original
+    request_headers = (headers or {}) if final_url == url else {}
+    part_path, state_path = dest_path + ".part", dest_path + ".part.json"
+    os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+
+    if not ranges or not total:
+        # Sin Range no se puede reanudar: descarga secuencial completa
+        if verbose:
+            print("⚠️  El servidor no admite Range: descarga secuencial")
+        request = urllib.request.Request(final_url, headers=request_headers)
+        with urllib.request.urlopen(request, timeout=timeout) as response, \
+                open(part_path, 'wb') as f:
+            shutil.copyfileobj(response, f, CHUNK_SIZE)
+        os.replace(part_path, dest_path)
+        return dest_path
+
+    num_chunks = (total + chunk_size - 1) // chunk_size
+    done = set()
+    if os.path.exists(state_path) and os.path.exists(part_path):
+        with open(state_path) as f:
+            state = json.load(f)
+        if state.get('total') == total and state.get('chunk_size') == chunk_size:
+            done = set(state['done'])
+    if not os.path.exists(part_path) or not done:
+        with open(part_path, 'wb') as f:
+            f.truncate(total)
+
+    pending = [i for i in range(num_chunks) if i not in done]
+    if verbose:
+        print(f"⬇️  {total / 2**20:.0f} MB en {num_chunks} trozos "
+              f"({len(done)} ya descargados, {num_connections} conexiones)")
+
+    lock = threading.Lock()
+    start_time = time.time()
+    downloaded = [0]
+
+    def _save_state():
+        tmp_path = state_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'url': url, 'total': total, 'chunk_size': chunk_size,
+                       'done': sorted(done)}, f)
+        os.replace(tmp_path, state_path)
+
+    def _download_chunk(index):
+        start = index * chunk_size
+        end = min(start + chunk_size, total) - 1
+        for attempt in range(retries + 1):
+            try:
+                data = _fetch_range(final_url, request_headers, start, end, timeout)
+                break
+            except (urllib.error.URLError, IOError, TimeoutError) as e:
+                if attempt == retries:
+                    raise IOError(f"Trozo {index} falló tras {retries} reintentos: {e}")
+                time.sleep(min(2 ** attempt, 30))
+        with open(part_path, 'r+b') as f:
+            f.seek(start)
+            f.write(data)
+        with lock:
+            done.add(index)
+            downloaded[0] += len(data)
+            _save_state()
+            if verbose and len(done) % 16 == 0:
+                speed = downloaded[0] / 2**20 / max(time.time() - start_time, 1e-6)
+                print(f"   {len(done)}/{num_chunks} trozos · {speed:.1f} MB/s")
+
+    with ThreadPoolExecutor(max_workers=num_connections) as executor:
+        for _ in executor.map(_download_chunk, pending):
+            pass
+
+    os.replace(part_path, dest_path)
+    os.remove(state_path)
+    if verbose:
+        print(f"✅ Descarga completada en {time.time() - start_time:.1f}s: {dest_path}")
+    return dest_path
+
+# ==============================================================================
+# EXTRACCIÓN Y VERIFICACIÓN
+# ==============================================================================
+def manifest_from_zip(zip_path):
+    """Manifest {ruta_relativa: {size, crc32}} desde el directorio central del zip"""
+    with zipfile.ZipFile(zip_path) as archive:
+        return {info.filename: {'size': info.file_size, 'crc32': info.CRC}
+                for info in archive.infolist() if not info.is_dir()}
+
+def file_crc32(path, block_size=2**20):
+    crc = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+def _safe_target(dest_dir, name):
+    target = os.path.realpath(os.path.join(dest_dir, name))
+    if not target.startswith(os.path.realpath(dest_dir) + os.sep):
+        raise ValueError(f"❌ Ruta fuera del destino en el zip: {name}")
+    return target
+
+def extract_zip_parallel(zip_path, dest_dir, num_workers=None, verbose=True):
+    """
+    EXTRACCIÓN PARALELA Y REANUDABLE
+    Cada hilo abre su propio ZipFile; los archivos se escriben como .tmp y
+    se renombran al terminar, así que un archivo con el tamaño correcto
+    está completo y se salta en la siguiente ejecución.
+
+    Retorna:
+    --------
+    dict: {'extracted', 'skipped'}
+    """
+    num_workers = num_workers or min(32, (os.cpu_count() or 1) * 2)
+    with zipfile.ZipFile(zip_path) as archive:
+        members = [info for info in archive.infolist() if not info.is_dir()]
+
+    todo = []
+    for info in members:
+        target = _safe_target(dest_dir, info.filename)
+        if not (os.path.exists(target) and os.path.getsize(target) == info.file_size):
+            todo.append(info.filename)
+    skipped = len(members) - len(todo)
+    if verbose:
+        print(f"📦 Extrayendo {len(todo)} archivos ({skipped} ya extraídos, "
+              f"{num_workers} hilos)")
+
+    local = threading.local()
+    start = time.time()
+
+    def _extract(name):
+        if not hasattr(local, 'archive'):
+            local.archive = zipfile.ZipFile(zip_path)
+        target = _safe_target(dest_dir, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = target + ".tmp"
+        with local.archive.open(name) as source, open(tmp_path, 'wb') as f:
+            shutil.copyfileobj(source, f, 2**20)
+        os.replace(tmp_path, target)
+
+    # zlib libera el GIL al descomprimir
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        for _ in executor.map(_extract, todo, chunksize=64):
+            pass
+
+    if verbose:
+        print(f"✅ Extracción completada en {time.time() - start:.1f}s")
+    return {'extracted': len(todo), 'skipped': skipped}
+
+def verify_manifest(dest_dir, manifest, num_workers=None, check_hash=True, verbose=True):
+    """
+    VERIFICA TAMAÑO (Y CRC32) DE CADA ARCHIVO DEL MANIFEST
+
+    Retorna:
+    --------
+    tuple: (faltan, no_coinciden) como listas de rutas relativas
+    """
+    num_workers = num_workers or min(32, (os.cpu_count() or 1) * 2)
+
+    def _check(item):
+        name, expected = item
+        path = os.path.join(dest_dir, name)
+        if not os.path.exists(path):
+            return 'missing', name
+        if os.path.getsize(path) != expected['size']:
+            return 'mismatch', name
+        if check_hash and file_crc32(path) != expected['crc32']:
+            return 'mismatch', name
+        return 'ok', name
+
+    missing, mismatched = [], []
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        for status, name in executor.map(_check, manifest.items(), chunksize=64):
+            if status == 'missing':
+                missing.append(name)
+            elif status == 'mismatch':
+                mismatched.append(name)
+    if verbose:
+        status = "✅" if not (missing or mismatched) else "❌"
+        print(f"{status} Verificación: {len(manifest)} archivos, {len(missing)} faltan, "
+              f"{len(mismatched)} no coinciden")
+    return missing, mismatched
+
+def download_and_extract(url, dataset_dir="../data_raw", archive_name="fruits.zip",
+                         headers=None, num_connections=4, num_workers=None,
+                         verify=True, keep_archive=True, verbose=True):
+    """
+    DESCARGA + EXTRACCIÓN + VERIFICACIÓN (IDEMPOTENTE)
+    ==================================================
+    Si el manifest guardado existe y todo coincide, no descarga nada.
+    Los archivos dañados se vuelven a extraer una vez.
+
+    Retorna:
+    --------
+    dict: manifest usado
+    """
+    manifest_path = os.path.join(dataset_dir, MANIFEST_NAME)
+    archive_path = os.path.join(dataset_dir, archive_name)
+
+    if os.path.exists(manifest_path) and not os.path.exists(archive_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        missing, mismatched = verify_manifest(dataset_dir, manifest, num_workers,
+                                              check_hash=verify, verbose=verbose)
+        if not (missing or mismatched):
+            return manifest
+
+    download_with_resume(url, archive_path, headers, num_connections=num_connections,
+                         verbose=verbose)
+    manifest = manifest_from_zip(archive_path)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+
+    extract_zip_parallel(archive_path, dataset_dir, num_workers, verbose)
+    if verify:
+        missing, mismatched = verify_manifest(dataset_dir, manifest, num_workers,
+                                              verbose=verbose)
+        if mismatched:
+            # Borrar y extraer de nuevo los archivos dañados
+            for name in mismatched:
+                os.remove(os.path.join(dataset_dir, name))
+            extract_zip_parallel(archive_path, dataset_dir, num_workers, verbose)
+            missing, mismatched = verify_manifest(dataset_dir, manifest, num_workers,
+                                                  verbose=verbose)
+        if missing or mismatched:
+            raise IOError(f"❌ Extracción incompleta: {len(missing)} faltan, "
+                          f"{len(mismatched)} no coinciden")
+
+    if not keep_archive:
+        os.remove(archive_path)
+    return manifest
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', type=str, default=None,
+                        help='URL del zip (por defecto Kaggle moltean/fruits)')
+    parser.add_argument('--dataset_dir', type=str, default="../data_raw")
+    parser.add_argument('--connections', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no_verify', action='store_true')
+    parser.add_argument('--remove_archive', action='store_true')
+
+    args = parser.parse_args()
+
+    url, headers = args.url, None
+    if url is None:
+        url = KAGGLE_DOWNLOAD_URL.format(dataset="moltean/fruits")
+        headers = kaggle_auth_headers()
+
+    download_and_extract(url, args.dataset_dir, headers=headers,
+                         num_connections=args.connections, num_workers=args.workers,
+                         verify=not args.no_verify, keep_archive=not args.remove_archive)
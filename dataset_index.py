@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+ÍNDICE DEL DATASET EN SQLite
+============================
+Recorre el árbol UNA vez con os.scandir y guarda ruta, clase, tamaño,
+mtime y (opcionalmente) hash de cada archivo. En las siguientes
+ejecuciones solo se vuelven a listar los directorios cuyo mtime cambió,
+así que el arranque es casi instantáneo incluso en discos de red.
+
+Nota: el mtime de un directorio cambia al añadir/borrar/renombrar
+archivos, no al sobrescribir uno en su sitio. Para eso usar
+refresh(full=True).
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+
+INDEX_FILENAME = ".dataset_index.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime REAL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT,
+    class_name TEXT,
+    size INTEGER,
+    mtime REAL,
+    hash TEXT
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+"""
+
+# Índices abiertos en este proceso (se refrescan una sola vez)
+_OPEN_INDEXES = {}
+
+def _default_index_path(root):
+    """Índice dentro del dataset; si no hay permisos, en ~/.cache"""
+    if os.access(root, os.W_OK):
+        return os.path.join(root, INDEX_FILENAME)
+    digest = hashlib.sha1(os.path.abspath(root).encode()).hexdigest()[:16]
+    cache_dir = os.path.join(os.path.expanduser("~"), ".cache", "fruit360")
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, f"dataset_index_{digest}.sqlite")
+
+def _file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _like_prefix(subdir):
+    """Condición SQL para un directorio y todo lo que cuelga de él"""
+    subdir = subdir.strip('/')
+    if not subdir:
+        return "1 = 1", ()
+    escaped = subdir.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return "(dir = ? OR dir LIKE ? ESCAPE '\\')", (subdir, escaped + '/%')
+
+class DatasetIndex:
+    """
+    ÍNDICE INCREMENTAL DE UN ÁRBOL DE IMÁGENES
+
+    Parámetros:
+    -----------
+    root : str
+        Directorio raíz del dataset
+    index_path : str
+        Archivo SQLite (por defecto <root>/.dataset_index.sqlite)
+    """
+
+    def __init__(self, root, index_path=None):
+        self.root = os.path.abspath(root)
+        self.index_path = index_path or _default_index_path(self.root)
+        self.conn = sqlite3.connect(self.index_path)
+        self.conn.executescript(_SCHEMA)
+
+    # --------------------------------------------------------------------------
+    # Actualización
+    # --------------------------------------------------------------------------
+    def refresh(self, compute_hash=False, full=False):
+        """
+        ACTUALIZA EL ÍNDICE
+
+        Parámetros:
+        -----------
+        compute_hash : bool
+            Calcular SHA1 de los archivos nuevos o modificados
+        full : bool
+            Volver a listar todos los directorios aunque su mtime no cambie
+
+        Retorna:
+        --------
+        dict: directorios listados, archivos actualizados y segundos
+        """
+        start = time.time()
+        stats = {'dirs_scanned': 0, 'dirs_skipped': 0, 'files_updated': 0,
+                 'files_removed': 0}
+        with self.conn:
+            self._refresh_dir('', None, compute_hash, full, stats)
+        stats['seconds'] = round(time.time() - start, 3)
+        return stats
+
+    def _refresh_dir(self, rel_dir, parent, compute_hash, full, stats):
+        abs_dir = os.path.join(self.root, rel_dir) if rel_dir else self.root
+        try:
+            mtime = os.stat(abs_dir).st_mtime
+        except OSError:
+            self._remove_dir(rel_dir, stats)
+            return
+
+        row = self.conn.execute("SELECT mtime FROM dirs WHERE path = ?",
+                                (rel_dir,)).fetchone()
+        if row is not None and row[0] == mtime and not full:
+            # Sin cambios: reutilizar los subdirectorios conocidos
+            stats['dirs_skipped'] += 1
+            children = [r[0] for r in self.conn.execute(
+                "SELECT path FROM dirs WHERE parent = ?", (rel_dir,))]
+            for child in children:
+                self._refresh_dir(child, rel_dir, compute_hash, full, stats)
+            return
+
+        stats['dirs_scanned'] += 1
+        known_files = {r[0]: (r[1], r[2]) for r in self.conn.execute(
+            "SELECT path, size, mtime FROM files WHERE dir = ?", (rel_dir,))}
+        known_dirs = {r[0] for r in self.conn.execute(
+            "SELECT path FROM dirs WHERE parent = ?", (rel_dir,))}
+
+        seen_files, child_dirs = set(), []
+        class_name = os.path.basename(rel_dir)
+        with os.scandir(abs_dir) as entries:
+            for entry in entries:
+                rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    child_dirs.append(rel_path)
+                    continue
+                if not entry.is_file() or entry.name.startswith(INDEX_FILENAME):
+                    continue
+                seen_files.add(rel_path)
+                st = entry.stat()
+                if known_files.get(rel_path) == (st.st_size, st.st_mtime):
+                    continue
+                file_hash = _file_hash(entry.path) if compute_hash else None
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                    (rel_path, rel_dir, class_name, st.st_size, st.st_mtime, file_hash)
+                )
+                stats['files_updated'] += 1
+
+        for removed in set(known_files) - seen_files:
+            self.conn.execute("DELETE FROM files WHERE path = ?", (removed,))
+            stats['files_removed'] += 1
+        for removed in known_dirs - set(child_dirs):
+            self._remove_dir(removed, stats)
+
+        self.conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)",
+                          (rel_dir, parent, mtime))
+        for child in child_dirs:
+            self._refresh_dir(child, rel_dir, compute_hash, full, stats)
+
+    def fill_hashes(self, subdir=''):
+        """
+        CALCULA EL SHA1 DE LOS ARCHIVOS QUE AÚN NO LO TIENEN
+        Incremental: refresh() conserva el hash de los archivos sin cambios
+        y lo borra de los nuevos o modificados, así que solo se leen esos.
+
+        Retorna:
+        --------
+        int: archivos leídos
+        """
+        condition, params = _like_prefix(subdir)
+        pending = [r[0] for r in self.conn.execute(
+            f"SELECT path FROM files WHERE {condition} AND hash IS NULL", params)]
+        with self.conn:
+            for rel_path in pending:
+                self.conn.execute("UPDATE files SET hash = ? WHERE path = ?",
+                                  (_file_hash(os.path.join(self.root, rel_path)), rel_path))
+        return len(pending)
+
+    def _remove_dir(self, rel_dir, stats):
+        condition, params = _like_prefix(rel_dir)
+        stats['files_removed'] += self.conn.execute(
+            f"DELETE FROM files WHERE {condition}", params).rowcount
+        dir_condition = condition.replace('dir', 'path')
+        self.conn.execute(f"DELETE FROM dirs WHERE {dir_condition}", params)
+
+    # --------------------------------------------------------------------------
+    # Consultas
+    # --------------------------------------------------------------------------
+    def count_files(self, subdir=''):
+        """Número de archivos bajo subdir (recursivo)"""
+        condition, params = _like_prefix(subdir)
+        return self.conn.execute(
+            f"SELECT COUNT(*) FROM files WHERE {condition}", params).fetchone()[0]
+
+    def total_size(self, subdir=''):
+        """Bytes totales bajo subdir (recursivo)"""
+        condition, params = _like_prefix(subdir)
+        return self.conn.execute(
+            f"SELECT COALESCE(SUM(size), 0) FROM files WHERE {condition}",
+            params).fetchone()[0]
+
+    def list_subdirs(self, subdir=''):
+        """Nombres de los subdirectorios inmediatos (ordenados)"""
+        rows = self.conn.execute("SELECT path FROM dirs WHERE parent = ?",
+                                 (subdir.strip('/'),))
+        return sorted(os.path.basename(r[0]) for r in rows)
+
+    def find_dirs_with_children(self, children):
+        """Directorios que contienen todos los subdirectorios indicados"""
+        placeholders = ", ".join("?" for _ in children)
+        rows = self.conn.execute(
+            f"SELECT parent FROM dirs WHERE parent IS NOT NULL "
+            f"AND substr(path, length(parent) + (parent != '') + 1) IN ({placeholders}) "
+            f"GROUP BY parent HAVING COUNT(DISTINCT path) = ? ORDER BY length(parent)",
+            tuple(children) + (len(children),))
+        return [r[0] for r in rows]
+
+    def list_files(self, subdir='', extensions=None):
+        """Rutas absolutas bajo subdir, ordenadas"""
+        condition, params = _like_prefix(subdir)
+        rows = self.conn.execute(
+            f"SELECT path FROM files WHERE {condition} ORDER BY path", params)
+        paths = [os.path.join(self.root, r[0]) for r in rows]
+        if extensions:
+            paths = [p for p in paths if p.lower().endswith(tuple(extensions))]
+        return paths
+
+    def class_counts(self, subdir):
+        """{clase: número de archivos} para los subdirectorios de subdir"""
+        condition, params = _like_prefix(subdir)
+        rows = self.conn.execute(
+            f"SELECT class_name, COUNT(*) FROM files WHERE {condition} "
+            f"AND dir != ? GROUP BY class_name", params + (subdir.strip('/'),))
+        return dict(rows)
+
+    def manifest_hash(self, subdir=''):
+        """
+        HUELLA DEL CONTENIDO BAJO subdir
+        SHA1 de (ruta, tamaño, hash) de cada archivo; no depende del mtime,
+        así que una copia idéntica del dataset da la misma huella. Los
+        archivos sin hash (índice refrescado sin compute_hash) solo aportan
+        ruta y tamaño: llamar antes a fill_hashes para cubrir el contenido.
+        """
+        condition, params = _like_prefix(subdir)
+        digest = hashlib.sha1()
+        for path, size, file_hash in self.conn.execute(
+                f"SELECT path, size, hash FROM files WHERE {condition} ORDER BY path", params):
+            digest.update(f"{path}\t{size}\t{file_hash or ''}\n".encode())
+        return digest.hexdigest()
+
+    def fingerprint(self, subdir=''):
+        """
+        HUELLA BARATA DE subdir
+        SHA1 de (ruta, tamaño, mtime) de cada archivo: no lee ningún archivo,
+        pero cambia si se copia el dataset (nuevos mtime) y, con el refresh
+        incremental, no ve sobrescrituras en el mismo directorio.
+        """
+        condition, params = _like_prefix(subdir)
+        digest = hashlib.sha1()
+        for path, size, mtime in self.conn.execute(
+                f"SELECT path, size, mtime FROM files WHERE {condition} ORDER BY path", params):
+            digest.update(f"{path}\t{size}\t{mtime!r}\n".encode())
+        return digest.hexdigest()
+
+    def close(self):
+        self.conn.close()
+
+def get_dataset_index(root, compute_hash=False, verbose=False):
+    """
+    ABRE (Y REFRESCA UNA VEZ POR PROCESO) EL ÍNDICE DE root
+    """
+    key = os.path.abspath(root)
+    index = _OPEN_INDEXES.get(key)
+    if index is None:
+        index = DatasetIndex(root)
+        stats = index.refresh(compute_hash=compute_hash)
+        if verbose:
+            print(f"🗂️  Índice del dataset: {index.index_path}")
+            print(f"   - Directorios listados: {stats['dirs_scanned']} "
+                  f"(sin cambios: {stats['dirs_skipped']})")
+            print(f"   - Archivos actualizados: {stats['files_updated']} "
+                  f"en {stats['seconds']}s")
+        _OPEN_INDEXES[key] = index
+    return index
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('root', nargs='?', default="../data_raw")
+    parser.add_argument('--hash', action='store_true', help='Calcular SHA1 de cada archivo')
+    parser.add_argument('--full', action='store_true', help='Relistar todos los directorios')
+
+    args = parser.parse_args()
+
+    print("🗂️  INDEXANDO DATASET")
+    print("=" * 50)
+    index = DatasetIndex(args.root)
+    stats = index.refresh(compute_hash=args.hash, full=args.full)
+    print(f"📁 Índice: {index.index_path}")
+    print(f"   - Directorios listados: {stats['dirs_scanned']} (sin cambios: {stats['dirs_skipped']})")
+    print(f"   - Archivos actualizados: {stats['files_updated']}, eliminados: {stats['files_removed']}")
+    print(f"   - Archivos indexados: {index.count_files()}")
+    print(f"   - Tiempo: {stats['seconds']}s")
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+DETECCIÓN DE CASI-DUPLICADOS (dHash) Y SPLIT POR CLUSTERS
+=========================================================
+Fruit360 son fotogramas consecutivos de vídeo: el split 80/20 por archivo
+deja fotogramas casi idénticos en train y en validación, inflando la
+accuracy de validación. Aquí se calcula un dHash de 64 bits vectorizado
+para todo el dataset, se agrupan los casi-duplicados (distancia de
+Hamming <= max_distance) con un índice multi-hash, y el split se hace
+por cluster. Opcionalmente se submuestrea cada cluster.
+"""
+
+import os
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+HASH_BITS = 64
+
+# Tabla de popcount por byte (fallback para numpy < 2.0)
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def popcount64(values):
+    """Número de bits a 1 en cada uint64"""
+    values = np.asarray(values, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values).astype(np.int64)
+    as_bytes = values.reshape(-1, 1).view(np.uint8)
+    return _POPCOUNT_TABLE[as_bytes].sum(axis=1).reshape(values.shape).astype(np.int64)
+
+def dhash_images(images, hash_size=8):
+    """
+    dHash VECTORIZADO
+    =================
+    Escala de grises → media por bloques a (hash_size, hash_size + 1) →
+    compara cada píxel con su vecino derecho → 64 bits por imagen.
+
+    Parámetros:
+    -----------
+    images : np.ndarray
+        Lote uint8 (N, alto, ancho, 3)
+
+    Retorna:
+    --------
+    np.ndarray: hashes uint64 (N,)
+    """
+    images = np.asarray(images)
+    gray = images.astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    height, width = gray.shape[1:]
+
+    row_edges = np.linspace(0, height, hash_size + 1).astype(int)
+    col_edges = np.linspace(0, width, hash_size + 2).astype(int)
+    small = np.add.reduceat(gray, row_edges[:-1], axis=1)
+    small = np.add.reduceat(small, col_edges[:-1], axis=2)
+    small /= np.outer(np.diff(row_edges), np.diff(col_edges))
+
+    bits = small[:, :, 1:] > small[:, :, :-1]
+    packed = np.packbits(bits.reshape(len(images), -1), axis=1)
+    return packed.view('>u8').reshape(-1).astype(np.uint64)
+
+def compute_dhashes(paths, target_size=(100, 100), num_workers=None, chunk_size=2048):
+    """Decodifica (en paralelo) y calcula el dHash de cada archivo"""
+    from packed_dataset import load_image_uint8
+
+    hashes = np.empty(len(paths), dtype=np.uint64)
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        for start in range(0, len(paths), chunk_size):
+            chunk = paths[start:start + chunk_size]
+            images = np.stack(list(executor.map(
+                lambda p: load_image_uint8(p, target_size), chunk)))
+            hashes[start:start + len(chunk)] = dhash_images(images)
+    return hashes
+
+class HammingIndex:
+    """
+    ÍNDICE MULTI-HASH (MIH) PARA DISTANCIA DE HAMMING
+    =================================================
+    El hash de 64 bits se parte en num_chunks trozos. Por el principio del
+    palomar, dos hashes a distancia < num_chunks coinciden exactamente en
+    al menos un trozo, así que basta con comparar dentro de cada cubeta.
+    """
+
+    def __init__(self, hashes, num_chunks=8):
+        if HASH_BITS % num_chunks:
+            raise ValueError("❌ num_chunks debe dividir 64")
+        self.hashes = np.asarray(hashes, dtype=np.uint64)
+        self.num_chunks = num_chunks
+        self.chunk_bits = HASH_BITS // num_chunks
+        mask = np.uint64((1 << self.chunk_bits) - 1)
+
+        # Por cada trozo: índices ordenados por valor y límites de cubeta
+        self.tables = []
+        for j in range(num_chunks):
+            keys = (self.hashes >> np.uint64(j * self.chunk_bits)) & mask
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            bounds = np.flatnonzero(np.diff(sorted_keys)) + 1
+            starts = np.concatenate(([0], bounds))
+            ends = np.concatenate((bounds, [len(keys)]))
+            self.tables.append((order, starts, ends))
+
+    def pairs_within(self, max_distance):
+        """Pares (i, j), i < j, con distancia de Hamming <= max_distance"""
+        if max_distance >= self.num_chunks:
+            raise ValueError("❌ max_distance debe ser menor que num_chunks")
+
+        found = []
+        for order, starts, ends in self.tables:
+            for start, end in zip(starts, ends):
+                if end - start < 2:
+                    continue
+                members = np.sort(order[start:end])
+                i, j = np.triu_indices(len(members), k=1)
+                i, j = members[i], members[j]
+                close = popcount64(self.hashes[i] ^ self.hashes[j]) <= max_distance
+                if close.any():
+                    found.append(np.stack([i[close], j[close]], axis=1))
+
+        if not found:
+            return np.empty((0, 2), dtype=np.int64)
+        return np.unique(np.concatenate(found), axis=0)
+
+def _connected_components(num_items, pairs):
+    """Union-find sobre los pares; devuelve un id de cluster por elemento"""
+    parent = np.arange(num_items)
+
+    def find(x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    for i, j in pairs:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    roots = np.array([find(i) for i in range(num_items)])
+    return np.unique(roots, return_inverse=True)[1]
+
+def cluster_near_duplicates(hashes, labels, max_distance=4, num_chunks=8):
+    """
+    AGRUPA CASI-DUPLICADOS DENTRO DE CADA CLASE
+
+    Retorna:
+    --------
+    np.ndarray: id de cluster global (N,)
+    """
+    labels = np.asarray(labels)
+    cluster_ids = np.empty(len(labels), dtype=np.int64)
+    next_id = 0
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        pairs = HammingIndex(hashes[members], num_chunks).pairs_within(max_distance)
+        local = _connected_components(len(members), pairs)
+        cluster_ids[members] = local + next_id
+        next_id += local.max() + 1
+    return cluster_ids
+
+def split_by_cluster(labels, cluster_ids, validation_split=0.2, seed=42):
+    """
+    SPLIT TRAIN/VALIDATION SIN ROMPER CLUSTERS
+    Por cada clase se barajan los clusters y se asignan a validación hasta
+    cubrir validation_split de las imágenes de esa clase. Un cluster se
+    salta si pasarse del objetivo costaría más de lo que acerca a él, y el
+    último cluster que queda en train nunca va a validación.
+
+    Si una clase tiene un único cluster (p. ej. todos los fotogramas de una
+    fruta girando encadenados), se reparte por archivo dentro del cluster
+    con un aviso: esa clase no queda protegida contra la fuga.
+
+    Retorna:
+    --------
+    tuple: (train_indices, val_indices)
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.asarray(labels)
+    train_idx, val_idx = [], []
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        clusters = np.unique(cluster_ids[members])
+        target = int(validation_split * len(members))
+        if len(clusters) < 2:
+            print(f"⚠️  Clase {label}: un solo cluster de {len(members)} imágenes, "
+                  f"split por archivo dentro del cluster")
+            shuffled = rng.permutation(members)
+            n_val = min(target, len(members) - 1)
+            val_idx.extend(shuffled[:n_val])
+            train_idx.extend(shuffled[n_val:])
+            continue
+        rng.shuffle(clusters)
+        val_count, val_clusters = 0, 0
+        for cluster in clusters:
+            cluster_members = members[cluster_ids[members] == cluster]
+            gap = target - val_count
+            overshoot = len(cluster_members) - gap
+            if gap > 0 and overshoot <= gap and val_clusters < len(clusters) - 1:
+                val_idx.extend(cluster_members)
+                val_count += len(cluster_members)
+                val_clusters += 1
+            else:
+                train_idx.extend(cluster_members)
+    train_idx = np.sort(np.array(train_idx, dtype=np.int64))
+    val_idx = np.sort(np.array(val_idx, dtype=np.int64))
+    missing = np.setdiff1d(np.unique(labels), np.unique(labels[train_idx]))
+    if len(missing):
+        raise ValueError(f"❌ Clases sin imágenes de entrenamiento tras el split: {missing.tolist()}")
+    return train_idx, val_idx
+
+def subsample_clusters(indices, cluster_ids, max_per_cluster):
+    """
+    SUBMUESTREA CADA CLUSTER
+    Conserva como mucho max_per_cluster elementos por cluster, repartidos
+    uniformemente (fotogramas espaciados del mismo tramo de vídeo).
+    """
+    indices = np.asarray(indices)
+    keep = []
+    clusters = cluster_ids[indices]
+    for cluster in np.unique(clusters):
+        members = indices[clusters == cluster]
+        if len(members) > max_per_cluster:
+            members = members[np.linspace(0, len(members) - 1, max_per_cluster).astype(int)]
+        keep.extend(members)
+    return np.sort(np.array(keep, dtype=np.int64))
+
+def dedup_split(paths, labels, validation_split=0.2, max_distance=4,
+                max_per_cluster=None, seed=42, cache_path=None, num_workers=None):
+    """
+    SPLIT TRAIN/VALIDATION CONSCIENTE DE CASI-DUPLICADOS
+    ====================================================
+    Parámetros:
+    -----------
+    paths, labels : list
+        Imágenes de Training/ y sus etiquetas (list_image_files)
+    validation_split : float
+        Proporción para validación
+    max_distance : int
+        Distancia de Hamming máxima para considerar casi-duplicados
+    max_per_cluster : int
+        Si se indica, submuestrea los clusters de entrenamiento
+    cache_path : str
+        .npz donde guardar/reutilizar los hashes
+
+    Retorna:
+    --------
+    tuple: ((train_paths, train_labels), (val_paths, val_labels), report)
+    """
+    start = time.time()
+    paths = list(paths)
+    labels = np.asarray(labels)
+
+    hashes = None
+    if cache_path and os.path.exists(cache_path):
+        cached = np.load(cache_path, allow_pickle=False)
+        if list(cached['paths']) == paths:
+            hashes = cached['hashes']
+    if hashes is None:
+        hashes = compute_dhashes(paths, num_workers=num_workers)
+        if cache_path:
+            np.savez(cache_path, paths=np.array(paths), hashes=hashes)
+    hash_time = time.time() - start
+
+    cluster_ids = cluster_near_duplicates(hashes, labels, max_distance)
+    train_idx, val_idx = split_by_cluster(labels, cluster_ids, validation_split, seed)
+    num_train_before = len(train_idx)
+    if max_per_cluster:
+        train_idx = subsample_clusters(train_idx, cluster_ids, max_per_cluster)
+
+    cluster_sizes = np.bincount(cluster_ids)
+    report = {
+        'images': len(paths),
+        'clusters': int(len(cluster_sizes)),
+        'mean_cluster_size': round(float(cluster_sizes.mean()), 2),
+        'max_cluster_size': int(cluster_sizes.max()),
+        'train': int(len(train_idx)),
+        'val': int(len(val_idx)),
+        'train_removed_by_subsampling': int(num_train_before - len(train_idx)),
+        'hash_seconds': round(hash_time, 2),
+        'total_seconds': round(time.time() - start, 2),
+    }
+
+    print(f"🧬 Split por clusters de casi-duplicados (dHash, Hamming <= {max_distance}):")
+    print(f"   - Clusters: {report['clusters']} (media {report['mean_cluster_size']}, "
+          f"máx {report['max_cluster_size']})")
+    print(f"   - Train: {report['train']}  Val: {report['val']}")
+    if max_per_cluster:
+        print(f"   - Submuestreo (máx {max_per_cluster}/cluster): "
+              f"-{report['train_removed_by_subsampling']} imágenes de train")
+
+    train = ([paths[i] for i in train_idx], labels[train_idx].tolist())
+    val = ([paths[i] for i in val_idx], labels[val_idx].tolist())
+    return train, val, report
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+    from preprocess_data import list_image_files, split_train_val
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data_dir', type=str, default="../data_raw/fruits-360_100x100/fruits-360")
+    parser.add_argument('--max_distance', type=int, default=4)
+    parser.add_argument('--max_per_cluster', type=int, default=None)
+    parser.add_argument('--validation_split', type=float, default=0.2)
+
+    args = parser.parse_args()
+
+    print("🧬 ANÁLISIS DE CASI-DUPLICADOS - FRUIT360")
+    print("=" * 50)
+
+    train_dir = os.path.join(args.data_dir, "Training")
+    class_names = sorted(d for d in os.listdir(train_dir)
+                         if os.path.isdir(os.path.join(train_dir, d)))
+    paths, labels = list_image_files(train_dir, class_names)
+
+    (_, _), (val_paths, _), report = dedup_split(
+        paths, labels, args.validation_split, args.max_distance,
+        args.max_per_cluster, cache_path=os.path.join(args.data_dir, ".dhash_cache.npz")
+    )
+
+    # Cuántas imágenes del split por defecto tienen un casi-duplicado al otro lado
+    (default_train, _), (default_val, _) = split_train_val(paths, labels, args.validation_split)
+    hashes = np.load(os.path.join(args.data_dir, ".dhash_cache.npz"))['hashes']
+    cluster_ids = cluster_near_duplicates(hashes, labels, args.max_distance)
+    position = {p: i for i, p in enumerate(paths)}
+    train_clusters = set(cluster_ids[[position[p] for p in default_train]])
+    leaked = sum(1 for p in default_val if cluster_ids[position[p]] in train_clusters)
+    print(f"\n⚠️  Split por defecto: {leaked}/{len(default_val)} imágenes de validación "
+          f"tienen un casi-duplicado en train")
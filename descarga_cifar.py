@@ -1,13 +1,14 @@
 import os
-import subprocess
 import sys
-from kaggle.api.kaggle_api_extended import KaggleApi
 
-def download_fruit360_dataset(dataset_dir="../data_raw", verbose=True):
+def download_fruit360_dataset(dataset_dir="../data_raw", verbose=True, url=None,
+                              num_connections=4):
     """
     DESCARGAR DATASET FRUIT360 DESDE KAGGLE
     =======================================
-    Función compatible con versiones antiguas de la API de Kaggle
+    Función compatible con versiones antiguas de la API de Kaggle.
+    La descarga es reanudable y se verifica archivo a archivo (ver
+    dataset_download.py); url permite usar otro servidor (p. ej. local).
     """
     
     if verbose:
@@ -15,16 +16,18 @@ def download_fruit360_dataset(dataset_dir="../data_raw", verbose=True):
         print(f"📂 Directorio destino: {os.path.abspath(dataset_dir)}")
     
     try:
-        # ======================================================================
-        # PASO 1: VERIFICAR INSTALACIÓN DE KAGGLE
-        # ======================================================================
-        try:
-            from kaggle.api.kaggle_api_extended import KaggleApi
-        except ImportError:
-            error_msg = "Librería 'kaggle' no instalada. Ejecuta: pip install kaggle"
-            if verbose:
-                print(f"❌ {error_msg}")
-            return False, error_msg, None
+        # Con url propia (servidor local/espejo) no hace falta Kaggle
+        if url is None:
+            # ======================================================================
+            # PASO 1: VERIFICAR INSTALACIÓN DE KAGGLE
+            # ======================================================================
+            try:
+                from kaggle.api.kaggle_api_extended import KaggleApi
+            except ImportError:
+                error_msg = "Librería 'kaggle' no instalada. Ejecuta: pip install kaggle"
+                if verbose:
+                    print(f"❌ {error_msg}")
+                return False, error_msg, None
         
         # ======================================================================
         # PASO 2: CONFIGURAR DIRECTORIO
@@ -37,56 +40,58 @@ def download_fruit360_dataset(dataset_dir="../data_raw", verbose=True):
                 print(f"❌ {error_msg}")
             return False, error_msg, None
         
-        # ======================================================================
-        # PASO 3: AUTENTICACIÓN (MÉTODO COMPATIBLE)
-        # ======================================================================
-        if verbose:
-            print("🔐 Autenticando con Kaggle API...")
-        
-        try:
-            api = KaggleApi()
-            api.authenticate()
-            if verbose:
-                print("✅ Autenticación exitosa")
-        except Exception as auth_error:
-            error_msg = f"Error de autenticación: {auth_error}"
+        # Autenticación y verificación solo contra Kaggle
+        if url is None:
+            # ======================================================================
+            # PASO 3: AUTENTICACIÓN (MÉTODO COMPATIBLE)
+            # ======================================================================
             if verbose:
-                print(f"❌ {error_msg}")
-                print("💡 Verifica tu archivo ~/.kaggle/kaggle.json")
-            return False, error_msg, None
-        
-        # ======================================================================
-        # PASO 4: VERIFICAR DATASET (MÉTODO ALTERNATIVO)
-        # ======================================================================
-        if verbose:
-            print("📊 Verificando disponibilidad del dataset...")
+                print("🔐 Autenticando con Kaggle API...")
         
-        # Método alternativo para verificar el dataset
-        try:
-            # Usar el método de listado que es más compatible
-            datasets = api.datasets_list(search="fruits")
-            fruit_dataset = None
-            
-            for dataset in datasets:
-                if dataset.ref == "moltean/fruits":
-                    fruit_dataset = dataset
-                    break
-            
-            if fruit_dataset:
+            try:
+                api = KaggleApi()
+                api.authenticate()
                 if verbose:
-                    print(f"✅ Dataset encontrado: '{fruit_dataset.title}'")
-                    print(f"   👤 Autor: {fruit_dataset.ownerName}")
-            else:
-                error_msg = "Dataset 'moltean/fruits' no encontrado"
+                    print("✅ Autenticación exitosa")
+            except Exception as auth_error:
+                error_msg = f"Error de autenticación: {auth_error}"
                 if verbose:
                     print(f"❌ {error_msg}")
+                    print("💡 Verifica tu archivo ~/.kaggle/kaggle.json")
                 return False, error_msg, None
-                
-        except Exception as info_error:
-            # Si falla el listado, intentar igualmente la descarga
+        
+            # ======================================================================
+            # PASO 4: VERIFICAR DATASET (MÉTODO ALTERNATIVO)
+            # ======================================================================
             if verbose:
-                print(f"⚠️  No se pudo verificar metadata: {info_error}")
-                print("   Intentando descarga directamente...")
+                print("📊 Verificando disponibilidad del dataset...")
+        
+            # Método alternativo para verificar el dataset
+            try:
+                # Usar el método de listado que es más compatible
+                datasets = api.datasets_list(search="fruits")
+                fruit_dataset = None
+            
+                for dataset in datasets:
+                    if dataset.ref == "moltean/fruits":
+                        fruit_dataset = dataset
+                        break
+            
+                if fruit_dataset:
+                    if verbose:
+                        print(f"✅ Dataset encontrado: '{fruit_dataset.title}'")
+                        print(f"   👤 Autor: {fruit_dataset.ownerName}")
+                else:
+                    error_msg = "Dataset 'moltean/fruits' no encontrado"
+                    if verbose:
+                        print(f"❌ {error_msg}")
+                    return False, error_msg, None
+                
+            except Exception as info_error:
+                # Si falla el listado, intentar igualmente la descarga
+                if verbose:
+                    print(f"⚠️  No se pudo verificar metadata: {info_error}")
+                    print("   Intentando descarga directamente...")
         
         # ======================================================================
         # PASO 5: DESCARGAR USANDO MÉTODO MÁS COMPATIBLE
@@ -97,47 +102,27 @@ def download_fruit360_dataset(dataset_dir="../data_raw", verbose=True):
             print("   Dataset: https://www.kaggle.com/datasets/moltean/fruits")
         
         try:
-            # Método más compatible para descargar
-            api.dataset_download_files(
-                "moltean/fruits",      # Identificador del dataset
-                path=dataset_dir,      # Directorio de destino
-                unzip=True,            # Descomprimir automáticamente
-                quiet=not verbose      # Mostrar progreso si verbose=True
+            # Descarga por trozos reanudable + extracción paralela verificada
+            from dataset_download import (download_and_extract, kaggle_auth_headers,
+                                          KAGGLE_DOWNLOAD_URL)
+            download_and_extract(
+                url or KAGGLE_DOWNLOAD_URL.format(dataset="moltean/fruits"),
+                dataset_dir,
+                headers=None if url else kaggle_auth_headers(),
+                num_connections=num_connections,
+                verbose=verbose
             )
             
             if verbose:
                 print("✅ Descarga y descompresión completadas!")
                 
         except Exception as download_error:
-            # Intentar con método alternativo usando subprocess
+            # El progreso queda guardado: relanzar continúa donde se quedó
+            error_msg = f"Error en la descarga: {download_error}"
             if verbose:
-                print(f"⚠️  Error con API: {download_error}")
-                print("🔄 Intentando con comando directo...")
-            
-            try:
-                cmd = [
-                    "kaggle", "datasets", "download", 
-                    "moltean/fruits",
-                    "--unzip",
-                    "--path", dataset_dir
-                ]
-                
-                if not verbose:
-                    cmd.append("--quiet")
-                
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=3600)
-                
-                if result.returncode != 0:
-                    raise Exception(f"Comando falló: {result.stderr}")
-                
-                if verbose:
-                    print("✅ Descarga completada via comando directo!")
-                    
-            except Exception as cmd_error:
-                error_msg = f"Error en la descarga: {cmd_error}"
-                if verbose:
-                    print(f"❌ {error_msg}")
-                return False, error_msg, None
+                print(f"❌ {error_msg}")
+                print("💡 Vuelve a ejecutar para reanudar la descarga")
+            return False, error_msg, None
         
         # ======================================================================
         # PASO 6: VERIFICAR INTEGRIDAD DE LA DESCARGA
@@ -225,15 +210,10 @@ def download_fruit360_dataset(dataset_dir="../data_raw", verbose=True):
 def get_folder_size(path):
     """
     FUNCIÓN AUXILIAR: Calcular tamaño de directorio
+    (consulta el índice del dataset en vez de recorrer el árbol)
     """
-    total_size = 0
-    for dirpath, dirnames, filenames in os.walk(path):
-        for filename in filenames:
-            filepath = os.path.join(dirpath, filename)
-            try:
-                total_size += os.path.getsize(filepath)
-            except OSError:
-                continue
+    from dataset_index import get_dataset_index
+    total_size = get_dataset_index(path).total_size()
     
     # Convertir a formato legible
     for unit in ['B', 'KB', 'MB', 'GB']:
@@ -244,13 +224,24 @@ def get_folder_size(path):
 
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dataset_dir', type=str, default="../data_raw")
+    parser.add_argument('--url', type=str, default=None,
+                        help='URL alternativa del zip (espejo o servidor local)')
+    parser.add_argument('--connections', type=int, default=4)
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("🌐 DESCARGADOR DE DATASET FRUIT360 (COMPATIBLE)")
     print("=" * 60)
     
     success, message, dataset_path = download_fruit360_dataset(
-        dataset_dir="../data_raw",
-        verbose=True
+        dataset_dir=args.dataset_dir,
+        verbose=True,
+        url=args.url,
+        num_connections=args.connections
     )
     
     print("\n" + "=" * 60)
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+DESTILACIÓN DE CONOCIMIENTO EN MODELOS PEQUEÑOS
+===============================================
+El modelo entrenado con train_transfer_learning hace de profesor y un
+alumno mucho más pequeño (MobileNetV2 con alpha < 1 o una CNN compacta)
+aprende de sus soft targets:
+
+    loss = alpha · CE(y, alumno) + (1 - alpha) · T² · KL(softmax(t/T) ‖ softmax(s/T))
+
+Los logits del profesor se calculan UNA vez sobre el dataset empaquetado
+(packed_dataset.py) y se guardan en disco. Al final se genera una tabla
+latencia-vs-accuracy (profesor y alumnos) para elegir el modelo que
+cumple el SLO de latencia por imagen.
+
+Uso:
+    python distillation.py --teacher fruit360_transfer_learning.h5 \
+        --students mobilenetv2_0.35 mobilenetv2_0.5 tiny_cnn --slo_ms 5
+"""
+
+import os
+import json
+import time
+import hashlib
+from datetime import datetime
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers
+from tensorflow.keras.callbacks import EarlyStopping
+from packed_dataset import load_manifest, load_packed_split
+
+STUDENT_CHOICES = ('mobilenetv2_0.35', 'mobilenetv2_0.5', 'mobilenetv2_0.75', 'tiny_cnn')
+
+# ==============================================================================
+# LOGITS DEL PROFESOR (CACHÉ)
+# ==============================================================================
+def create_logits_model(model):
+    """
+    MODELO QUE DEVUELVE LOS LOGITS (ANTES DE LA SOFTMAX)
+    La capa 'predictions' es Dense + softmax: se reutilizan sus pesos sin
+    activación sobre la entrada de esa capa.
+    """
+    predictions = model.get_layer('predictions')
+    kernel, bias = predictions.get_weights()
+    features = model.get_layer('predictions').input
+    logits = layers.Dense(kernel.shape[1], name='teacher_logits', dtype='float32')(features)
+    logits_model = tf.keras.Model(inputs=model.input, outputs=logits)
+    logits_model.get_layer('teacher_logits').set_weights([kernel, bias])
+    return logits_model
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}|{stat.st_size}|{int(stat.st_mtime)}"
+
+def compute_teacher_logits(teacher_path, packed_dir, cache_root="../distillation_cache",
+                           batch_size=256, splits=('train', 'val')):
+    """
+    CALCULA (UNA VEZ) LOS LOGITS DEL PROFESOR
+    =========================================
+    La caché depende del archivo del profesor y del manifest del dataset
+    empaquetado; si cambia cualquiera de los dos se recalcula.
+
+    Retorna:
+    --------
+    dict: {split: np.ndarray (N, num_classes) en memmap}
+    """
+    manifest = load_manifest(packed_dir)
+    key = hashlib.sha1(f"{_file_signature(teacher_path)}|{manifest['manifest_hash']}"
+                       .encode()).hexdigest()[:16]
+    cache_dir = os.path.join(cache_root, key)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    logits = {}
+    logits_model = None
+    for split in splits:
+        path = os.path.join(cache_dir, f"teacher_logits_{split}.npy")
+        if not os.path.exists(path):
+            if logits_model is None:
+                print(f"🧑‍🏫 Calculando logits del profesor: {teacher_path}")
+                teacher = tf.keras.models.load_model(teacher_path, compile=False)
+                logits_model = create_logits_model(teacher)
+            images, _ = load_packed_split(packed_dir, split)
+            start = time.time()
+            tmp_path = path + ".tmp.npy"
+            output = np.lib.format.open_memmap(
+                tmp_path, mode='w+', dtype=np.float32,
+                shape=(len(images), manifest['num_classes']))
+            for i in range(0, len(images), batch_size):
+                batch = images[i:i + batch_size].astype(np.float32) / 255.0
+                output[i:i + len(batch)] = logits_model.predict_on_batch(batch)
+            output.flush()
+            del output
+            os.replace(tmp_path, path)
+            print(f"   - {split}: {len(images)} imágenes en {time.time() - start:.1f}s")
+        logits[split] = np.load(path, mmap_mode='r')
+    print(f"✅ Logits del profesor en caché: {cache_dir}")
+    return logits
+
+class DistillationSequence(tf.keras.utils.Sequence):
+    """Lotes (x, (y_one_hot, logits_profesor)) desde el memmap empaquetado"""
+
+    def __init__(self, images, labels, teacher_logits, num_classes, batch_size=64,
+                 shuffle=False, seed=42):
+        super().__init__()
+        self.images = images
+        self.labels = labels
+        self.teacher_logits = teacher_logits
+        self.num_classes = num_classes
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+        self.indices = np.arange(len(labels))
+        if shuffle:
+            self.rng.shuffle(self.indices)
+
+    def __len__(self):
+        return int(np.ceil(len(self.indices) / self.batch_size))
+
+    def __getitem__(self, index):
+        batch_idx = np.sort(self.indices[index * self.batch_size:(index + 1) * self.batch_size])
+        x = self.images[batch_idx].astype(np.float32) / 255.0
+        y = np.eye(self.num_classes, dtype=np.float32)[self.labels[batch_idx]]
+        return x, (y, np.asarray(self.teacher_logits[batch_idx], dtype=np.float32))
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.indices)
+
+# ==============================================================================
+# ALUMNOS
+# ==============================================================================
+def create_tiny_cnn(num_classes, input_shape=(100, 100, 3)):
+    """CNN compacta: 4 bloques separables + GlobalAveragePooling"""
+    inputs = layers.Input(shape=input_shape)
+    x = layers.Conv2D(24, 3, strides=2, padding='same', use_bias=False)(inputs)
+    x = layers.BatchNormalization()(x)
+    x = layers.ReLU(6.0)(x)
+    for filters in (32, 64, 128, 192):
+        x = layers.SeparableConv2D(filters, 3, padding='same', use_bias=False)(x)
+        x = layers.BatchNormalization()(x)
+        x = layers.ReLU(6.0)(x)
+        x = layers.MaxPooling2D()(x)
+    x = layers.GlobalAveragePooling2D(name='head_pool')(x)
+    x = layers.Dropout(0.2)(x)
+    logits = layers.Dense(num_classes, name='logits', dtype='float32')(x)
+    return tf.keras.Model(inputs, logits, name='tiny_cnn')
+
+def create_student_model(student='mobilenetv2_0.35', num_classes=208,
+                         input_shape=(100, 100, 3), weights='imagenet'):
+    """
+    CREA UN ALUMNO QUE DEVUELVE LOGITS
+
+    Parámetros:
+    -----------
+    student : str
+        'mobilenetv2_<alpha>' (alpha 0.35/0.5/0.75, pesos ImageNet) o 'tiny_cnn'
+    """
+    if student == 'tiny_cnn':
+        return create_tiny_cnn(num_classes, input_shape)
+    if not student.startswith('mobilenetv2_'):
+        raise ValueError(f"Alumno no soportado: {student}")
+    alpha = float(student.split('_')[1])
+    base = tf.keras.applications.MobileNetV2(
+        input_shape=input_shape, alpha=alpha, include_top=False, weights=weights)
+    x = layers.GlobalAveragePooling2D(name='head_pool')(base.output)
+    x = layers.Dropout(0.2)(x)
+    logits = layers.Dense(num_classes, name='logits', dtype='float32')(x)
+    return tf.keras.Model(base.input, logits, name=student.replace('.', ''))
+
+class Distiller(tf.keras.Model):
+    """
+    ENTRENA UN ALUMNO CON ETIQUETAS + SOFT TARGETS DEL PROFESOR
+    Espera lotes (x, (y_one_hot, logits_profesor)).
+    """
+
+    def __init__(self, student, alpha=0.1, temperature=4.0):
+        super().__init__()
+        self.student = student
+        self.alpha = alpha
+        self.temperature = temperature
+        self.accuracy = tf.keras.metrics.CategoricalAccuracy(name='accuracy')
+        self.loss_tracker = tf.keras.metrics.Mean(name='loss')
+
+    @property
+    def metrics(self):
+        return [self.loss_tracker, self.accuracy]
+
+    def call(self, x, training=False):
+        return self.student(x, training=training)
+
+    def _loss(self, y, teacher_logits, student_logits):
+        hard = tf.keras.losses.categorical_crossentropy(y, student_logits, from_logits=True)
+        t = self.temperature
+        soft = tf.keras.losses.kl_divergence(tf.nn.softmax(teacher_logits / t),
+                                             tf.nn.softmax(student_logits / t))
+        return tf.reduce_mean(self.alpha * hard + (1.0 - self.alpha) * t * t * soft)
+
+    def train_step(self, data):
+        x, (y, teacher_logits) = data
+        with tf.GradientTape() as tape:
+            student_logits = self.student(x, training=True)
+            loss = self._loss(y, teacher_logits, student_logits)
+        gradients = tape.gradient(loss, self.student.trainable_variables)
+        self.optimizer.apply_gradients(zip(gradients, self.student.trainable_variables))
+        self.loss_tracker.update_state(loss)
+        self.accuracy.update_state(y, student_logits)
+        return {m.name: m.result() for m in self.metrics}
+
+    def test_step(self, data):
+        x, (y, teacher_logits) = data
+        student_logits = self.student(x, training=False)
+        self.loss_tracker.update_state(self._loss(y, teacher_logits, student_logits))
+        self.accuracy.update_state(y, student_logits)
+        return {m.name: m.result() for m in self.metrics}
+
+def export_student(student, path):
+    """Alumno + softmax como modelo Keras normal (mismo contrato que el profesor)"""
+    probabilities = layers.Softmax(name='predictions', dtype='float32')(student.output)
+    model = tf.keras.Model(student.input, probabilities, name=student.name)
+    model.save(path)
+    return model
+
+def distill_student(student_name, teacher_logits, packed_dir, epochs=15, batch_size=64,
+                    learning_rate=1e-3, alpha=0.1, temperature=4.0, weights='imagenet',
+                    output_dir="students"):
+    """
+    ENTRENA UN ALUMNO POR DESTILACIÓN
+
+    Retorna:
+    --------
+    tuple: (modelo exportado con softmax, ruta .h5, history)
+    """
+    manifest = load_manifest(packed_dir)
+    num_classes = manifest['num_classes']
+    target_size = tuple(manifest['target_size'])
+    train_images, train_labels = load_packed_split(packed_dir, 'train')
+    val_images, val_labels = load_packed_split(packed_dir, 'val')
+
+    # Sin aumento: los logits cacheados corresponden a las imágenes originales
+    train_seq = DistillationSequence(train_images, train_labels, teacher_logits['train'],
+                                     num_classes, batch_size, shuffle=True)
+    val_seq = DistillationSequence(val_images, val_labels, teacher_logits['val'],
+                                   num_classes, batch_size)
+
+    print(f"\n🎓 Alumno: {student_name}")
+    student = create_student_model(student_name, num_classes, target_size + (3,), weights)
+    print(f"   - Parámetros: {student.count_params():,}")
+    distiller = Distiller(student, alpha=alpha, temperature=temperature)
+    distiller.compile(optimizer=tf.keras.optimizers.Adam(learning_rate))
+    history = distiller.fit(
+        train_seq,
+        epochs=epochs,
+        validation_data=val_seq,
+        callbacks=[EarlyStopping(monitor='val_accuracy', patience=3,
+                                 restore_best_weights=True, mode='max')],
+        verbose=2
+    )
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"student_{student_name}.h5")
+    model = export_student(student, path)
+    print(f"💾 Alumno guardado: {path}")
+    return model, path, history
+
+# ==============================================================================
+# TABLA LATENCIA VS ACCURACY
+# ==============================================================================
+def measure_model(model, test_images, test_labels, batch_size=256, iterations=100):
+    """
+    ACCURACY EN TEST Y LATENCIA POR IMAGEN (batch 1, CPU)
+
+    Retorna:
+    --------
+    dict: accuracy, p50_ms, p99_ms, params, size_mb
+    """
+    correct = 0
+    for i in range(0, len(test_images), batch_size):
+        batch = test_images[i:i + batch_size].astype(np.float32) / 255.0
+        predictions = np.argmax(model.predict_on_batch(batch), axis=1)
+        correct += int(np.sum(predictions == test_labels[i:i + batch_size]))
+
+    single = test_images[:1].astype(np.float32) / 255.0
+    for _ in range(5):
+        model(single, training=False)
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        model(single, training=False)
+        times.append(time.perf_counter() - start)
+
+    return {
+        'accuracy': round(correct / len(test_labels), 4),
+        'p50_ms': round(float(np.percentile(times, 50)) * 1000, 3),
+        'p99_ms': round(float(np.percentile(times, 99)) * 1000, 3),
+        'params': int(model.count_params()),
+        'size_mb': round(model.count_params() * 4 / 2**20, 2),
+    }
+
+def latency_accuracy_table(models, packed_dir, slo_ms=None, results_dir="training_results"):
+    """
+    COMPARA PROFESOR Y ALUMNOS
+    Guarda la tabla en Markdown y JSON en results_dir.
+
+    Parámetros:
+    -----------
+    models : dict
+        {nombre: ruta .h5}
+    slo_ms : float
+        SLO de latencia p99 por imagen (marca los modelos que lo cumplen)
+
+    Retorna:
+    --------
+    list: filas de la tabla ordenadas por latencia
+    """
+    test_images, test_labels = load_packed_split(packed_dir, 'test')
+    rows = []
+    for name, path in models.items():
+        model = tf.keras.models.load_model(path, compile=False)
+        row = {'model': name, 'path': path}
+        row.update(measure_model(model, test_images, test_labels))
+        row['meets_slo'] = bool(slo_ms is None or row['p99_ms'] <= slo_ms)
+        rows.append(row)
+    rows.sort(key=lambda r: r['p50_ms'])
+
+    header = "| Modelo | Accuracy | p50 ms | p99 ms | Parámetros | MB | SLO |"
+    lines = [header, "|---|---|---|---|---|---|---|"]
+    for r in rows:
+        slo = "✅" if r['meets_slo'] else "❌"
+        lines.append(f"| {r['model']} | {r['accuracy']:.4f} | {r['p50_ms']:.2f} | "
+                     f"{r['p99_ms']:.2f} | {r['params']:,} | {r['size_mb']:.1f} | {slo} |")
+    table = "\n".join(lines)
+    print("\n📋 LATENCIA VS ACCURACY" + (f" (SLO p99 ≤ {slo_ms} ms)" if slo_ms else ""))
+    print(table)
+
+    eligible = [r for r in rows if r['meets_slo']]
+    if slo_ms and eligible:
+        best = max(eligible, key=lambda r: r['accuracy'])
+        print(f"\n🏆 Mejor modelo dentro del SLO: {best['model']} "
+              f"({best['accuracy']:.2%}, p99 {best['p99_ms']:.2f} ms)")
+
+    os.makedirs(results_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    with open(os.path.join(results_dir, f"distillation_{timestamp}.md"), 'w') as f:
+        f.write(table + "\n")
+    with open(os.path.join(results_dir, f"distillation_{timestamp}.json"), 'w') as f:
+        json.dump({'slo_ms': slo_ms, 'rows': rows}, f, indent=2)
+    print(f"💾 Tabla guardada en: {results_dir}/distillation_{timestamp}.md")
+    return rows
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--teacher', type=str, default='fruit360_transfer_learning.h5')
+    parser.add_argument('--students', type=str, nargs='+',
+                        default=['mobilenetv2_0.35', 'tiny_cnn'], choices=list(STUDENT_CHOICES))
+    parser.add_argument('--packed_dir', type=str, default="../data_packed/fruits-360_100x100")
+    parser.add_argument('--epochs', type=int, default=15)
+    parser.add_argument('--batch_size', type=int, default=64)
+    parser.add_argument('--alpha', type=float, default=0.1,
+                        help='Peso de la pérdida con etiquetas reales')
+    parser.add_argument('--temperature', type=float, default=4.0)
+    parser.add_argument('--no_pretrained', action='store_true',
+                        help='Alumnos MobileNetV2 sin pesos ImageNet')
+    parser.add_argument('--slo_ms', type=float, default=None)
+
+    args = parser.parse_args()
+
+    print("🎓 DESTILACIÓN DE CONOCIMIENTO - FRUIT360")
+    print("=" * 50)
+    teacher_logits = compute_teacher_logits(args.teacher, args.packed_dir)
+
+    models = {'teacher': args.teacher}
+    for student_name in args.students:
+        _, path, _ = distill_student(
+            student_name, teacher_logits, args.packed_dir,
+            epochs=args.epochs,
+            batch_size=args.batch_size,
+            alpha=args.alpha,
+            temperature=args.temperature,
+            weights=None if args.no_pretrained else 'imagenet'
+        )
+        models[student_name] = path
+
+    latency_accuracy_table(models, args.packed_dir, slo_ms=args.slo_ms)
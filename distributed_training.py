@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+ENTRENAMIENTO DATA-PARALLEL MULTI-PROCESO / MULTI-MÁQUINA
+=========================================================
+Usa tf.distribute.MultiWorkerMirroredStrategy leyendo TF_CONFIG (ver
+launch_workers.py). La entrada se construye con DatasetCreator: cada
+worker lee SOLO su fragmento de Training/ (los archivos se reparten
+antes de decodificar) con el batch por réplica, y todos ejecutan el
+mismo número de pasos por época. El test completo lo evalúa el chief. Con --backend tfrecord cada worker lee solo
+sus shards TFRecord (worker_index::num_workers, ver tfrecord_shards.py).
+Solo el chief escribe los checkpoints y el
+modelo final en su ruta real; el resto escribe en un directorio temporal
+propio que se borra al terminar.
+"""
+
+import os
+import json
+import math
+import shutil
+import tempfile
+import tensorflow as tf
+from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
+from preprocess_data import list_image_files, make_train_val_split, make_image_dataset
+
+def get_worker_info():
+    """
+    LEE TF_CONFIG
+
+    Retorna:
+    --------
+    dict: task_type, task_id, num_workers, is_chief
+    """
+    tf_config = json.loads(os.environ.get('TF_CONFIG', '{}'))
+    cluster = tf_config.get('cluster', {})
+    task = tf_config.get('task', {'type': 'worker', 'index': 0})
+    num_workers = len(cluster.get('worker', [])) + len(cluster.get('chief', []))
+    task_type, task_id = task['type'], int(task['index'])
+    is_chief = task_type == 'chief' or (task_type == 'worker' and task_id == 0
+                                        and 'chief' not in cluster)
+    # Índice global del worker (el chief, si existe, es el 0)
+    worker_index = task_id + (1 if 'chief' in cluster and task_type == 'worker' else 0)
+    return {
+        'task_type': task_type,
+        'task_id': task_id,
+        'worker_index': 0 if task_type == 'chief' else worker_index,
+        'num_workers': max(num_workers, 1),
+        'is_chief': is_chief,
+    }
+
+def worker_safe_path(path, worker):
+    """
+    RUTA DE ESCRITURA SEGURA POR WORKER
+    Todos los workers deben guardar (el guardado participa en operaciones
+    colectivas), pero solo el chief escribe en la ruta real.
+    """
+    if worker['is_chief']:
+        return path
+    temp_dir = os.path.join(tempfile.gettempdir(),
+                            f"fruit360_worker_{worker['task_type']}_{worker['task_id']}")
+    os.makedirs(temp_dir, exist_ok=True)
+    return os.path.join(temp_dir, os.path.basename(path))
+
+def cleanup_worker_path(path, worker):
+    """Borra el directorio temporal de un worker no chief"""
+    if not worker['is_chief']:
+        shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+def _shard(paths, labels, worker_index, num_workers):
+    return paths[worker_index::num_workers], labels[worker_index::num_workers]
+
+def _dataset_creator(build, global_batch_size):
+    """
+    ENTRADA DISTRIBUIDA PARA model.fit
+    Cada pipeline de entrada (uno por worker) construye su fragmento con el
+    batch por réplica de InputContext, así Keras no vuelve a dividir el
+    lote. El dataset se repite: la época la fija steps_per_epoch.
+    """
+    def dataset_fn(input_context):
+        batch_size = input_context.get_per_replica_batch_size(global_batch_size)
+        ds = build(input_context.input_pipeline_id, input_context.num_input_pipelines,
+                   batch_size)
+        options = tf.data.Options()
+        options.experimental_distribute.auto_shard_policy = \
+            tf.data.experimental.AutoShardPolicy.OFF  # ya fragmentado a mano
+        return ds.repeat().with_options(options)
+
+    return tf.keras.utils.experimental.DatasetCreator(dataset_fn)
+
+def make_sharded_datasets(data_dir, global_batch_size=32, target_size=(100, 100),
+                          validation_split=0.2, augment_training=True, dedup=False, seed=42):
+    """
+    ENTRADAS FRAGMENTADAS POR WORKER (ÁRBOL DE IMÁGENES)
+    ====================================================
+    Mismo split y orden de clases que preprocess_fruit360_data; cada
+    pipeline se queda con un archivo de cada num_input_pipelines (reparto
+    equilibrado por clase).
+
+    Retorna:
+    --------
+    tuple: (train_input, val_input, make_test_ds, fit_kwargs, class_names,
+            num_classes); make_test_ds() da el test completo sin fragmentar
+            y fit_kwargs los steps_per_epoch / validation_steps
+    """
+    train_dir = os.path.join(data_dir, "Training")
+    test_dir = os.path.join(data_dir, "Test")
+    if not os.path.exists(train_dir) or not os.path.exists(test_dir):
+        raise ValueError("❌ No se encontraron los directorios Training/Test")
+
+    class_names = sorted([d for d in os.listdir(train_dir)
+                         if os.path.isdir(os.path.join(train_dir, d))])
+    num_classes = len(class_names)
+
+    paths, labels = list_image_files(train_dir, class_names)
+    (train_paths, train_labels), (val_paths, val_labels) = make_train_val_split(
+        paths, labels, validation_split, dedup, seed=seed,
+        cache_path=os.path.join(data_dir, ".dhash_cache.npz")
+    )
+    test_paths, test_labels = list_image_files(test_dir, class_names)
+
+    def build(split_paths, split_labels, training):
+        def build_shard(index, num_pipelines, batch_size):
+            shard_paths, shard_labels = _shard(split_paths, split_labels, index, num_pipelines)
+            return make_image_dataset(shard_paths, shard_labels, num_classes, target_size,
+                                      batch_size, shuffle=training,
+                                      augment=training and augment_training,
+                                      seed=seed + index)
+        return build_shard
+
+    fit_kwargs = {
+        'steps_per_epoch': max(len(train_paths) // global_batch_size, 1),
+        # Redondeo hacia arriba: ninguna imagen de validación se queda fuera
+        'validation_steps': max(math.ceil(len(val_paths) / global_batch_size), 1),
+    }
+    print(f"   - Train: {len(train_paths)} imágenes, {fit_kwargs['steps_per_epoch']} "
+          f"pasos/época con batch global {global_batch_size}")
+    return (_dataset_creator(build(train_paths, train_labels, True), global_batch_size),
+            _dataset_creator(build(val_paths, val_labels, False), global_batch_size),
+            lambda: make_image_dataset(test_paths, test_labels, num_classes, target_size,
+                                       global_batch_size),
+            fit_kwargs, class_names, num_classes)
+
+def make_shard_stream_datasets(shard_dir, global_batch_size=32, num_workers=1,
+                               target_size=(100, 100), augment_training=True, seed=42):
+    """
+    ENTRADAS DESDE SHARDS TFRecord REPARTIDOS POR WORKER
+    ===================================================
+    Cada pipeline lee los shards de train input_pipeline_id::num_pipelines;
+    validación igual si hay shards para todos (si no, cada uno la lee
+    entera). Mismo retorno que make_sharded_datasets.
+    """
+    from tfrecord_shards import ShardedStream, load_shard_index, worker_steps
+
+    index = load_shard_index(shard_dir)
+    val_shards = index['splits']['val']['shards']
+    val_samples = sum(s['num_records'] for s in val_shards)
+    shard_val = len(val_shards) >= num_workers
+    per_worker_batch = max(global_batch_size // num_workers, 1)
+
+    def build_train(pipeline_id, num_pipelines, batch_size):
+        return ShardedStream(shard_dir, 'train', batch_size, target_size, shuffle=True,
+                             augment=augment_training, worker_index=pipeline_id,
+                             num_workers=num_pipelines, seed=seed).dataset()
+
+    def build_val(pipeline_id, num_pipelines, batch_size):
+        if not shard_val:
+            pipeline_id, num_pipelines = 0, 1
+        return ShardedStream(shard_dir, 'val', batch_size, target_size,
+                             worker_index=pipeline_id, num_workers=num_pipelines).dataset()
+
+    fit_kwargs = {
+        # Pasos que todos los workers completan con sus shards sin repetir
+        'steps_per_epoch': worker_steps(shard_dir, 'train', num_workers, per_worker_batch),
+        'validation_steps': max(math.ceil(
+            val_samples / (global_batch_size if shard_val else per_worker_batch)), 1),
+    }
+    print(f"   - Shards: {fit_kwargs['steps_per_epoch']} pasos/época "
+          f"con batch global {global_batch_size}")
+    return (_dataset_creator(build_train, global_batch_size),
+            _dataset_creator(build_val, global_batch_size),
+            lambda: ShardedStream(shard_dir, 'test', global_batch_size, target_size).dataset(),
+            fit_kwargs, index['class_names'], index['num_classes'])
+
+def evaluate_on_chief(model_path, make_test_ds, num_classes):
+    """
+    TEST COMPLETO EN EL CHIEF
+    Carga el modelo guardado fuera de la estrategia (sin operaciones
+    colectivas) y recorre el split de test entero, sin recortar restos.
+
+    Retorna:
+    --------
+    dict: resumen de StreamingEvaluator (accuracy, top5_accuracy, ...)
+    """
+    from evaluation import evaluate_models, keras_predict_fn
+
+    model = tf.keras.models.load_model(model_path, compile=False)
+    evaluators, _ = evaluate_models({'model': keras_predict_fn(model)}, make_test_ds(),
+                                    num_classes, top_k=(5,), report_every=0)
+    return evaluators['model'].summary()
+
+def train_distributed(data_dir="../data_raw/fruits-360_100x100/fruits-360",
+                      epochs=10, per_worker_batch_size=32, base_model='EfficientNetB0',
+                      fine_tune_stages="2:1e-4:2,4:5e-5:2", precision='float32',
+                      dedup=False, output_path='fruit360_transfer_learning.h5',
+                      backend='files', shard_dir="../data_shards/fruits-360_original-size"):
+    """
+    ENTRENAMIENTO CON MultiWorkerMirroredStrategy
+    =============================================
+    Mismo flujo que train_transfer_learning (cabeza + fine-tuning por
+    etapas), repartido entre los workers definidos en TF_CONFIG.
+    per_worker_batch_size es el batch de cada réplica; el batch global es
+    per_worker_batch_size × réplicas. backend: 'files' (árbol de imágenes
+    en data_dir) o 'tfrecord' (shards en shard_dir).
+    """
+    from transferLearning import create_transfer_learning_model
+    from fine_tuning import fine_tune_in_stages, parse_stages
+
+    worker = get_worker_info()
+    strategy = tf.distribute.MultiWorkerMirroredStrategy()
+    global_batch_size = per_worker_batch_size * strategy.num_replicas_in_sync
+    if worker['is_chief']:
+        print("🌐 TRANSFER LEARNING DISTRIBUIDO - FRUIT360")
+        print("=" * 50)
+        print(f"   - Workers: {worker['num_workers']} "
+              f"({strategy.num_replicas_in_sync} réplicas)")
+        print(f"   - Batch global: {global_batch_size}")
+
+    if backend == 'tfrecord':
+        train_input, val_input, make_test_ds, fit_kwargs, classes, num_classes = \
+            make_shard_stream_datasets(shard_dir, global_batch_size, worker['num_workers'])
+    else:
+        train_input, val_input, make_test_ds, fit_kwargs, classes, num_classes = \
+            make_sharded_datasets(data_dir, global_batch_size, dedup=dedup)
+
+    with strategy.scope():
+        model = create_transfer_learning_model(base_model, num_classes, precision=precision)
+
+    checkpoint_path = worker_safe_path('transfer_learning_best.h5', worker)
+    callbacks = [
+        EarlyStopping(patience=5, restore_best_weights=True),
+        ModelCheckpoint(checkpoint_path, save_best_only=True)
+    ]
+
+    history = model.fit(
+        train_input,
+        epochs=epochs,
+        validation_data=val_input,
+        callbacks=callbacks,
+        verbose=2 if worker['is_chief'] else 0,
+        **fit_kwargs
+    )
+
+    stages = parse_stages(fine_tune_stages) if isinstance(fine_tune_stages, str) \
+        else fine_tune_stages
+    if stages:
+        fine_tune_in_stages(model, base_model, train_input, val_input, stages=stages,
+                            fit_kwargs=fit_kwargs)
+
+    # Todos los workers guardan (operación colectiva); solo el chief evalúa
+    final_path = worker_safe_path(output_path, worker)
+    model.save(final_path)
+
+    if worker['is_chief']:
+        results = evaluate_on_chief(final_path, make_test_ds, num_classes)
+        print(f"Test accuracy: {results['accuracy']:.4f} ({results['images']} imágenes)")
+        print(f"Top-5 accuracy: {results['top5_accuracy']:.4f}")
+        print(f"💾 Modelo guardado: {final_path}")
+    cleanup_worker_path(final_path, worker)
+    cleanup_worker_path(checkpoint_path, worker)
+
+    return model, history
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL (un proceso por worker; ver launch_workers.py)
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data_dir', type=str, default="../data_raw/fruits-360_100x100/fruits-360")
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--batch_size', type=int, default=32, help='Batch por réplica (el global es batch × réplicas)')
+    parser.add_argument('--model', type=str, default='EfficientNetB0')
+    parser.add_argument('--fine_tune_stages', type=str, default="2:1e-4:2,4:5e-5:2")
+    parser.add_argument('--precision', type=str, default='float32',
+                        choices=['float32', 'mixed_bfloat16'])
+    parser.add_argument('--dedup', action='store_true')
+    parser.add_argument('--backend', type=str, default='files', choices=['files', 'tfrecord'])
+    parser.add_argument('--shard_dir', type=str, default="../data_shards/fruits-360_original-size")
+
+    args = parser.parse_args()
+
+    train_distributed(
+        data_dir=args.data_dir,
+        epochs=args.epochs,
+        per_worker_batch_size=args.batch_size,
+        base_model=args.model,
+        fine_tune_stages=args.fine_tune_stages,
+        precision=args.precision,
+        dedup=args.dedup,
+        backend=args.backend,
+        shard_dir=args.shard_dir
+    )
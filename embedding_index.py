@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+"""
+ÍNDICE DE EMBEDDINGS: CLASIFICACIÓN k-NN Y CLASES NUEVAS SIN REENTRENAR
+=======================================================================
+Usa la salida de GlobalAveragePooling (capa 'head_pool') del modelo
+entrenado como embedding (normalizado L2) y clasifica por vecinos más
+cercanos o por prototipo (media de cada clase) sobre una galería de
+referencia. Añadir un producto nuevo = insertar sus embeddings.
+
+Índices:
+    - flat: búsqueda exacta (producto escalar con numpy)
+    - ivf:  k-means + listas invertidas, busca en las nprobe más cercanas
+    - hnsw: grafo HNSW (requiere hnswlib)
+
+Uso:
+    python embedding_index.py build --model fruit360_transfer_learning.h5 --index fruit360_gallery
+    python embedding_index.py add-class --index fruit360_gallery --name "Dragon Fruit" --images nuevas/dragon
+    python embedding_index.py evaluate --model fruit360_transfer_learning.h5
+    python embedding_index.py benchmark --sizes 10000 100000 1000000
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+import numpy as np
+from inference_utils import top_k_predictions, preprocess_image_file
+
+INDEX_TYPES = ('flat', 'ivf', 'hnsw')
+EMBEDDING_LAYER = 'head_pool'
+
+def l2_normalize(x):
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+def _top_k(scores, k):
+    """Índices y puntuaciones de los k mayores por fila (ordenados)"""
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+# ==============================================================================
+# ÍNDICES VECTORIALES (similitud coseno = producto escalar de vectores L2)
+# ==============================================================================
+class FlatIndex:
+    """Búsqueda exacta por bloques (memoria acotada con galerías grandes)"""
+
+    def __init__(self, dim, block_size=65536, **_):
+        self.dim = dim
+        self.block_size = block_size
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def add(self, vectors):
+        self.vectors = np.concatenate([self.vectors, np.asarray(vectors, dtype=np.float32)])
+
+    def search(self, queries, k=10):
+        queries = np.asarray(queries, dtype=np.float32)
+        best_ids = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for start in range(0, len(self.vectors), self.block_size):
+            scores = queries @ self.vectors[start:start + self.block_size].T
+            ids, top_scores = _top_k(scores, k)
+            best_ids = np.concatenate([best_ids, ids + start], axis=1)
+            best_scores = np.concatenate([best_scores, top_scores], axis=1)
+        order, best_scores = _top_k(best_scores, k)
+        return np.take_along_axis(best_ids, order, axis=1), best_scores
+
+class IVFIndex:
+    """
+    LISTAS INVERTIDAS SOBRE CENTROIDES k-MEANS
+    Los vectores se agrupan por centroide más cercano; cada consulta solo
+    compara contra las nprobe listas más prometedoras.
+    """
+
+    def __init__(self, dim, nlist=None, nprobe=8, train_size=50000, iterations=10,
+                 seed=42, **_):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size
+        self.iterations = iterations
+        self.seed = seed
+        self.centroids = None
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.assignments = np.empty(0, dtype=np.int64)
+        self._lists = None
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def _train(self, vectors):
+        rng = np.random.default_rng(self.seed)
+        nlist = self.nlist or max(int(4 * np.sqrt(len(vectors))), 1)
+        nlist = min(nlist, len(vectors))
+        sample = vectors[rng.choice(len(vectors), size=min(self.train_size, len(vectors)),
+                                    replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assign == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = l2_normalize(centroids)
+        self.centroids = centroids
+
+    def _assign(self, vectors, block_size=65536):
+        return np.concatenate([np.argmax(vectors[i:i + block_size] @ self.centroids.T, axis=1)
+                               for i in range(0, len(vectors), block_size)])
+
+    def add(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.centroids is None:
+            self._train(vectors)
+        self.vectors = np.concatenate([self.vectors, vectors])
+        self.assignments = np.concatenate([self.assignments, self._assign(vectors)])
+        self._lists = None
+
+    def _build_lists(self):
+        order = np.argsort(self.assignments, kind='stable')
+        bounds = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+        self._lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.centroids))]
+
+    def search(self, queries, k=10):
+        if self._lists is None:
+            self._build_lists()
+        queries = np.asarray(queries, dtype=np.float32)
+        probes, _ = _top_k(queries @ self.centroids.T, self.nprobe)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for q, query_probes in enumerate(probes):
+            candidates = np.concatenate([self._lists[c] for c in query_probes])
+            if not len(candidates):
+                continue
+            candidate_scores = self.vectors[candidates] @ queries[q]
+            top, top_scores = _top_k(candidate_scores[None, :], k)
+            ids[q, :top.shape[1]] = candidates[top[0]]
+            scores[q, :top.shape[1]] = top_scores[0]
+        return ids, scores
+
+class HNSWIndex:
+    """Grafo HNSW de hnswlib (producto escalar)"""
+
+    def __init__(self, dim, M=16, ef_construction=200, ef_search=64, **_):
+        try:
+            import hnswlib
+        except ImportError:
+            raise ImportError("❌ El índice 'hnsw' requiere hnswlib (pip install hnswlib)")
+        self.dim = dim
+        self.ef_search = ef_search
+        self.index = hnswlib.Index(space='ip', dim=dim)
+        self.index.init_index(max_elements=1024, M=M, ef_construction=ef_construction)
+        self.index.set_ef(ef_search)
+
+    def __len__(self):
+        return self.index.get_current_count()
+
+    def add(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        needed = len(self) + len(vectors)
+        if needed > self.index.get_max_elements():
+            self.index.resize_index(max(needed, 2 * self.index.get_max_elements()))
+        self.index.add_items(vectors, np.arange(len(self), needed))
+
+    def search(self, queries, k=10):
+        self.index.set_ef(max(self.ef_search, k))
+        ids, distances = self.index.knn_query(np.asarray(queries, dtype=np.float32),
+                                              k=min(k, len(self)))
+        # hnswlib devuelve 1 - producto escalar
+        return ids.astype(np.int64), (1.0 - distances).astype(np.float32)
+
+def create_index(index_type, dim, **params):
+    """Crea un índice vacío 'flat', 'ivf' o 'hnsw'"""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"❌ Índice no soportado: {index_type}")
+    return {'flat': FlatIndex, 'ivf': IVFIndex, 'hnsw': HNSWIndex}[index_type](dim, **params)
+
+# ==============================================================================
+# CLASIFICADOR POR EMBEDDINGS
+# ==============================================================================
+class EmbeddingClassifier:
+    """
+    CLASIFICADOR k-NN / PROTOTIPO SOBRE UNA GALERÍA DE EMBEDDINGS
+
+    Parámetros:
+    -----------
+    class_names : list
+        Nombres de clases (se amplía con add_class)
+    dim : int
+        Dimensión de los embeddings
+    index_type : str
+        'flat', 'ivf' o 'hnsw'
+    mode : str
+        'knn' (voto de los k vecinos ponderado por similitud) o
+        'prototype' (clase con el centroide más parecido)
+    k : int
+        Vecinos para el voto
+    temperature : float
+        Temperatura del softmax de similitudes (convierte en probabilidades)
+    """
+
+    def __init__(self, class_names, dim, index_type='flat', mode='knn', k=10,
+                 temperature=0.05, index_params=None):
+        self.class_names = list(class_names)
+        self.dim = dim
+        self.index_type = index_type
+        self.mode = mode
+        self.k = k
+        self.temperature = temperature
+        self.index_params = index_params or {}
+        self.index = create_index(index_type, dim, **self.index_params)
+        self.labels = np.empty(0, dtype=np.int64)
+        self.embeddings = np.empty((0, dim), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def num_classes(self):
+        return len(self.class_names)
+
+    def add(self, embeddings, labels):
+        """Inserta embeddings de clases existentes en la galería"""
+        embeddings = l2_normalize(embeddings)
+        self.index.add(embeddings)
+        self.embeddings = np.concatenate([self.embeddings, embeddings])
+        self.labels = np.concatenate([self.labels, np.asarray(labels, dtype=np.int64)])
+
+    def add_class(self, class_name, embeddings):
+        """
+        AÑADE UNA CLASE NUEVA SIN REENTRENAR
+
+        Retorna:
+        --------
+        int: índice de la clase
+        """
+        if class_name in self.class_names:
+            label = self.class_names.index(class_name)
+        else:
+            self.class_names.append(class_name)
+            label = len(self.class_names) - 1
+        self.add(embeddings, np.full(len(embeddings), label))
+        return label
+
+    def prototypes(self):
+        """Centroide normalizado de cada clase (filas a cero si no hay ejemplos)"""
+        sums = np.zeros((self.num_classes, self.dim), dtype=np.float32)
+        np.add.at(sums, self.labels, self.embeddings)
+        return l2_normalize(sums)
+
+    def predict_proba(self, embeddings):
+        """
+        PROBABILIDADES (batch, num_classes)
+        Softmax de similitudes: por vecino (knn) o por prototipo
+        """
+        queries = l2_normalize(embeddings)
+        if self.mode == 'prototype':
+            logits = queries @ self.prototypes().T / self.temperature
+        else:
+            ids, scores = self.index.search(queries, self.k)
+            valid = ids >= 0
+            best = np.where(valid[:, :1], scores[:, :1], 0.0)
+            weights = np.exp(np.where(valid, scores - best, -np.inf) / self.temperature)
+            votes = np.zeros((len(queries), self.num_classes), dtype=np.float32)
+            rows = np.broadcast_to(np.arange(len(queries))[:, None], ids.shape)
+            np.add.at(votes, (rows[valid], self.labels[ids[valid]]), weights[valid])
+            # Clases sin votos: probabilidad ~0 (filas sin vecinos: uniforme)
+            logits = np.where(votes > 0, np.log(np.maximum(votes, 1e-30)), -1e9)
+            logits[~valid.any(axis=1)] = 0.0
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def predict(self, embeddings):
+        return np.argmax(self.predict_proba(embeddings), axis=1)
+
+    def predict_top_k(self, embeddings, k=5):
+        return top_k_predictions(self.predict_proba(embeddings), self.class_names, k)
+
+    def save(self, path):
+        """Guarda galería (path.npz) y configuración (path.json)"""
+        np.savez(path + ".npz", embeddings=self.embeddings, labels=self.labels)
+        with open(path + ".json", 'w') as f:
+            json.dump({
+                'class_names': self.class_names,
+                'dim': self.dim,
+                'index_type': self.index_type,
+                'mode': self.mode,
+                'k': self.k,
+                'temperature': self.temperature,
+                'index_params': self.index_params,
+                'size': len(self),
+            }, f, indent=2)
+        print(f"💾 Galería guardada: {path}.npz ({len(self)} embeddings, "
+              f"{self.num_classes} clases)")
+
+    @classmethod
+    def load(cls, path, index_type=None, mode=None):
+        """Carga una galería; el índice se reconstruye al cargar"""
+        with open(path + ".json") as f:
+            config = json.load(f)
+        data = np.load(path + ".npz")
+        classifier = cls(config['class_names'], config['dim'],
+                         index_type=index_type or config['index_type'],
+                         mode=mode or config['mode'], k=config['k'],
+                         temperature=config['temperature'],
+                         index_params=config.get('index_params'))
+        if len(data['labels']):
+            classifier.add(data['embeddings'], data['labels'])
+        return classifier
+
+# ==============================================================================
+# EMBEDDINGS DEL MODELO ENTRENADO
+# ==============================================================================
+def create_embedding_model(model, with_predictions=False):
+    """
+    MODELO QUE DEVUELVE EL EMBEDDING (GlobalAveragePooling)
+    with_predictions=True devuelve también la softmax (una sola pasada)
+    """
+    import tensorflow as tf
+    embedding = model.get_layer(EMBEDDING_LAYER).output
+    outputs = [embedding, model.output] if with_predictions else embedding
+    return tf.keras.Model(inputs=model.input, outputs=outputs)
+
+def _iterate_batches(data):
+    """Una pasada por un generador/Sequence de Keras o un tf.data.Dataset"""
+    if hasattr(data, '__getitem__') and hasattr(data, '__len__'):
+        for i in range(len(data)):
+            yield data[i]
+    else:
+        yield from data
+
+def compute_embeddings(embedding_model, data, max_batches=None):
+    """
+    EMBEDDINGS (Y SOFTMAX, SI EL MODELO LA DEVUELVE) DE UN CONJUNTO
+
+    Retorna:
+    --------
+    tuple: (embeddings, labels, probabilities o None)
+    """
+    embeddings, labels, probabilities = [], [], []
+    for i, (x, y) in enumerate(_iterate_batches(data)):
+        if max_batches is not None and i >= max_batches:
+            break
+        outputs = embedding_model(x, training=False)
+        if isinstance(outputs, (list, tuple)):
+            embeddings.append(np.asarray(outputs[0], dtype=np.float32))
+            probabilities.append(np.asarray(outputs[1], dtype=np.float32))
+        else:
+            embeddings.append(np.asarray(outputs, dtype=np.float32))
+        labels.append(np.argmax(np.asarray(y), axis=1))
+    return (np.concatenate(embeddings), np.concatenate(labels),
+            np.concatenate(probabilities) if probabilities else None)
+
+def embed_image_files(embedding_model, paths, batch_size=64, target_size=(100, 100)):
+    """Embeddings de una lista de archivos de imagen"""
+    embeddings = []
+    for start in range(0, len(paths), batch_size):
+        batch = np.stack([preprocess_image_file(p, target_size)
+                          for p in paths[start:start + batch_size]])
+        embeddings.append(np.asarray(embedding_model(batch, training=False), dtype=np.float32))
+    return np.concatenate(embeddings)
+
+def build_gallery(model_path="fruit360_transfer_learning.h5", output="fruit360_gallery",
+                  index_type='flat', mode='knn', k=10, backend='keras', **data_kwargs):
+    """
+    CONSTRUYE LA GALERÍA CON LOS EMBEDDINGS DE TRAINING
+
+    Retorna:
+    --------
+    EmbeddingClassifier
+    """
+    import tensorflow as tf
+    from preprocess_data import preprocess_fruit360_data
+
+    print("🧭 CONSTRUYENDO GALERÍA DE EMBEDDINGS")
+    print("=" * 50)
+    model = tf.keras.models.load_model(model_path, compile=False)
+    embedder = create_embedding_model(model)
+    train_gen, _, _, class_names, _ = preprocess_fruit360_data(
+        backend=backend, augment_training=False, **data_kwargs)
+
+    start = time.time()
+    embeddings, labels, _ = compute_embeddings(embedder, train_gen)
+    print(f"   - {len(embeddings)} embeddings de dimensión {embeddings.shape[1]} "
+          f"en {time.time() - start:.1f}s")
+
+    classifier = EmbeddingClassifier(class_names, embeddings.shape[1],
+                                     index_type=index_type, mode=mode, k=k)
+    classifier.add(embeddings, labels)
+    classifier.save(output)
+    return classifier
+
+# ==============================================================================
+# EVALUACIÓN Y BENCHMARK
+# ==============================================================================
+def compare_with_softmax(model_path="fruit360_transfer_learning.h5",
+                         index_types=('flat', 'ivf'), k=10, backend='keras',
+                         results_dir="training_results", **data_kwargs):
+    """
+    ACCURACY EN Test/: CABEZA SOFTMAX VS k-NN VS PROTOTIPO
+    La galería son los embeddings de Training (train + validación).
+
+    Retorna:
+    --------
+    dict: accuracy y latencia por consulta de cada método
+    """
+    import tensorflow as tf
+    from preprocess_data import preprocess_fruit360_data
+
+    print("⚖️  SOFTMAX VS EMBEDDINGS EN Test/")
+    print("=" * 50)
+    model = tf.keras.models.load_model(model_path, compile=False)
+    embedder = create_embedding_model(model, with_predictions=True)
+    train_gen, val_gen, test_gen, class_names, _ = preprocess_fruit360_data(
+        backend=backend, augment_training=False, **data_kwargs)
+
+    gallery = [compute_embeddings(embedder, data)[:2] for data in (train_gen, val_gen)]
+    gallery_embeddings = np.concatenate([g[0] for g in gallery])
+    gallery_labels = np.concatenate([g[1] for g in gallery])
+    test_embeddings, test_labels, test_probs = compute_embeddings(embedder, test_gen)
+
+    results = {'softmax': {'accuracy': float(np.mean(np.argmax(test_probs, axis=1)
+                                                     == test_labels))}}
+    configs = [(f'knn_{t}', t, 'knn') for t in index_types] + [('prototype', 'flat', 'prototype')]
+    for name, index_type, mode in configs:
+        classifier = EmbeddingClassifier(class_names, gallery_embeddings.shape[1],
+                                         index_type=index_type, mode=mode, k=k)
+        classifier.add(gallery_embeddings, gallery_labels)
+        start = time.perf_counter()
+        predictions = classifier.predict(test_embeddings)
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            'accuracy': float(np.mean(predictions == test_labels)),
+            'ms_per_query': round(elapsed * 1000 / len(test_embeddings), 4),
+        }
+
+    print(f"\n{'Método':<16} {'Accuracy':>9} {'ms/consulta':>12}")
+    for name, r in results.items():
+        print(f"{name:<16} {r['accuracy']:>9.4f} {r.get('ms_per_query', 0):>12.4f}")
+
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir,
+                        f"embedding_eval_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump({'model_path': model_path, 'gallery_size': len(gallery_labels),
+                   'test_size': len(test_labels), 'k': k, 'results': results}, f, indent=2)
+    print(f"💾 Resultados: {path}")
+    return results
+
+def synthetic_gallery(size, dim, num_classes=208, seed=0, block_size=100000):
+    """Embeddings sintéticos agrupados por clase (normalizados)"""
+    rng = np.random.default_rng(seed)
+    centers = l2_normalize(rng.standard_normal((num_classes, dim)))
+    labels = rng.integers(0, num_classes, size)
+    vectors = np.empty((size, dim), dtype=np.float32)
+    for start in range(0, size, block_size):
+        block = labels[start:start + block_size]
+        noise = rng.standard_normal((len(block), dim)).astype(np.float32) * 0.05
+        vectors[start:start + block_size] = l2_normalize(centers[block] + noise)
+    return vectors, labels
+
+def benchmark_query_latency(sizes=(10000, 100000, 1000000), dim=1280,
+                            index_types=INDEX_TYPES, num_queries=200, k=10, seed=0):
+    """
+    LATENCIA POR CONSULTA SEGÚN TAMAÑO DE GALERÍA
+    Para índices aproximados también mide recall@k frente a la búsqueda
+    exacta.
+
+    Retorna:
+    --------
+    list: filas {size, index, build_s, p50_ms, p99_ms, recall}
+    """
+    print("⏱️  LATENCIA DE CONSULTA POR TAMAÑO DE GALERÍA")
+    print("=" * 50)
+    rows = []
+    for size in sizes:
+        vectors, _ = synthetic_gallery(size, dim, seed=seed)
+        queries, _ = synthetic_gallery(num_queries, dim, seed=seed + 1)
+        exact_ids = None
+        for index_type in index_types:
+            try:
+                index = create_index(index_type, dim)
+            except ImportError as e:
+                print(f"   ⚠️  {e}")
+                continue
+            start = time.perf_counter()
+            index.add(vectors)
+            build_seconds = time.perf_counter() - start
+            index.search(queries[:1], k)  # warmup
+            times, ids = [], []
+            for query in queries:
+                start = time.perf_counter()
+                query_ids, _ = index.search(query[None, :], k)
+                times.append(time.perf_counter() - start)
+                ids.append(query_ids[0])
+            ids = np.array(ids)
+            if index_type == 'flat':
+                exact_ids = ids
+            recall = None
+            if exact_ids is not None:
+                recall = float(np.mean([len(np.intersect1d(a, b)) / k
+                                        for a, b in zip(ids, exact_ids)]))
+            row = {
+                'size': size, 'index': index_type,
+                'build_s': round(build_seconds, 2),
+                'p50_ms': round(float(np.percentile(times, 50)) * 1000, 3),
+                'p99_ms': round(float(np.percentile(times, 99)) * 1000, 3),
+                'recall': recall,
+            }
+            rows.append(row)
+            recall_text = f"{recall:.3f}" if recall is not None else "-"
+            print(f"   {size:>9} {index_type:<5} build {row['build_s']:>7.2f}s  "
+                  f"p50 {row['p50_ms']:>8.3f} ms  p99 {row['p99_ms']:>8.3f} ms  "
+                  f"recall@{k} {recall_text}")
+        del vectors
+    return rows
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', choices=['build', 'add-class', 'evaluate', 'benchmark'])
+    parser.add_argument('--model', type=str, default='fruit360_transfer_learning.h5')
+    parser.add_argument('--index', type=str, default='fruit360_gallery',
+                        help='Ruta base de la galería (.npz/.json)')
+    parser.add_argument('--index_type', type=str, default='flat', choices=list(INDEX_TYPES))
+    parser.add_argument('--mode', type=str, default='knn', choices=['knn', 'prototype'])
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--backend', type=str, default='keras',
+                        choices=['keras', 'tfdata', 'packed', 'tfrecord'])
+    parser.add_argument('--name', type=str, help='Nombre de la clase nueva (add-class)')
+    parser.add_argument('--images', type=str, help='Carpeta con imágenes de la clase nueva')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--dim', type=int, default=1280)
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_gallery(args.model, args.index, args.index_type, args.mode, args.k, args.backend)
+    elif args.command == 'add-class':
+        import tensorflow as tf
+        from preprocess_data import IMAGE_EXTENSIONS
+        if not args.name or not args.images:
+            parser.error("add-class requiere --name y --images")
+        classifier = EmbeddingClassifier.load(args.index)
+        paths = sorted(os.path.join(args.images, f) for f in os.listdir(args.images)
+                       if f.lower().endswith(IMAGE_EXTENSIONS))
+        embedder = create_embedding_model(tf.keras.models.load_model(args.model, compile=False))
+        label = classifier.add_class(args.name, embed_image_files(embedder, paths))
+        print(f"✅ Clase '{args.name}' (índice {label}) añadida con {len(paths)} imágenes")
+        classifier.save(args.index)
+    elif args.command == 'evaluate':
+        compare_with_softmax(args.model, k=args.k, backend=args.backend)
+    else:
+        benchmark_query_latency(args.sizes, args.dim)
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+EVALUACIÓN EN STREAMING CON MATRIZ DE CONFUSIÓN
+===============================================
+Recorre el split de test una sola vez, lote a lote, y acumula para cada
+modelo una matriz de confusión C×C y aciertos top-k por clase con
+operaciones vectorizadas de NumPy (bincount sobre índices planos
+verdadera·C + predicha). La memoria es constante: no se guarda ninguna
+predicción.
+
+Con varios modelos, cada lote se decodifica una vez y pasa por todos.
+
+Reporta accuracy y top-k global, precision/recall/F1 por clase, las
+clases con peor recall y los pares de clases más confundidos (Apple 10
+vs Apple 11, variedades de tomate, ...).
+
+Uso:
+    python evaluation.py --models fruit360_transfer_learning.h5 fruit360_int8.tflite
+    python evaluation.py --models checkpoints/run_12/model.keras --backend packed --top_pairs 30
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+import numpy as np
+
+class StreamingEvaluator:
+    """
+    ACUMULADOR DE MÉTRICAS DE CLASIFICACIÓN (MEMORIA CONSTANTE)
+
+    Parámetros:
+    -----------
+    num_classes : int
+        Número de clases C
+    top_k : tuple
+        Valores de k para los aciertos top-k (1 siempre se incluye)
+    """
+
+    def __init__(self, num_classes, top_k=(5,)):
+        self.num_classes = num_classes
+        self.top_k = tuple(sorted(set((1,) + tuple(top_k))))
+        self.confusion = np.zeros((num_classes, num_classes), dtype=np.int64)
+        self.top_k_hits = {k: np.zeros(num_classes, dtype=np.int64) for k in self.top_k}
+        self.loss_sum = 0.0
+
+    @property
+    def count(self):
+        return int(self.confusion.sum())
+
+    def update(self, labels, probabilities):
+        """
+        AÑADE UN LOTE
+
+        Parámetros:
+        -----------
+        labels : np.ndarray
+            Índices de clase (N,) o one-hot (N, C)
+        probabilities : np.ndarray
+            Salida del modelo (N, C)
+        """
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+        labels = np.asarray(labels)
+        if labels.ndim == 2:
+            labels = labels.argmax(axis=1)
+        labels = labels.astype(np.int64)
+        c = self.num_classes
+
+        predicted = probabilities.argmax(axis=1)
+        self.confusion += np.bincount(labels * c + predicted,
+                                      minlength=c * c).reshape(c, c)
+
+        # Posición de la clase verdadera = nº de clases con probabilidad mayor
+        true_prob = probabilities[np.arange(len(labels)), labels]
+        rank = (probabilities > true_prob[:, None]).sum(axis=1)
+        for k in self.top_k:
+            self.top_k_hits[k] += np.bincount(labels[rank < k], minlength=c)
+        self.loss_sum += float(-np.log(np.clip(true_prob, 1e-7, 1.0)).sum())
+
+    def merge(self, other):
+        """Suma otro acumulador (p. ej. de otro proceso o shard)"""
+        self.confusion += other.confusion
+        for k in self.top_k:
+            self.top_k_hits[k] += other.top_k_hits[k]
+        self.loss_sum += other.loss_sum
+        return self
+
+    # --------------------------------------------------------------------------
+    # Métricas
+    # --------------------------------------------------------------------------
+    def per_class(self):
+        """
+        PRECISION / RECALL / F1 / SOPORTE POR CLASE
+
+        Retorna:
+        --------
+        dict: arrays de longitud C ('precision', 'recall', 'f1', 'support',
+              'top<k>_recall')
+        """
+        true_positives = np.diag(self.confusion).astype(np.float64)
+        support = self.confusion.sum(axis=1)
+        predicted = self.confusion.sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            precision = np.where(predicted > 0, true_positives / predicted, 0.0)
+            recall = np.where(support > 0, true_positives / support, 0.0)
+            f1 = np.where(precision + recall > 0,
+                          2 * precision * recall / (precision + recall), 0.0)
+            metrics = {'precision': precision, 'recall': recall, 'f1': f1, 'support': support}
+            for k in self.top_k[1:]:
+                metrics[f'top{k}_recall'] = np.where(support > 0,
+                                                     self.top_k_hits[k] / support, 0.0)
+        return metrics
+
+    def most_confused(self, n=20):
+        """
+        PARES (verdadera → predicha) CON MÁS ERRORES
+
+        Retorna:
+        --------
+        list: [(verdadera, predicha, errores, fracción de la clase verdadera)]
+        """
+        errors = self.confusion.copy()
+        np.fill_diagonal(errors, 0)
+        flat = np.argsort(errors, axis=None)[::-1][:n]
+        support = self.confusion.sum(axis=1)
+        pairs = []
+        for index in flat:
+            true_class, predicted = divmod(int(index), self.num_classes)
+            count = int(errors[true_class, predicted])
+            if count == 0:
+                break
+            pairs.append((true_class, predicted, count, count / max(int(support[true_class]), 1)))
+        return pairs
+
+    def summary(self, class_names=None, top_pairs=20, worst=10):
+        """
+        RESUMEN SERIALIZABLE (JSON)
+
+        Retorna:
+        --------
+        dict: globales, medias macro, por clase, peores clases y pares más
+              confundidos
+        """
+        names = class_names or [str(i) for i in range(self.num_classes)]
+        count = max(self.count, 1)
+        per_class = self.per_class()
+        present = per_class['support'] > 0
+        result = {
+            'images': self.count,
+            'accuracy': round(float(np.trace(self.confusion) / count), 6),
+            'loss': round(self.loss_sum / count, 6),
+            'macro_precision': round(float(per_class['precision'][present].mean()), 6)
+            if present.any() else 0.0,
+            'macro_recall': round(float(per_class['recall'][present].mean()), 6)
+            if present.any() else 0.0,
+            'macro_f1': round(float(per_class['f1'][present].mean()), 6) if present.any() else 0.0,
+        }
+        for k in self.top_k[1:]:
+            result[f'top{k}_accuracy'] = round(float(self.top_k_hits[k].sum() / count), 6)
+        result['per_class'] = [
+            {'class': names[i], **{key: (int(values[i]) if key == 'support'
+                                         else round(float(values[i]), 4))
+                                   for key, values in per_class.items()}}
+            for i in range(self.num_classes)
+        ]
+        order = np.argsort(np.where(present, per_class['recall'], np.inf))
+        result['worst_classes'] = [
+            {'class': names[i], 'recall': round(float(per_class['recall'][i]), 4),
+             'support': int(per_class['support'][i])}
+            for i in order[:worst] if present[i]
+        ]
+        result['most_confused'] = [
+            {'true': names[t], 'predicted': names[p], 'count': c, 'fraction': round(f, 4)}
+            for t, p, c, f in self.most_confused(top_pairs)
+        ]
+        return result
+
+# ==============================================================================
+# EVALUACIÓN DE VARIOS MODELOS EN UNA PASADA
+# ==============================================================================
+def iter_batches(data):
+    """(x, y) de una Sequence de Keras (por índice) o de un iterable (tf.data)"""
+    if hasattr(data, '__getitem__') and hasattr(data, '__len__'):
+        for i in range(len(data)):
+            batch = data[i]
+            yield batch[0], batch[1]
+    else:
+        for batch in data:
+            yield np.asarray(batch[0]), np.asarray(batch[1])
+
+def evaluate_models(predict_fns, data, num_classes, top_k=(5,), report_every=50):
+    """
+    EVALÚA VARIOS MODELOS RECORRIENDO LOS DATOS UNA VEZ
+
+    Parámetros:
+    -----------
+    predict_fns : dict
+        {nombre: función imágenes → probabilidades}
+    data : Sequence o tf.data.Dataset
+        Lotes (x, y) con y one-hot o índices
+
+    Retorna:
+    --------
+    tuple: ({nombre: StreamingEvaluator}, {nombre: segundos de predicción})
+    """
+    evaluators = {name: StreamingEvaluator(num_classes, top_k) for name in predict_fns}
+    seconds = {name: 0.0 for name in predict_fns}
+    start = time.time()
+    for i, (x, y) in enumerate(iter_batches(data), start=1):
+        x = np.asarray(x, dtype=np.float32)
+        for name, predict in predict_fns.items():
+            predict_start = time.perf_counter()
+            probabilities = np.asarray(predict(x))
+            seconds[name] += time.perf_counter() - predict_start
+            evaluators[name].update(y, probabilities)
+        if report_every and i % report_every == 0:
+            images = next(iter(evaluators.values())).count
+            print(f"   ⏱️  {images} imágenes · {images / (time.time() - start):.1f} img/s")
+    return evaluators, seconds
+
+def keras_predict_fn(model):
+    """Función de predicción compilada para un modelo Keras en memoria"""
+    return lambda x: model.predict_on_batch(x)
+
+def print_evaluation(name, summary, top_pairs=10, worst=10):
+    """Resumen legible de StreamingEvaluator.summary()"""
+    print(f"\n📊 {name}")
+    print(f"   - Accuracy: {summary['accuracy']:.4f}"
+          + "".join(f" · {key.replace('_accuracy', '')}: {value:.4f}"
+                    for key, value in summary.items()
+                    if key.startswith('top') and key.endswith('_accuracy')))
+    print(f"   - Macro precision/recall/F1: {summary['macro_precision']:.4f} / "
+          f"{summary['macro_recall']:.4f} / {summary['macro_f1']:.4f}")
+    if summary['worst_classes'][:worst]:
+        print("   - Peor recall:")
+        for row in summary['worst_classes'][:worst]:
+            print(f"      {row['class']:<32} {row['recall']:.4f} ({row['support']} imágenes)")
+    if summary['most_confused'][:top_pairs]:
+        print("   - Más confundidas (verdadera → predicha):")
+        for row in summary['most_confused'][:top_pairs]:
+            print(f"      {row['true']:<28} → {row['predicted']:<28} "
+                  f"{row['count']:>4} ({row['fraction']:.1%})")
+
+def save_evaluation(evaluators, seconds, class_names, results_dir="training_results",
+                    top_pairs=20):
+    """
+    GUARDA evaluation_<ts>.json (resúmenes) y una matriz de confusión .npy
+    por modelo
+
+    Retorna:
+    --------
+    str: ruta del JSON
+    """
+    os.makedirs(results_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report = {}
+    for i, (name, evaluator) in enumerate(evaluators.items()):
+        matrix_path = os.path.join(results_dir, f"confusion_{timestamp}_{i}.npy")
+        np.save(matrix_path, evaluator.confusion)
+        report[name] = dict(evaluator.summary(class_names, top_pairs),
+                            predict_seconds=round(seconds.get(name, 0.0), 2),
+                            confusion_matrix=matrix_path)
+    path = os.path.join(results_dir, f"evaluation_{timestamp}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"💾 Evaluación: {path}")
+    return path
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--models', type=str, nargs='+', default=['fruit360_transfer_learning.h5'],
+                        help='.h5/.keras/SavedModel, .tflite u .onnx')
+    parser.add_argument('--backend', type=str, default='tfdata',
+                        choices=['keras', 'tfdata', 'packed', 'tfrecord'])
+    parser.add_argument('--data_dir', type=str, default="../data_raw/fruits-360_100x100/fruits-360")
+    parser.add_argument('--packed_dir', type=str, default="../data_packed/fruits-360_100x100")
+    parser.add_argument('--shard_dir', type=str, default="../data_shards/fruits-360_original-size")
+    parser.add_argument('--split', type=str, default='test', choices=['val', 'test'])
+    parser.add_argument('--batch_size', type=int, default=128)
+    parser.add_argument('--top_k', type=int, nargs='+', default=[5])
+    parser.add_argument('--top_pairs', type=int, default=20)
+
+    args = parser.parse_args()
+
+    from preprocess_data import preprocess_fruit360_data
+    from batch_predict import load_predict_fn
+
+    _, val_data, test_data, class_names, num_classes = preprocess_fruit360_data(
+        data_dir=args.data_dir,
+        batch_size=args.batch_size,
+        augment_training=False,
+        backend=args.backend,
+        packed_dir=args.packed_dir,
+        shard_dir=args.shard_dir
+    )
+    predict_fns = {path: load_predict_fn(path) for path in args.models}
+
+    print(f"\n🔎 EVALUANDO {len(predict_fns)} MODELO(S) EN {args.split.upper()}")
+    print("=" * 50)
+    evaluators, seconds = evaluate_models(
+        predict_fns, test_data if args.split == 'test' else val_data,
+        num_classes, top_k=tuple(args.top_k))
+    for name, evaluator in evaluators.items():
+        print_evaluation(name, evaluator.summary(class_names, args.top_pairs), args.top_pairs)
+    save_evaluation(evaluators, seconds, class_names, top_pairs=args.top_pairs)
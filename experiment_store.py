@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+ALMACÉN DE EXPERIMENTOS EN SQLite
+=================================
+Cada ejecución de train_transfer_learning añade una fila a `runs`
+(hiperparámetros, huella del dataset, accuracy de test, throughput y
+rutas de los artefactos) y sus métricas por época y por paso. Nada se
+sobrescribe: una ejecución solo se actualiza una vez, al terminar
+(estado 'running' → 'finished' / 'failed').
+
+Las métricas por época se guardan en formato largo (run, época, métrica,
+valor) con índice por métrica, así que comparar cientos de ejecuciones es
+una consulta SQL. No importa TensorFlow ni matplotlib.
+
+Uso:
+    python experiment_store.py list --model MobileNetV2
+    python experiment_store.py best --metric val_accuracy
+    python experiment_store.py compare 12 15 17
+    python experiment_store.py show 17
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import numpy as np
+
+DEFAULT_DB = "experiments.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT,
+    finished_at TEXT,
+    status TEXT,
+    model_name TEXT,
+    backend TEXT,
+    precision TEXT,
+    batch_size INTEGER,
+    dataset_hash TEXT,
+    test_accuracy REAL,
+    test_top5_accuracy REAL,
+    images_per_sec REAL,
+    params TEXT,
+    throughput TEXT,
+    artifacts TEXT
+);
+CREATE TABLE IF NOT EXISTS epoch_metrics (
+    run_id INTEGER,
+    epoch INTEGER,
+    phase TEXT,
+    metric TEXT,
+    value REAL,
+    PRIMARY KEY (run_id, epoch, metric)
+);
+CREATE TABLE IF NOT EXISTS step_metrics (
+    run_id INTEGER,
+    step INTEGER,
+    total_ms REAL,
+    data_wait_ms REAL,
+    compute_ms REAL,
+    images_per_sec REAL,
+    rss_mb REAL,
+    warmup INTEGER,
+    PRIMARY KEY (run_id, step)
+);
+CREATE INDEX IF NOT EXISTS epoch_metrics_metric ON epoch_metrics(metric, run_id);
+CREATE INDEX IF NOT EXISTS runs_model ON runs(model_name, status);
+"""
+
+_RUN_COLUMNS = ('run_id', 'started_at', 'finished_at', 'status', 'model_name', 'backend',
+                'precision', 'batch_size', 'dataset_hash', 'test_accuracy',
+                'test_top5_accuracy', 'images_per_sec', 'params', 'throughput', 'artifacts')
+_JSON_COLUMNS = ('params', 'throughput', 'artifacts')
+_RUN_FIELDS = ('test_accuracy', 'test_top5_accuracy', 'images_per_sec')
+
+def _now():
+    return time.strftime('%Y-%m-%dT%H:%M:%S')
+
+def _finite(value):
+    """float o None (NaN/inf no se guardan)"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if np.isfinite(value) else None
+
+def dataset_manifest_hash(root, content=False):
+    """
+    HUELLA DEL DATASET EN root (O None)
+
+    - Dataset empaquetado (manifest.json): el manifest_hash ya calculado
+      al empaquetar (ver packed_dataset.py).
+    - Shards TFRecord (index.json): SHA1 del índice de shards, sin la fecha
+      de creación (ver tfrecord_shards.py).
+    - Árbol de imágenes: índice incremental + (ruta, tamaño, mtime) de cada
+      archivo (DatasetIndex.fingerprint), sin leer su contenido.
+
+    Parámetros:
+    -----------
+    content : bool
+        Solo árboles de imágenes: relistar todo el árbol e incluir el SHA1
+        de cada archivo (DatasetIndex.manifest_hash). La primera vez lee
+        todo el dataset; después, solo los archivos nuevos o modificados.
+    """
+    if not root or not os.path.isdir(root):
+        return None
+    manifest_path = os.path.join(root, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            return json.load(f)['manifest_hash']
+    shard_index_path = os.path.join(root, "index.json")
+    if os.path.exists(shard_index_path):
+        with open(shard_index_path) as f:
+            shard_index = json.load(f)
+        shard_index.pop('created_at', None)
+        return hashlib.sha1(json.dumps(shard_index, sort_keys=True).encode()).hexdigest()
+
+    from dataset_index import get_dataset_index
+    index = get_dataset_index(root)
+    if not content:
+        return index.fingerprint()
+    # Sobrescribir un archivo no cambia el mtime de su directorio
+    index.refresh(full=True)
+    hashed = index.fill_hashes()
+    if hashed:
+        print(f"🔏 Huella del dataset: {hashed} archivos nuevos o modificados leídos")
+    return index.manifest_hash()
+
+class RunHistory:
+    """Historial de una ejecución con la misma forma que keras History"""
+
+    def __init__(self, history, run=None):
+        self.history = history
+        self.run = run or {}
+
+class ExperimentStore:
+    """
+    ALMACÉN APPEND-ONLY DE EJECUCIONES
+
+    Parámetros:
+    -----------
+    db_path : str
+        Archivo SQLite (por defecto experiments.sqlite)
+    """
+
+    def __init__(self, db_path=DEFAULT_DB):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        # WAL: lectores (reportes) no bloquean a los entrenamientos en curso
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+
+    # --------------------------------------------------------------------------
+    # Escritura
+    # --------------------------------------------------------------------------
+    def start_run(self, model_name, params=None, dataset_hash=None,
+                  started_at=None):
+        """Registra una ejecución nueva en estado 'running' y devuelve su run_id"""
+        params = params or {}
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (started_at, status, model_name, backend, precision, "
+                "batch_size, dataset_hash, params) VALUES (?, 'running', ?, ?, ?, ?, ?, ?)",
+                (started_at or _now(), model_name, params.get('backend'),
+                 params.get('precision'), params.get('batch_size'), dataset_hash,
+                 json.dumps(params, default=str))
+            )
+        return cursor.lastrowid
+
+    def log_epoch(self, run_id, epoch, logs, phase='head'):
+        """Métricas de una época (dict de Keras logs)"""
+        rows = [(run_id, epoch, phase, metric, _finite(value))
+                for metric, value in (logs or {}).items() if _finite(value) is not None]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO epoch_metrics VALUES (?, ?, ?, ?, ?)", rows)
+
+    def log_history(self, run_id, history, phase='head', start_epoch=0):
+        """
+        HISTORIAL COMPLETO ({métrica: [valor por época]})
+        Retorna la siguiente época libre (para encadenar fases)
+        """
+        num_epochs = max((len(values) for values in history.values()), default=0)
+        for i in range(num_epochs):
+            self.log_epoch(run_id, start_epoch + i,
+                           {metric: values[i] for metric, values in history.items()
+                            if i < len(values)}, phase)
+        return start_epoch + num_epochs
+
+    def log_steps(self, run_id, records):
+        """Registros por paso de ThroughputProfiler"""
+        rows = [(run_id, r['step'], _finite(r.get('total_ms')), _finite(r.get('data_wait_ms')),
+                 _finite(r.get('compute_ms')), _finite(r.get('images_per_sec')),
+                 _finite(r.get('rss_mb')), int(bool(r.get('warmup'))))
+                for r in records]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO step_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def finish_run(self, run_id, status='finished', test_accuracy=None,
+                   test_top5_accuracy=None, throughput=None, artifacts=None):
+        """Cierra la ejecución (solo si sigue en 'running')"""
+        throughput = throughput or {}
+        with self.conn:
+            self.conn.execute(
+                "UPDATE runs SET finished_at = ?, status = ?, test_accuracy = ?, "
+                "test_top5_accuracy = ?, images_per_sec = ?, throughput = ?, artifacts = ? "
+                "WHERE run_id = ? AND status = 'running'",
+                (_now(), status, _finite(test_accuracy), _finite(test_top5_accuracy),
+                 _finite(throughput.get('images_per_sec')), json.dumps(throughput),
+                 json.dumps(artifacts or {}), run_id)
+            )
+
+    # --------------------------------------------------------------------------
+    # Consultas
+    # --------------------------------------------------------------------------
+    def _row_to_run(self, row):
+        run = dict(zip(_RUN_COLUMNS, row))
+        for column in _JSON_COLUMNS:
+            run[column] = json.loads(run[column]) if run[column] else {}
+        return run
+
+    def get_run(self, run_id):
+        """Fila de la ejecución como dict (None si no existe)"""
+        row = self.conn.execute(
+            f"SELECT {', '.join(_RUN_COLUMNS)} FROM runs WHERE run_id = ?",
+            (run_id,)).fetchone()
+        return self._row_to_run(row) if row else None
+
+    def latest_run_id(self, status='finished'):
+        """Última ejecución con ese estado (o None)"""
+        row = self.conn.execute(
+            "SELECT MAX(run_id) FROM runs WHERE status = ?", (status,)).fetchone()
+        return row[0]
+
+    def get_history(self, run_id, phase=None):
+        """
+        MÉTRICAS POR ÉPOCA DE UNA EJECUCIÓN
+
+        Retorna:
+        --------
+        dict: {métrica: [valor por época]} (NaN donde falta la métrica)
+        """
+        query = "SELECT epoch, metric, value FROM epoch_metrics WHERE run_id = ?"
+        params = (run_id,)
+        if phase:
+            query += " AND phase = ?"
+            params += (phase,)
+        rows = self.conn.execute(query + " ORDER BY epoch", params).fetchall()
+        epochs = sorted({epoch for epoch, _, _ in rows})
+        position = {epoch: i for i, epoch in enumerate(epochs)}
+        history = {}
+        for epoch, metric, value in rows:
+            values = history.setdefault(metric, [np.nan] * len(epochs))
+            values[position[epoch]] = np.nan if value is None else value
+        return history
+
+    def get_phases(self, run_id):
+        """[(fase, primera época, última época)] en orden"""
+        return self.conn.execute(
+            "SELECT phase, MIN(epoch), MAX(epoch) FROM epoch_metrics WHERE run_id = ? "
+            "GROUP BY phase ORDER BY MIN(epoch)", (run_id,)).fetchall()
+
+    def get_steps(self, run_id):
+        """Registros por paso (lista de dicts)"""
+        columns = ('step', 'total_ms', 'data_wait_ms', 'compute_ms',
+                   'images_per_sec', 'rss_mb', 'warmup')
+        rows = self.conn.execute(
+            f"SELECT {', '.join(columns)} FROM step_metrics WHERE run_id = ? ORDER BY step",
+            (run_id,))
+        return [dict(zip(columns, row)) for row in rows]
+
+    def load_run(self, run_id=None):
+        """RunHistory de run_id (por defecto la última terminada)"""
+        run_id = run_id or self.latest_run_id()
+        run = self.get_run(run_id) if run_id else None
+        if run is None:
+            raise ValueError(f"❌ Ejecución no encontrada en {self.db_path}: {run_id}")
+        return RunHistory(self.get_history(run_id), run)
+
+    def list_runs(self, model_name=None, status=None, dataset_hash=None,
+                  order_by='run_id', limit=20):
+        """Ejecuciones filtradas (más recientes primero, u ordenadas por order_by desc)"""
+        if order_by not in _RUN_COLUMNS:
+            raise ValueError(f"❌ Columna no válida: {order_by}")
+        conditions, params = [], []
+        for column, value in (('model_name', model_name), ('status', status),
+                              ('dataset_hash', dataset_hash)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.conn.execute(
+            f"SELECT {', '.join(_RUN_COLUMNS)} FROM runs {where} "
+            f"ORDER BY {order_by} IS NULL, {order_by} DESC LIMIT ?",
+            tuple(params) + (limit,))
+        return [self._row_to_run(row) for row in rows]
+
+    def best_runs(self, metric='test_accuracy', limit=10, model_name=None):
+        """
+        MEJORES EJECUCIONES SEGÚN UNA MÉTRICA
+        metric: columna de runs (test_accuracy, ...) o métrica por época
+        (mejor valor de la ejecución; las de loss cuentan al revés)
+
+        Retorna:
+        --------
+        list: [(run_id, model_name, valor)]
+        """
+        model_filter = "AND r.model_name = ?" if model_name else ""
+        params = (model_name,) if model_name else ()
+        if metric in _RUN_FIELDS:
+            return self.conn.execute(
+                f"SELECT r.run_id, r.model_name, r.{metric} FROM runs r "
+                f"WHERE r.{metric} IS NOT NULL {model_filter} "
+                f"ORDER BY r.{metric} DESC LIMIT ?", params + (limit,)).fetchall()
+        lower = 'loss' in metric
+        return self.conn.execute(
+            f"SELECT r.run_id, r.model_name, {'MIN' if lower else 'MAX'}(m.value) AS best "
+            f"FROM epoch_metrics m JOIN runs r ON r.run_id = m.run_id "
+            f"WHERE m.metric = ? {model_filter} GROUP BY r.run_id "
+            f"ORDER BY best {'ASC' if lower else 'DESC'} LIMIT ?",
+            (metric,) + params + (limit,)).fetchall()
+
+    def compare_runs(self, run_ids, metrics=('accuracy', 'val_accuracy', 'loss', 'val_loss')):
+        """
+        COMPARA EJECUCIONES
+
+        Retorna:
+        --------
+        dict: {run_id: {'model_name', 'test_accuracy', 'epochs',
+               '<métrica>_final', '<métrica>_best', ...}}
+        """
+        placeholders = ", ".join("?" for _ in run_ids)
+        comparison = {}
+        for run_id, model_name, test_accuracy, images_per_sec, params in self.conn.execute(
+                f"SELECT run_id, model_name, test_accuracy, images_per_sec, params "
+                f"FROM runs WHERE run_id IN ({placeholders})", tuple(run_ids)):
+            params = json.loads(params) if params else {}
+            comparison[run_id] = {'model_name': model_name, 'test_accuracy': test_accuracy,
+                                  'images_per_sec': images_per_sec,
+                                  'learning_rate': params.get('learning_rate'),
+                                  'batch_size': params.get('batch_size')}
+        metric_placeholders = ", ".join("?" for _ in metrics)
+        rows = self.conn.execute(
+            f"SELECT m.run_id, m.metric, MAX(m.epoch) + 1, MIN(m.value), MAX(m.value), "
+            f"(SELECT value FROM epoch_metrics f WHERE f.run_id = m.run_id "
+            f" AND f.metric = m.metric ORDER BY f.epoch DESC LIMIT 1) "
+            f"FROM epoch_metrics m WHERE m.run_id IN ({placeholders}) "
+            f"AND m.metric IN ({metric_placeholders}) GROUP BY m.run_id, m.metric",
+            tuple(run_ids) + tuple(metrics))
+        for run_id, metric, epochs, low, high, final in rows:
+            entry = comparison.setdefault(run_id, {})
+            entry['epochs'] = max(entry.get('epochs', 0), epochs)
+            entry[f'{metric}_final'] = final
+            entry[f'{metric}_best'] = low if 'loss' in metric else high
+        return comparison
+
+    def close(self):
+        self.conn.close()
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+def _fmt(value, spec='.4f'):
+    return format(value, spec) if isinstance(value, (int, float)) else '-'
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db', type=str, default=DEFAULT_DB)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = subparsers.add_parser('list', help='Ejecuciones recientes')
+    list_parser.add_argument('--model', type=str, default=None)
+    list_parser.add_argument('--status', type=str, default=None)
+    list_parser.add_argument('--order_by', type=str, default='run_id')
+    list_parser.add_argument('--limit', type=int, default=20)
+
+    best_parser = subparsers.add_parser('best', help='Mejores ejecuciones por métrica')
+    best_parser.add_argument('--metric', type=str, default='test_accuracy')
+    best_parser.add_argument('--model', type=str, default=None)
+    best_parser.add_argument('--limit', type=int, default=10)
+
+    compare_parser = subparsers.add_parser('compare', help='Comparar ejecuciones')
+    compare_parser.add_argument('run_ids', type=int, nargs='+')
+    compare_parser.add_argument('--metrics', type=str, nargs='+',
+                                default=['accuracy', 'val_accuracy', 'val_loss'])
+
+    show_parser = subparsers.add_parser('show', help='Detalle de una ejecución')
+    show_parser.add_argument('run_id', type=int)
+
+    args = parser.parse_args()
+    store = ExperimentStore(args.db)
+
+    if args.command == 'list':
+        runs = store.list_runs(args.model, args.status, order_by=args.order_by,
+                               limit=args.limit)
+        print(f"{'run':>5} {'inicio':<20} {'estado':<9} {'modelo':<15} {'backend':<8} "
+              f"{'test_acc':>9} {'img/s':>8}")
+        for run in runs:
+            print(f"{run['run_id']:>5} {run['started_at']:<20} {run['status']:<9} "
+                  f"{run['model_name'] or '-':<15} {run['backend'] or '-':<8} "
+                  f"{_fmt(run['test_accuracy']):>9} {_fmt(run['images_per_sec'], '.0f'):>8}")
+    elif args.command == 'best':
+        print(f"🏆 Mejores ejecuciones por {args.metric}")
+        for run_id, model_name, value in store.best_runs(args.metric, args.limit, args.model):
+            print(f"   {run_id:>5}  {model_name:<15} {_fmt(value)}")
+    elif args.command == 'compare':
+        comparison = store.compare_runs(args.run_ids, args.metrics)
+        columns = ['model_name', 'epochs', 'test_accuracy', 'images_per_sec']
+        for metric in args.metrics:
+            columns += [f'{metric}_final', f'{metric}_best']
+        print(f"{'':<28}" + "".join(f"{run_id:>14}" for run_id in args.run_ids))
+        for column in columns:
+            cells = [comparison.get(run_id, {}).get(column) for run_id in args.run_ids]
+            print(f"{column:<28}" + "".join(
+                f"{cell if isinstance(cell, (str, int)) else _fmt(cell):>14}" for cell in cells))
+    elif args.command == 'show':
+        run = store.get_run(args.run_id)
+        if run is None:
+            raise SystemExit(f"❌ Ejecución no encontrada: {args.run_id}")
+        print(json.dumps(run, indent=2))
+        for phase, first, last in store.get_phases(args.run_id):
+            print(f"   - Fase {phase}: épocas {first + 1}-{last + 1}")
+    store.close()
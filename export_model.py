@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+EXPORTACIÓN DEL MODELO A TFLite / ONNX CON CUANTIZACIÓN
+=======================================================
+Convierte el .h5 entrenado a artefactos ligeros para inferencia en CPU:
+    - float32 (sin cuantizar)
+    - float16
+    - int8 (cuantización entera completa, calibrada con el split de validación)
+Opcionalmente compara accuracy y latencia contra el modelo original en Test/.
+"""
+
+import os
+import time
+import numpy as np
+import tensorflow as tf
+from preprocess_data import preprocess_fruit360_data
+from lite_predictor import LitePredictor
+
+QUANTIZATION_MODES = ('none', 'float16', 'int8')
+
+def representative_images(val_gen, num_samples=200):
+    """Toma num_samples imágenes del split de validación para calibrar"""
+    images = []
+    for batch_x, _ in val_gen:
+        images.extend(np.asarray(batch_x, dtype=np.float32))
+        if len(images) >= num_samples:
+            break
+    return np.stack(images[:num_samples])
+
+def export_tflite(model, output_path, quantization='none', calibration_images=None):
+    """
+    EXPORTA A TFLite
+
+    Parámetros:
+    -----------
+    model : keras.Model
+        Modelo entrenado
+    output_path : str
+        Ruta del .tflite
+    quantization : str
+        'none', 'float16' o 'int8'
+    calibration_images : np.ndarray
+        Imágenes de calibración (obligatorio para int8)
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    if quantization == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        if calibration_images is None:
+            raise ValueError("❌ La cuantización int8 necesita imágenes de calibración")
+
+        def representative_dataset():
+            for image in calibration_images:
+                yield [image[np.newaxis]]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.uint8
+        converter.inference_output_type = tf.uint8
+    elif quantization != 'none':
+        raise ValueError(f"❌ Cuantización no soportada: {quantization}")
+
+    tflite_model = converter.convert()
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+    print(f"💾 TFLite ({quantization}): {output_path} "
+          f"({os.path.getsize(output_path) / 1e6:.2f} MB)")
+    return output_path
+
+def export_onnx(model, output_path, quantization='none', calibration_images=None,
+                opset=13):
+    """
+    EXPORTA A ONNX (requiere tf2onnx; onnxruntime para int8,
+    onnxconverter-common para float16)
+    """
+    try:
+        import tf2onnx
+    except ImportError:
+        raise ValueError("❌ Librería 'tf2onnx' no instalada. Ejecuta: pip install tf2onnx")
+
+    input_signature = [tf.TensorSpec((None,) + tuple(model.input_shape[1:]),
+                                     tf.float32, name='input')]
+    float_path = output_path if quantization == 'none' else output_path + '.fp32.onnx'
+    tf2onnx.convert.from_keras(model, input_signature=input_signature,
+                               opset=opset, output_path=float_path)
+
+    if quantization == 'float16':
+        import onnx
+        from onnxconverter_common import float16
+        onnx_model = float16.convert_float_to_float16(onnx.load(float_path),
+                                                      keep_io_types=True)
+        onnx.save(onnx_model, output_path)
+        os.remove(float_path)
+    elif quantization == 'int8':
+        if calibration_images is None:
+            raise ValueError("❌ La cuantización int8 necesita imágenes de calibración")
+        from onnxruntime.quantization import (quantize_static, CalibrationDataReader,
+                                              QuantType)
+
+        class _Reader(CalibrationDataReader):
+            def __init__(self, images):
+                self.iterator = iter(images)
+
+            def get_next(self):
+                image = next(self.iterator, None)
+                return None if image is None else {'input': image[np.newaxis]}
+
+        quantize_static(float_path, output_path, _Reader(calibration_images),
+                        activation_type=QuantType.QUInt8,
+                        weight_type=QuantType.QInt8)
+        os.remove(float_path)
+    elif quantization != 'none':
+        raise ValueError(f"❌ Cuantización no soportada: {quantization}")
+
+    print(f"💾 ONNX ({quantization}): {output_path} "
+          f"({os.path.getsize(output_path) / 1e6:.2f} MB)")
+    return output_path
+
+def _measure(predict_fn, test_gen):
+    """Accuracy y latencia media por imagen recorriendo Test/ una vez"""
+    correct, total, elapsed = 0, 0, 0.0
+    for i in range(len(test_gen)):
+        batch_x, batch_y = test_gen[i]
+        batch_x = np.asarray(batch_x, dtype=np.float32)
+        start = time.perf_counter()
+        probs = predict_fn(batch_x)
+        elapsed += time.perf_counter() - start
+        correct += int(np.sum(np.argmax(probs, axis=1) == np.argmax(batch_y, axis=1)))
+        total += len(batch_x)
+    return correct / max(total, 1), elapsed / max(total, 1) * 1000
+
+def compare_with_original(model, artifact_paths, test_gen):
+    """
+    COMPARA ACCURACY Y LATENCIA EN Test/
+
+    Retorna:
+    --------
+    list: filas {'artifact', 'accuracy', 'delta', 'ms_per_image', 'size_mb'}
+    """
+    print("\n📊 Comparando contra el modelo original en Test/...")
+    base_acc, base_ms = _measure(lambda x: model(x, training=False).numpy(), test_gen)
+    rows = [{'artifact': 'keras (original)', 'accuracy': base_acc, 'delta': 0.0,
+             'ms_per_image': base_ms, 'size_mb': None}]
+
+    for path in artifact_paths:
+        predictor = LitePredictor(path)
+        acc, ms = _measure(predictor.predict, test_gen)
+        rows.append({'artifact': os.path.basename(path), 'accuracy': acc,
+                     'delta': acc - base_acc, 'ms_per_image': ms,
+                     'size_mb': os.path.getsize(path) / 1e6})
+
+    print(f"\n{'Artefacto':<36} {'Accuracy':>9} {'Δ':>8} {'ms/img':>8} {'MB':>7}")
+    for row in rows:
+        size = f"{row['size_mb']:.2f}" if row['size_mb'] is not None else '-'
+        print(f"{row['artifact']:<36} {row['accuracy']:>9.4f} {row['delta']:>+8.4f} "
+              f"{row['ms_per_image']:>8.3f} {size:>7}")
+    return rows
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', type=str, default='fruit360_transfer_learning.h5')
+    parser.add_argument('--format', type=str, nargs='+', default=['tflite'],
+                        choices=['tflite', 'onnx'])
+    parser.add_argument('--quantization', type=str, nargs='+', default=['int8'],
+                        choices=list(QUANTIZATION_MODES))
+    parser.add_argument('--output_dir', type=str, default='exported_models')
+    parser.add_argument('--calibration_samples', type=int, default=200)
+    parser.add_argument('--backend', type=str, default='keras',
+                        choices=['keras', 'tfdata', 'packed'])
+    parser.add_argument('--evaluate', action='store_true',
+                        help='Comparar accuracy/latencia contra el original en Test/')
+
+    args = parser.parse_args()
+
+    print("📦 EXPORTACIÓN DE MODELO - FRUIT360")
+    print("=" * 50)
+
+    model = tf.keras.models.load_model(args.model, compile=False)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    # tf.data no soporta indexado: para calibrar/evaluar se usa keras o packed
+    backend = 'keras' if args.backend == 'tfdata' else args.backend
+    _, val_gen, test_gen, _, _ = preprocess_fruit360_data(
+        augment_training=False, backend=backend
+    )
+
+    calibration = None
+    if 'int8' in args.quantization:
+        calibration = representative_images(val_gen, args.calibration_samples)
+        print(f"🎯 Calibración: {len(calibration)} imágenes de validación")
+
+    artifacts = []
+    for fmt in args.format:
+        for quantization in args.quantization:
+            path = os.path.join(args.output_dir, f"fruit360_{quantization}.{fmt}")
+            if fmt == 'tflite':
+                artifacts.append(export_tflite(model, path, quantization, calibration))
+            else:
+                artifacts.append(export_onnx(model, path, quantization, calibration))
+
+    if args.evaluate:
+        compare_with_original(model, artifacts, test_gen)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+CACHÉ DE FEATURES (BOTTLENECK) PARA LA FASE CONGELADA
+=====================================================
+Con el modelo base congelado, su salida no cambia entre épocas. Se calcula
+una sola vez la salida de GlobalAveragePooling para todo el dataset
+empaquetado y se entrena la cabeza Dense(512) → Dense(num_classes)
+directamente sobre esas features.
+"""
+
+import os
+import json
+import time
+import numpy as np
+from tensorflow.keras.models import Model
+from tensorflow.keras.layers import Input, GlobalAveragePooling2D
+from tensorflow.keras.callbacks import EarlyStopping
+from packed_dataset import load_manifest, load_packed_split
+from transferLearning import create_base_model, build_classification_head, compile_model
+
+FEATURES_META = "features.json"
+
+def feature_cache_dir(cache_root, base_model_name, manifest_hash, augmented_views=0):
+    """Directorio de la caché: backbone + hash del manifest + vistas"""
+    return os.path.join(
+        cache_root,
+        f"{base_model_name}_{manifest_hash[:16]}_views{augmented_views}"
+    )
+
+def create_feature_extractor(base_model_name='EfficientNetB0', input_shape=(100, 100, 3)):
+    """Modelo base + GlobalAveragePooling (salida = features de la cabeza)"""
+    base_model = create_base_model(base_model_name, input_shape)
+    base_model.trainable = False
+    features = GlobalAveragePooling2D(name='head_pool')(base_model.output)
+    return Model(inputs=base_model.input, outputs=features)
+
+def _extract_split(extractor, images, output_path, batch_size, augmentation=None,
+                   views=1):
+    """Escribe las features de un split (views pasadas) en un .npy"""
+    num_images = len(images)
+    feature_dim = extractor.output_shape[-1]
+    features = np.lib.format.open_memmap(
+        output_path, mode='w+', dtype=np.float32,
+        shape=(num_images * views, feature_dim)
+    )
+
+    for view in range(views):
+        offset = view * num_images
+        for start in range(0, num_images, batch_size):
+            batch = images[start:start + batch_size].astype(np.float32) / 255.0
+            if augmentation is not None:
+                batch = augmentation(batch, training=True)
+            features[offset + start:offset + start + len(batch)] = \
+                extractor.predict_on_batch(batch)
+
+    features.flush()
+    del features
+
+def compute_bottleneck_features(base_model_name, packed_dir,
+                                cache_root="../feature_cache",
+                                augmented_views=0,
+                                batch_size=256,
+                                seed=42):
+    """
+    CALCULA (UNA VEZ) LAS FEATURES DEL MODELO BASE
+    ==============================================
+    Parámetros:
+    -----------
+    base_model_name : str
+        'EfficientNetB0', 'MobileNetV2' o 'ResNet50'
+    packed_dir : str
+        Dataset empaquetado con packed_dataset.py
+    cache_root : str
+        Directorio raíz de la caché
+    augmented_views : int
+        0 = features sin aumento; N > 0 = N vistas aumentadas de train
+    batch_size : int
+        Tamaño de lote para la pasada forward
+
+    Retorna:
+    --------
+    str: directorio con features_{train,val,test}.npy
+    """
+    manifest = load_manifest(packed_dir)
+    cache_dir = feature_cache_dir(cache_root, base_model_name,
+                                  manifest['manifest_hash'], augmented_views)
+
+    meta_path = os.path.join(cache_dir, FEATURES_META)
+    if os.path.exists(meta_path):
+        print(f"✅ Features en caché: {cache_dir}")
+        return cache_dir
+
+    print(f"🧮 Calculando features de {base_model_name} (una sola vez)...")
+    os.makedirs(cache_dir, exist_ok=True)
+    start = time.time()
+
+    input_shape = tuple(manifest['target_size']) + (3,)
+    extractor = create_feature_extractor(base_model_name, input_shape)
+
+    augmentation = None
+    if augmented_views > 0:
+        from preprocess_data import build_augmentation_layers
+        augmentation = build_augmentation_layers(seed)
+
+    for split in ('train', 'val', 'test'):
+        images, labels = load_packed_split(packed_dir, split)
+        use_aug = split == 'train' and augmentation is not None
+        views = augmented_views if use_aug else 1
+        print(f"   ⏳ {split}: {len(images)} imágenes x {views} vista(s)")
+        _extract_split(extractor, images,
+                       os.path.join(cache_dir, f"features_{split}.npy"),
+                       batch_size,
+                       augmentation=augmentation if use_aug else None,
+                       views=views)
+        np.save(os.path.join(cache_dir, f"labels_{split}.npy"), np.tile(labels, views))
+
+    meta = {
+        'base_model': base_model_name,
+        'manifest_hash': manifest['manifest_hash'],
+        'augmented_views': augmented_views,
+        'feature_dim': int(extractor.output_shape[-1]),
+        'num_classes': manifest['num_classes'],
+        'seconds': round(time.time() - start, 1),
+    }
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    print(f"✅ Features guardadas en {meta['seconds']}s: {cache_dir}")
+    return cache_dir
+
+def load_cached_features(cache_dir, split):
+    """Devuelve (features, labels) de un split de la caché"""
+    features = np.load(os.path.join(cache_dir, f"features_{split}.npy"), mmap_mode='r')
+    labels = np.load(os.path.join(cache_dir, f"labels_{split}.npy"))
+    return features, labels
+
+def train_head_on_features(model, cache_dir, epochs=10, batch_size=64,
+                           learning_rate=0.001, patience=5):
+    """
+    ENTRENA LA CABEZA SOBRE FEATURES CACHEADAS
+    ==========================================
+    Construye una cabeza con las mismas capas (mismos nombres) que
+    create_transfer_learning_model, la entrena sobre las features y copia
+    los pesos al modelo completo.
+
+    Retorna:
+    --------
+    History: historial del entrenamiento de la cabeza
+    """
+    with open(os.path.join(cache_dir, FEATURES_META)) as f:
+        meta = json.load(f)
+    num_classes = meta['num_classes']
+
+    train_x, train_y = load_cached_features(cache_dir, 'train')
+    val_x, val_y = load_cached_features(cache_dir, 'val')
+
+    inputs = Input(shape=(meta['feature_dim'],))
+    head = Model(inputs=inputs, outputs=build_classification_head(inputs, num_classes))
+    compile_model(head, learning_rate=learning_rate)
+
+    eye = np.eye(num_classes, dtype=np.float32)
+    history = head.fit(
+        np.asarray(train_x), eye[train_y],
+        epochs=epochs,
+        batch_size=batch_size,
+        shuffle=True,
+        validation_data=(np.asarray(val_x), eye[val_y]),
+        callbacks=[EarlyStopping(patience=patience, restore_best_weights=True)],
+        verbose=2
+    )
+
+    # Copiar pesos al modelo completo
+    for layer_name in ('head_dense', 'predictions'):
+        model.get_layer(layer_name).set_weights(head.get_layer(layer_name).get_weights())
+
+    return history
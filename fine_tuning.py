@@ -0,0 +1,176 @@
+"""
+FINE-TUNING POR ETAPAS DEL MODELO BASE
+======================================
+El modelo se construye con la API funcional, así que las capas del modelo
+base quedan "aplanadas" dentro del modelo final (model.layers[0] es el
+InputLayer, no el backbone). Aquí se agrupan esas capas en bloques según
+el nombre de cada arquitectura y se descongelan los N bloques superiores
+por etapas, cada una con su learning rate. Las BatchNormalization se
+mantienen congeladas (modo inferencia): más rápido y más estable con
+lotes pequeños.
+"""
+
+import re
+import time
+from tensorflow.keras.layers import BatchNormalization, InputLayer
+from transferLearning import compile_model
+
+# Prefijo de bloque en los nombres de capa de cada arquitectura
+BLOCK_PATTERNS = {
+    'EfficientNetB0': r'^(block\d+[a-z])_',
+    'MobileNetV2': r'^(block_\d+)_',
+    'ResNet50': r'^(conv\d_block\d+)_',
+}
+
+# Etapas por defecto: (bloques descongelados, learning rate, épocas)
+DEFAULT_STAGES = ((2, 1e-4, 2), (4, 5e-5, 2))
+
+def parse_stages(spec):
+    """
+    Convierte "2:1e-4:2,4:5e-5:2" en ((2, 1e-4, 2), (4, 5e-5, 2)).
+    "none" desactiva el fine-tuning.
+    """
+    if not spec or spec.lower() == 'none':
+        return ()
+    stages = []
+    for item in spec.split(','):
+        blocks, lr, epochs = item.split(':')
+        stages.append((int(blocks), float(lr), int(epochs)))
+    return tuple(stages)
+
+def backbone_layers(model):
+    """Capas del modelo base: todo lo anterior a la cabeza (head_pool)"""
+    layers = []
+    for layer in model.layers:
+        if layer.name == 'head_pool':
+            break
+        if not isinstance(layer, InputLayer):
+            layers.append(layer)
+    return layers
+
+def group_backbone_blocks(model, base_model_name):
+    """
+    AGRUPA LAS CAPAS DEL MODELO BASE EN BLOQUES
+
+    Las capas previas al primer bloque van a 'stem'; las posteriores al
+    último (top_conv, Conv_1, ...) se añaden al último bloque.
+
+    Retorna:
+    --------
+    list: [(nombre_bloque, [capas]), ...] de abajo arriba
+    """
+    if base_model_name not in BLOCK_PATTERNS:
+        raise ValueError("Modelo no soportado")
+    pattern = re.compile(BLOCK_PATTERNS[base_model_name])
+
+    blocks = []
+    for layer in backbone_layers(model):
+        match = pattern.match(layer.name)
+        if match:
+            key = match.group(1)
+            if not blocks or blocks[-1][0] != key:
+                blocks.append((key, []))
+        elif not blocks:
+            blocks.append(('stem', []))
+        blocks[-1][1].append(layer)
+    return blocks
+
+def unfreeze_top_blocks(model, base_model_name, num_blocks):
+    """
+    DESCONGELA LOS num_blocks BLOQUES SUPERIORES (SIN BatchNormalization)
+
+    Retorna:
+    --------
+    int: número de capas entrenables del modelo base
+    """
+    blocks = group_backbone_blocks(model, base_model_name)
+    for layer in backbone_layers(model):
+        layer.trainable = False
+
+    trainable = 0
+    for _, layers in blocks[len(blocks) - num_blocks:] if num_blocks > 0 else []:
+        for layer in layers:
+            if not isinstance(layer, BatchNormalization):
+                layer.trainable = True
+                trainable += 1
+    return trainable
+
+def fine_tune_in_stages(model, base_model_name, train_gen, val_gen,
+                        stages=DEFAULT_STAGES, min_gain=0.002, callbacks=None,
+                        fit_kwargs=None):
+    """
+    FINE-TUNING POR ETAPAS
+    ======================
+    En cada etapa descongela más bloques, recompila con su learning rate y
+    entrena. Si la etapa no mejora la accuracy de validación al menos
+    min_gain, se restauran los pesos previos y se detiene.
+
+    Parámetros:
+    -----------
+    stages : tuple
+        ((bloques, learning_rate, épocas), ...)
+    min_gain : float
+        Mejora mínima de val_accuracy para seguir descongelando
+    fit_kwargs : dict
+        steps_per_epoch / validation_steps para entradas repetidas
+        (DatasetCreator en distributed_training.py)
+
+    Retorna:
+    --------
+    tuple: (histories, report) con una fila por etapa
+    """
+    print("🔧 Fine-tuning por etapas...")
+    fit_kwargs = fit_kwargs or {}
+    validation_steps = fit_kwargs.get('validation_steps')
+    _, best_acc = model.evaluate(val_gen, steps=validation_steps, verbose=0)[:2]
+    print(f"   - Val accuracy inicial: {best_acc:.4f}")
+    num_blocks_total = len(group_backbone_blocks(model, base_model_name))
+
+    histories, report = [], []
+    for stage, (num_blocks, learning_rate, epochs) in enumerate(stages, start=1):
+        num_blocks = min(num_blocks, num_blocks_total)
+        previous_weights = model.get_weights()
+        trainable = unfreeze_top_blocks(model, base_model_name, num_blocks)
+        compile_model(model, learning_rate=learning_rate)
+
+        print(f"   🔓 Etapa {stage}: {num_blocks}/{num_blocks_total} bloques "
+              f"({trainable} capas), lr={learning_rate}, {epochs} épocas")
+        start = time.time()
+        history = model.fit(
+            train_gen,
+            epochs=epochs,
+            validation_data=val_gen,
+            callbacks=callbacks,
+            verbose=2,
+            **fit_kwargs
+        )
+        elapsed = time.time() - start
+        _, val_acc = model.evaluate(val_gen, steps=validation_steps, verbose=0)[:2]
+        gain = val_acc - best_acc
+
+        report.append({
+            'stage': stage,
+            'blocks': num_blocks,
+            'trainable_layers': trainable,
+            'learning_rate': learning_rate,
+            'epochs': epochs,
+            'seconds': round(elapsed, 1),
+            'val_accuracy': round(float(val_acc), 4),
+            'gain': round(float(gain), 4),
+            'kept': gain >= min_gain,
+        })
+        histories.append(history)
+        print(f"      ⏱️  {elapsed:.1f}s  val_acc={val_acc:.4f}  ganancia={gain:+.4f}")
+
+        if gain < min_gain:
+            print(f"      ↩️  Ganancia < {min_gain}: se restauran los pesos y se detiene")
+            model.set_weights(previous_weights)
+            break
+        best_acc = val_acc
+
+    print(f"\n{'Etapa':>5} {'Bloques':>8} {'LR':>9} {'Tiempo(s)':>10} {'Val acc':>8} {'Ganancia':>9}")
+    for row in report:
+        print(f"{row['stage']:>5} {row['blocks']:>8} {row['learning_rate']:>9.1e} "
+              f"{row['seconds']:>10.1f} {row['val_accuracy']:>8.4f} {row['gain']:>+9.4f}"
+              f"{'' if row['kept'] else '  (descartada)'}")
+    return histories, report
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+LÍNEA DE COMANDOS UNIFICADA FRUIT360
+====================================
+Un único punto de entrada para los scripts del proyecto. Cada subcomando
+importa solo su propio script al ejecutarse, así que check / report no
+cargan TensorFlow ni matplotlib y arrancan en una fracción de segundo.
+
+Uso:
+    python fruit360.py check
+    python fruit360.py report --text_only
+    python fruit360.py runs compare 3 7
+    python fruit360.py train --model MobileNetV2 --epochs 10
+    python fruit360.py evaluate --models fruit360_transfer_learning.h5 fruit360_int8.tflite
+    python fruit360.py predict --input ../fotos --output predicciones.csv
+    python fruit360.py stream --source cinta.mp4 --model fruit360_int8.tflite
+    python fruit360.py download --connections 8
+    python fruit360.py <subcomando> --help
+"""
+
+import os
+import sys
+import runpy
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# subcomando → (script, descripción)
+COMMANDS = {
+    'train': ('transferLearning.py', 'Entrenar con transfer learning'),
+    'predict': ('batch_predict.py', 'Predicción por lotes en streaming'),
+    'evaluate': ('evaluation.py', 'Matriz de confusión y métricas por clase'),
+    'check': ('check_dataset_structure.py', 'Validar la estructura del dataset'),
+    'report': ('recuperar_historial.py', 'Regenerar el reporte de entrenamiento'),
+    'runs': ('experiment_store.py', 'Listar y comparar ejecuciones'),
+    'download': ('descarga_cifar.py', 'Descargar Fruit360 (reanudable)'),
+    'stream': ('stream_classifier.py', 'Clasificar vídeo o cámara en tiempo real'),
+    'serve': ('inference_server.py', 'Servidor de inferencia HTTP'),
+    'export': ('export_model.py', 'Exportar a TFLite/ONNX'),
+    'pack': ('packed_dataset.py', 'Empaquetar el dataset en memmap'),
+}
+
+def print_usage():
+    print("Uso: python fruit360.py <subcomando> [argumentos]\n")
+    print("Subcomandos:")
+    for name, (script, description) in COMMANDS.items():
+        print(f"   {name:<10} {description} ({script})")
+    print("\n'python fruit360.py <subcomando> --help' muestra sus argumentos")
+
+def run_command(name, argv):
+    """
+    EJECUTA EL SCRIPT DE UN SUBCOMANDO COMO __main__
+    Los imports pesados ocurren aquí, solo para el script elegido.
+    """
+    script = os.path.join(REPO_DIR, COMMANDS[name][0])
+    sys.argv = [f"fruit360.py {name}"] + list(argv)
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR)
+    runpy.run_path(script, run_name="__main__")
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] in ('-h', '--help'):
+        print_usage()
+        sys.exit(0)
+    if sys.argv[1] not in COMMANDS:
+        print(f"❌ Subcomando desconocido: {sys.argv[1]}\n")
+        print_usage()
+        sys.exit(2)
+    run_command(sys.argv[1], sys.argv[2:])
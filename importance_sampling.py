@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+MUESTREO POR IMPORTANCIA (EJEMPLOS DIFÍCILES)
+=============================================
+Una vez convergida la cabeza, la mayoría de imágenes de Fruit360 se
+clasifican bien y con mucha confianza: volver a entrenarlas cada época
+aporta poco. Este muestreador:
+
+    - mantiene una estimación de la loss de cada ejemplo, refrescada cada
+      pocos pasos sobre un trozo del dataset (solo forward, en orden
+      aleatorio circular, así el coste es una fracción pequeña del paso)
+    - sortea los lotes con probabilidad p_i = suelo/N + (1-suelo)·l_i/Σl
+      (el suelo uniforme garantiza que ningún ejemplo deja de verse)
+    - corrige el sesgo con sample_weight w_i = 1/(N·p_i), de modo que la
+      loss del lote sigue estimando la loss media del dataset
+
+Requiere el dataset empaquetado (acceso aleatorio barato por índice).
+compare_to_uniform() mide imágenes vistas y segundos hasta una accuracy
+de validación objetivo frente al muestreo uniforme.
+
+Uso:
+    python importance_sampling.py --model MobileNetV2 --epochs 8 --target_accuracy 0.94
+"""
+
+import os
+import json
+import time
+import threading
+from datetime import datetime
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.callbacks import Callback
+from packed_dataset import PackedSequence, load_packed_data
+
+class ImportanceSampledSequence(PackedSequence):
+    """
+    SECUENCIA DE ENTRENAMIENTO CON MUESTREO POR IMPORTANCIA
+    ======================================================
+    Parámetros:
+    -----------
+    uniform_floor : float
+        Fracción de la probabilidad repartida de forma uniforme (0-1)
+    warmup_epochs : int
+        Épocas iniciales con muestreo uniforme (la cabeza aún no convergió)
+    smoothing : float
+        Peso de la estimación anterior al refrescar una loss (media móvil)
+
+    Los lotes se sortean con reemplazo; cada época tiene el mismo número
+    de lotes que la secuencia uniforme. Devuelve (x, y, sample_weight).
+
+    Keras lee los lotes desde un hilo de tf.data mientras el callback
+    refresca las losses en el principal: la distribución (p, cdf) se
+    publica como una tupla bajo un lock y cada lote usa una sola copia.
+    """
+
+    def __init__(self, images, labels, num_classes, batch_size=32, augment=False,
+                 seed=42, uniform_floor=0.2, warmup_epochs=1, smoothing=0.5):
+        super().__init__(images, labels, num_classes, batch_size,
+                         shuffle=True, augment=augment, seed=seed)
+        if not 0.0 < uniform_floor <= 1.0:
+            raise ValueError(f"uniform_floor debe estar en (0, 1]: {uniform_floor}")
+        self.uniform_floor = uniform_floor
+        self.warmup_epochs = warmup_epochs
+        self.smoothing = smoothing
+        self.epoch = 0
+        # Sin información todos los ejemplos valen lo mismo: log(C)
+        self.losses = np.full(len(labels), np.log(num_classes), dtype=np.float32)
+        self.refreshed = np.zeros(len(labels), dtype=bool)
+        self._lock = threading.Lock()
+        self._distribution = None  # (probabilities, cdf) o None si hay que recalcularla
+
+    @property
+    def active(self):
+        return self.epoch >= self.warmup_epochs
+
+    def update_losses(self, indices, losses):
+        """Mezcla losses nuevas en la estimación (media móvil por ejemplo)"""
+        with self._lock:
+            first = ~self.refreshed[indices]
+            blended = self.smoothing * self.losses[indices] + (1 - self.smoothing) * losses
+            self.losses[indices] = np.where(first, losses, blended)
+            self.refreshed[indices] = True
+            self._distribution = None
+
+    def distribution(self):
+        """(p_i con suelo uniforme, su CDF), recalculadas tras cada refresco"""
+        distribution = self._distribution
+        if distribution is not None:
+            return distribution
+        with self._lock:
+            if self._distribution is None:
+                n = len(self.losses)
+                losses = np.maximum(self.losses.astype(np.float64), 0.0)
+                total = losses.sum()
+                hard = losses / total if total > 0 else np.full(n, 1.0 / n)
+                probabilities = self.uniform_floor / n + (1 - self.uniform_floor) * hard
+                cdf = np.cumsum(probabilities)
+                cdf /= cdf[-1]
+                self._distribution = (probabilities, cdf)
+            return self._distribution
+
+    def probabilities(self):
+        """p_i con suelo uniforme"""
+        return self.distribution()[0]
+
+    def __getitem__(self, index):
+        if not self.active:
+            x, y = super().__getitem__(index)
+            return x, y, np.ones(len(y), dtype=np.float32)
+        probabilities, cdf = self.distribution()
+        batch_idx = np.searchsorted(cdf, self.rng.random(self.batch_size), side='right')
+        batch_idx = np.sort(np.minimum(batch_idx, len(self.labels) - 1))
+        weights = 1.0 / (len(self.labels) * probabilities[batch_idx])
+        x = self.images[batch_idx].astype(np.float32) / 255.0
+        y = np.eye(self.num_classes, dtype=np.float32)[self.labels[batch_idx]]
+        if self.augmentation is not None:
+            x = self.augmentation(x, training=True).numpy()
+        return x, y, weights.astype(np.float32)
+
+    def on_epoch_end(self):
+        super().on_epoch_end()
+        self.epoch += 1
+
+    def summary(self):
+        """Concentración del muestreo: qué fracción de la probabilidad va al 10% más difícil"""
+        probabilities = self.probabilities()
+        top = np.sort(probabilities)[::-1][:max(len(probabilities) // 10, 1)]
+        return {
+            'refreshed_fraction': round(float(self.refreshed.mean()), 4),
+            'top10pct_probability_mass': round(float(top.sum()), 4),
+            'max_weight': round(float(1.0 / (len(probabilities) * probabilities.min())), 3),
+            'min_weight': round(float(1.0 / (len(probabilities) * probabilities.max())), 3),
+        }
+
+def per_sample_loss(model, x, labels):
+    """Cross-entropy de cada ejemplo (inferencia, sin dropout)"""
+    probs = model(x, training=False).numpy()
+    return -np.log(np.clip(probs[np.arange(len(labels)), labels], 1e-7, 1.0))
+
+class LossRefreshCallback(Callback):
+    """
+    REFRESCA LA ESTIMACIÓN DE LOSS DURANTE EL ENTRENAMIENTO
+    Cada refresh_every pasos puntúa refresh_size ejemplos (recorrido
+    circular en orden aleatorio, así todo el dataset se renueva
+    periódicamente). Los índices se cuentan entre llamadas a fit.
+    """
+
+    def __init__(self, sequence, refresh_every=50, refresh_size=1024, score_batch_size=256,
+                 seed=42):
+        super().__init__()
+        self.sequence = sequence
+        self.refresh_every = max(int(refresh_every), 1)
+        self.refresh_size = int(refresh_size)
+        self.score_batch_size = score_batch_size
+        self.order = np.random.default_rng(seed).permutation(len(sequence.labels))
+        self.cursor = 0
+        self.step = 0
+        self.seconds = 0.0
+        self.scored = 0
+
+    def refresh(self, size=None):
+        start = time.perf_counter()
+        size = min(size or self.refresh_size, len(self.order))
+        take = np.take(self.order, np.arange(self.cursor, self.cursor + size), mode='wrap')
+        self.cursor = (self.cursor + size) % len(self.order)
+        for i in range(0, len(take), self.score_batch_size):
+            idx = np.sort(take[i:i + self.score_batch_size])
+            x = self.sequence.images[idx].astype(np.float32) / 255.0
+            labels = self.sequence.labels[idx]
+            self.sequence.update_losses(idx, per_sample_loss(self.model, x, labels))
+        self.scored += len(take)
+        self.seconds += time.perf_counter() - start
+
+    def on_epoch_begin(self, epoch, logs=None):
+        # Antes de la primera época con muestreo activo, una pasada completa
+        if self.sequence.epoch == self.sequence.warmup_epochs and \
+                not self.sequence.refreshed.all():
+            self.refresh(size=len(self.order))
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.step += 1
+        if self.sequence.active and self.step % self.refresh_every == 0:
+            self.refresh()
+
+class TimeToAccuracy(Callback):
+    """
+    IMÁGENES VISTAS Y SEGUNDOS POR ÉPOCA (CURVA PARA TIEMPO-A-ACCURACY)
+    """
+
+    def __init__(self, batch_size, monitor='val_accuracy'):
+        super().__init__()
+        self.batch_size = batch_size
+        self.monitor = monitor
+        self.images_seen = 0
+        self.records = []
+        self._start = None
+
+    def on_train_begin(self, logs=None):
+        if self._start is None:
+            self._start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.images_seen += self.batch_size
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.records.append({
+            'epoch': len(self.records) + 1,
+            'images_seen': self.images_seen,
+            'seconds': round(time.perf_counter() - self._start, 2),
+            self.monitor: float((logs or {}).get(self.monitor, np.nan)),
+        })
+
+    def reached(self, target):
+        """Primer registro con monitor >= target (o None)"""
+        for record in self.records:
+            if record[self.monitor] >= target:
+                return record
+        return None
+
+def build_importance_sampler(train_seq, batch_size, uniform_floor=0.2, warmup_epochs=1,
+                             refresh_every=50, refresh_size=1024, seed=42):
+    """
+    SUSTITUYE LA SECUENCIA UNIFORME DE load_packed_data
+
+    Retorna:
+    --------
+    tuple: (ImportanceSampledSequence, LossRefreshCallback)
+    """
+    sampler = ImportanceSampledSequence(
+        train_seq.images, train_seq.labels, train_seq.num_classes, batch_size,
+        augment=train_seq.augmentation is not None, seed=seed,
+        uniform_floor=uniform_floor, warmup_epochs=warmup_epochs
+    )
+    return sampler, LossRefreshCallback(sampler, refresh_every, refresh_size, seed=seed)
+
+# ==============================================================================
+# COMPARACIÓN CONTRA MUESTREO UNIFORME
+# ==============================================================================
+def compare_to_uniform(base_model='MobileNetV2', packed_dir="../data_packed/fruits-360_100x100",
+                       epochs=8, batch_size=64, target_accuracy=0.94, uniform_floor=0.2,
+                       warmup_epochs=1, refresh_every=50, refresh_size=1024, seed=42,
+                       results_dir="training_results"):
+    """
+    TIEMPO-A-ACCURACY: IMPORTANCIA VS UNIFORME
+    ==========================================
+    Entrena la cabeza dos veces con la misma semilla e inicialización y
+    registra, por época, imágenes vistas, segundos y val_accuracy.
+
+    Retorna:
+    --------
+    dict: por modo, curva, época/imágenes/segundos hasta target_accuracy y
+          accuracy de test; más la reducción relativa de imágenes vistas
+    """
+    from transferLearning import create_transfer_learning_model
+
+    print("🎯 MUESTREO POR IMPORTANCIA VS UNIFORME")
+    print("=" * 50)
+    train_seq, val_seq, test_seq, _, num_classes = load_packed_data(
+        packed_dir, batch_size=batch_size, seed=seed)
+
+    results = {}
+    initial_weights = None
+    for mode in ('uniform', 'importance'):
+        tf.keras.utils.set_random_seed(seed)
+        model = create_transfer_learning_model(base_model, num_classes)
+        if initial_weights is None:
+            initial_weights = model.get_weights()
+        model.set_weights(initial_weights)
+
+        tracker = TimeToAccuracy(batch_size)
+        callbacks = [tracker]
+        train_data = train_seq
+        if mode == 'importance':
+            train_data, refresher = build_importance_sampler(
+                train_seq, batch_size, uniform_floor, warmup_epochs,
+                refresh_every, refresh_size, seed)
+            callbacks.append(refresher)
+        else:
+            train_seq.rng = np.random.default_rng(seed)
+
+        print(f"\n🚀 {mode}")
+        model.fit(train_data, epochs=epochs, validation_data=val_seq,
+                  callbacks=callbacks, verbose=2)
+        test_accuracy = float(model.evaluate(test_seq, verbose=0)[1])
+        hit = tracker.reached(target_accuracy)
+        results[mode] = {
+            'curve': tracker.records,
+            'reached': hit,
+            'test_accuracy': round(test_accuracy, 4),
+        }
+        if mode == 'importance':
+            results[mode]['sampler'] = train_data.summary()
+            results[mode]['refresh_seconds'] = round(refresher.seconds, 2)
+            results[mode]['refresh_images'] = refresher.scored
+
+    uniform_hit, importance_hit = results['uniform']['reached'], results['importance']['reached']
+    if uniform_hit and importance_hit:
+        results['images_saved_fraction'] = round(
+            1 - importance_hit['images_seen'] / uniform_hit['images_seen'], 4)
+        results['seconds_saved_fraction'] = round(
+            1 - importance_hit['seconds'] / uniform_hit['seconds'], 4)
+
+    print(f"\n{'Modo':<12} {'Época':>6} {'Imágenes':>10} {'Segundos':>9} {'Test acc':>9}"
+          f"   (objetivo val_accuracy ≥ {target_accuracy})")
+    for mode in ('uniform', 'importance'):
+        hit = results[mode]['reached']
+        if hit:
+            print(f"{mode:<12} {hit['epoch']:>6} {hit['images_seen']:>10} "
+                  f"{hit['seconds']:>9.1f} {results[mode]['test_accuracy']:>9.4f}")
+        else:
+            print(f"{mode:<12} {'no alcanzado':>27} {results[mode]['test_accuracy']:>9.4f}")
+    if 'images_saved_fraction' in results:
+        print(f"📉 {results['images_saved_fraction']:.0%} menos imágenes, "
+              f"{results['seconds_saved_fraction']:.0%} menos tiempo")
+
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir,
+                        f"importance_sampling_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump({'base_model': base_model, 'epochs': epochs, 'batch_size': batch_size,
+                   'target_accuracy': target_accuracy, 'uniform_floor': uniform_floor,
+                   'results': results}, f, indent=2)
+    print(f"💾 Resultados: {path}")
+    return results
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', type=str, default='MobileNetV2')
+    parser.add_argument('--packed_dir', type=str, default="../data_packed/fruits-360_100x100")
+    parser.add_argument('--epochs', type=int, default=8)
+    parser.add_argument('--batch_size', type=int, default=64)
+    parser.add_argument('--target_accuracy', type=float, default=0.94)
+    parser.add_argument('--uniform_floor', type=float, default=0.2)
+    parser.add_argument('--warmup_epochs', type=int, default=1)
+    parser.add_argument('--refresh_every', type=int, default=50)
+    parser.add_argument('--refresh_size', type=int, default=1024)
+
+    args = parser.parse_args()
+
+    compare_to_uniform(
+        base_model=args.model,
+        packed_dir=args.packed_dir,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        target_accuracy=args.target_accuracy,
+        uniform_floor=args.uniform_floor,
+        warmup_epochs=args.warmup_epochs,
+        refresh_every=args.refresh_every,
+        refresh_size=args.refresh_size
+    )
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+SERVIDOR DE INFERENCIA CON MICRO-BATCHING (CPU)
+===============================================
+Carga el modelo una sola vez y agrupa las peticiones concurrentes en
+micro-lotes respetando un presupuesto máximo de latencia.
+
+Endpoints:
+    POST /predict?k=5   cuerpo = bytes de la imagen (JPEG/PNG)
+    GET  /metrics       throughput y latencias p50/p99
+    GET  /health
+"""
+
+import os
+import json
+import time
+import asyncio
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from inference_utils import (load_class_names, preprocess_image_bytes,
+                             top_k_predictions, LatencyStats)
+
+def load_cpu_model(model_path, precision=None):
+    """Carga el modelo Keras forzando CPU (opcionalmente en mixed_bfloat16)"""
+    os.environ['CUDA_VISIBLE_DEVICES'] = '-1'
+    import tensorflow as tf
+    model = tf.keras.models.load_model(model_path, compile=False)
+    if precision and precision != 'float32':
+        from transferLearning import apply_precision
+        model = apply_precision(model, precision)
+
+    def predict(images):
+        return model(images, training=False).numpy()
+
+    return model, predict
+
+class MicroBatcher:
+    """
+    AGRUPA PETICIONES EN MICRO-LOTES
+    ================================
+    Un lote se cierra al llegar a max_batch_size o cuando vence el
+    presupuesto de latencia contado desde la primera petición del lote.
+    La inferencia corre en un único hilo; mientras tanto la cola se llena
+    y el siguiente lote sale más grande.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, max_latency_ms=10.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000.0
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batches = 0
+        self.batched_items = 0
+
+    async def submit(self, image):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((image, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_latency
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            images = np.stack([image for image, _ in batch])
+            try:
+                probabilities = await loop.run_in_executor(self.executor,
+                                                           self.predict_fn, images)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.batched_items += len(batch)
+            for (_, future), probs in zip(batch, probabilities):
+                if not future.done():
+                    future.set_result(probs)
+
+class InferenceServer:
+    """SERVIDOR HTTP/1.1 MÍNIMO SOBRE asyncio (keep-alive)"""
+
+    def __init__(self, predict_fn, class_names, target_size=(100, 100),
+                 max_batch_size=32, max_latency_ms=10.0, decode_workers=4):
+        self.class_names = class_names
+        self.target_size = target_size
+        self.batcher = MicroBatcher(predict_fn, max_batch_size, max_latency_ms)
+        self.decode_executor = ThreadPoolExecutor(max_workers=decode_workers)
+        self.stats = LatencyStats()
+        self.errors = 0
+
+    def metrics(self):
+        summary = self.stats.summary()
+        summary['errors'] = self.errors
+        summary['batches'] = self.batcher.batches
+        summary['avg_batch_size'] = round(
+            self.batcher.batched_items / self.batcher.batches, 2
+        ) if self.batcher.batches else 0.0
+        summary['queue_size'] = self.batcher.queue.qsize()
+        return summary
+
+    async def predict(self, body, k=5):
+        loop = asyncio.get_running_loop()
+        image = await loop.run_in_executor(self.decode_executor,
+                                           preprocess_image_bytes, body,
+                                           self.target_size)
+        probs = await self.batcher.submit(image)
+        return top_k_predictions(probs[np.newaxis], self.class_names, k)[0]
+
+    async def handle_request(self, method, target, body):
+        url = urlsplit(target)
+        if method == 'GET' and url.path == '/health':
+            return 200, {'status': 'ok'}
+        if method == 'GET' and url.path == '/metrics':
+            return 200, self.metrics()
+        if method == 'POST' and url.path == '/predict':
+            k = parse_qs(url.query).get('k', ['5'])[0]
+            if not k.isdigit() or int(k) < 1:
+                self.errors += 1
+                return 400, {'error': f"k debe ser un entero positivo: {k!r}"}
+            k = int(k)
+            start = time.perf_counter()
+            try:
+                predictions = await self.predict(body, k)
+            except Exception as e:
+                self.errors += 1
+                return 400, {'error': str(e)}
+            latency = time.perf_counter() - start
+            self.stats.record(latency)
+            return 200, {'predictions': predictions,
+                         'latency_ms': round(latency * 1000, 3)}
+        return 404, {'error': 'not found'}
+
+    @staticmethod
+    async def write_response(writer, status, payload, keep_alive):
+        data = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            .encode() + data
+        )
+        await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = headers.get('content-length', '0')
+                if not length.isdigit():
+                    # Sin longitud válida no se sabe dónde acaba el cuerpo: 400 y cerrar
+                    self.errors += 1
+                    await self.write_response(
+                        writer, 400, {'error': f"Content-Length inválido: {length!r}"},
+                        keep_alive=False)
+                    break
+                length = int(length)
+                body = await reader.readexactly(length) if length else b''
+
+                status, payload = await self.handle_request(method, target, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self.write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8000):
+        batcher_task = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"🚀 Servidor de inferencia en http://{host}:{port}")
+        print(f"   - Max batch: {self.batcher.max_batch_size}")
+        print(f"   - Max latencia de lote: {self.batcher.max_latency * 1000:.1f} ms")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher_task.cancel()
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', type=str, default='fruit360_transfer_learning.h5')
+    parser.add_argument('--classes', type=str, default='class_names.json')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max_batch_size', type=int, default=32)
+    parser.add_argument('--max_latency_ms', type=float, default=10.0)
+    parser.add_argument('--decode_workers', type=int, default=4)
+    parser.add_argument('--precision', type=str, default='float32',
+                        choices=['float32', 'mixed_bfloat16'])
+
+    args = parser.parse_args()
+
+    print("🍎 SERVIDOR DE INFERENCIA - FRUIT360")
+    print("=" * 50)
+    model, predict_fn = load_cpu_model(args.model, args.precision)
+    class_names = load_class_names(args.classes)
+    print(f"✅ Modelo cargado: {args.model} ({len(class_names)} clases)")
+
+    # Calentar el modelo para no pagar el trazado en la primera petición
+    input_shape = tuple(d or 100 for d in model.input_shape[1:3])
+    predict_fn(np.zeros((1,) + tuple(input_shape) + (3,), dtype=np.float32))
+
+    server = InferenceServer(predict_fn, class_names,
+                             target_size=tuple(input_shape),
+                             max_batch_size=args.max_batch_size,
+                             max_latency_ms=args.max_latency_ms,
+                             decode_workers=args.decode_workers)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n📊 Métricas finales:")
+        print(json.dumps(server.metrics(), indent=2))
@@ -0,0 +1,102 @@
+"""
+UTILIDADES DE INFERENCIA
+========================
+Funciones comunes a los caminos de predicción (servidor, predictores
+exportados, predicción por lotes): etiquetas, preprocesado y métricas
+de latencia. No importa TensorFlow.
+"""
+
+import io
+import json
+import time
+import threading
+from collections import deque
+import numpy as np
+
+def load_class_names(filename="class_names.json"):
+    """Carga los nombres de clases guardados por save_class_names"""
+    with open(filename) as f:
+        return json.load(f)
+
+def preprocess_image(image, target_size=(100, 100)):
+    """Convierte una imagen PIL al formato del modelo (float32 en [0, 1])"""
+    from PIL import Image
+    image = image.convert('RGB')
+    if image.size != (target_size[1], target_size[0]):
+        image = image.resize((target_size[1], target_size[0]), Image.NEAREST)
+    return np.asarray(image, dtype=np.float32) / 255.0
+
+def preprocess_image_bytes(data, target_size=(100, 100)):
+    """Decodifica bytes JPEG/PNG al formato del modelo"""
+    from PIL import Image
+    with Image.open(io.BytesIO(data)) as image:
+        return preprocess_image(image, target_size)
+
+def preprocess_image_file(path, target_size=(100, 100)):
+    """Lee un archivo de imagen al formato del modelo"""
+    from PIL import Image
+    with Image.open(path) as image:
+        return preprocess_image(image, target_size)
+
+def top_k_predictions(probabilities, class_names, k=5):
+    """
+    TOP-K ETIQUETAS POR FILA
+    ========================
+    Parámetros:
+    -----------
+    probabilities : np.ndarray
+        Salida softmax (batch, num_classes)
+    class_names : list
+        Nombres de clases en el orden de la salida del modelo
+    k : int
+        Número de etiquetas a devolver
+
+    Retorna:
+    --------
+    list: por cada fila, lista de {'label', 'probability'} ordenada
+    """
+    probabilities = np.asarray(probabilities)
+    k = min(k, probabilities.shape[1])
+    top = np.argpartition(-probabilities, k - 1, axis=1)[:, :k]
+    top_probs = np.take_along_axis(probabilities, top, axis=1)
+    order = np.argsort(-top_probs, axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    top_probs = np.take_along_axis(top_probs, order, axis=1)
+    return [
+        [{'label': class_names[i], 'probability': float(p)} for i, p in zip(row, row_probs)]
+        for row, row_probs in zip(top, top_probs)
+    ]
+
+class LatencyStats:
+    """
+    CONTADORES DE THROUGHPUT Y LATENCIA (p50/p99)
+    Mantiene una ventana de las últimas latencias; es thread-safe.
+    """
+
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        self.count = 0
+        self.start_time = time.time()
+        self.lock = threading.Lock()
+
+    def record(self, seconds, n=1):
+        with self.lock:
+            self.count += n
+            for _ in range(n):
+                self.latencies.append(seconds)
+
+    def percentile(self, q):
+        with self.lock:
+            if not self.latencies:
+                return 0.0
+            return float(np.percentile(np.fromiter(self.latencies, dtype=np.float64), q))
+
+    def summary(self):
+        elapsed = time.time() - self.start_time
+        return {
+            'count': self.count,
+            'elapsed_s': round(elapsed, 3),
+            'throughput_per_s': round(self.count / elapsed, 2) if elapsed > 0 else 0.0,
+            'p50_ms': round(self.percentile(50) * 1000, 3),
+            'p99_ms': round(self.percentile(99) * 1000, 3),
+        }
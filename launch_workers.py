@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+LANZADOR LOCAL DE WORKERS PARA ENTRENAMIENTO DISTRIBUIDO
+========================================================
+Genera TF_CONFIG para N workers y lanza un proceso de
+distributed_training.py por worker. En localhost sirve para probar el
+entrenamiento multi-worker en una sola máquina; con --hosts se imprime
+el TF_CONFIG de cada máquina para lanzarlo a mano en cada una.
+
+Uso:
+    python launch_workers.py --num_workers 2 -- --epochs 1 --batch_size 16
+"""
+
+import os
+import sys
+import json
+import socket
+import subprocess
+
+def free_port():
+    """Puerto TCP libre en localhost"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def build_tf_config(workers, index):
+    """TF_CONFIG para el worker `index` de la lista host:puerto"""
+    return json.dumps({
+        'cluster': {'worker': workers},
+        'task': {'type': 'worker', 'index': index},
+    })
+
+def launch_local_workers(num_workers=2, train_args=(), log_dir="worker_logs",
+                         threads_per_worker=None):
+    """
+    LANZA num_workers PROCESOS EN LOCALHOST
+
+    Retorna:
+    --------
+    list: códigos de salida de cada worker
+    """
+    workers = [f"localhost:{free_port()}" for _ in range(num_workers)]
+    os.makedirs(log_dir, exist_ok=True)
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "distributed_training.py")
+
+    print("🌐 LANZANDO WORKERS LOCALES")
+    print("=" * 50)
+    processes = []
+    for index in range(num_workers):
+        env = dict(os.environ)
+        env['TF_CONFIG'] = build_tf_config(workers, index)
+        env['CUDA_VISIBLE_DEVICES'] = '-1'
+        if threads_per_worker:
+            # Evitar sobre-suscripción de núcleos entre workers
+            env['TF_NUM_INTRAOP_THREADS'] = str(threads_per_worker)
+            env['OMP_NUM_THREADS'] = str(threads_per_worker)
+        log_path = os.path.join(log_dir, f"worker_{index}.log")
+        log_file = open(log_path, 'w')
+        processes.append((subprocess.Popen([sys.executable, script] + list(train_args),
+                                           env=env, stdout=log_file,
+                                           stderr=subprocess.STDOUT), log_file))
+        print(f"   🚀 Worker {index}: {workers[index]} → {log_path}")
+
+    codes = []
+    for process, log_file in processes:
+        codes.append(process.wait())
+        log_file.close()
+
+    for index, code in enumerate(codes):
+        status = "✅" if code == 0 else "❌"
+        print(f"   {status} Worker {index}: código {code}")
+    return codes
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    argv = sys.argv[1:]
+    train_args = []
+    if '--' in argv:
+        split = argv.index('--')
+        argv, train_args = argv[:split], argv[split + 1:]
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_workers', type=int, default=2)
+    parser.add_argument('--hosts', type=str, nargs='*',
+                        help='host:puerto de cada worker (multi-máquina)')
+    parser.add_argument('--log_dir', type=str, default='worker_logs')
+    parser.add_argument('--threads_per_worker', type=int, default=None)
+
+    args = parser.parse_args(argv)
+
+    if args.hosts:
+        print("🌐 TF_CONFIG por máquina (exportar antes de lanzar distributed_training.py):")
+        for index, host in enumerate(args.hosts):
+            print(f"\n# {host}")
+            print(f"export TF_CONFIG='{build_tf_config(args.hosts, index)}'")
+        sys.exit(0)
+
+    codes = launch_local_workers(args.num_workers, train_args, args.log_dir,
+                                 args.threads_per_worker)
+    sys.exit(max(codes) if codes else 0)
@@ -0,0 +1,111 @@
+"""
+PREDICTOR LIGERO PARA MODELOS EXPORTADOS (TFLite / ONNX)
+========================================================
+Ejecuta los artefactos generados por export_model.py sin cargar Keras.
+Para TFLite usa tflite_runtime si está instalado (si no, tf.lite); para
+ONNX usa onnxruntime en CPU. Los modelos cuantizados a enteros se
+cuantizan/decuantizan aquí con la escala y el zero point del artefacto.
+"""
+
+import os
+import numpy as np
+from inference_utils import load_class_names, top_k_predictions
+
+def _load_tflite_interpreter(model_path, num_threads=None):
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        from tensorflow.lite import Interpreter
+    return Interpreter(model_path=model_path, num_threads=num_threads)
+
+def _quantize(x, dtype, scale, zero_point):
+    if scale == 0:
+        return x.astype(dtype)
+    info = np.iinfo(dtype)
+    q = np.round(x / scale + zero_point)
+    return np.clip(q, info.min, info.max).astype(dtype)
+
+def _dequantize(q, scale, zero_point):
+    if scale == 0:
+        return q.astype(np.float32)
+    return (q.astype(np.float32) - zero_point) * scale
+
+class LitePredictor:
+    """
+    PREDICTOR SOBRE UN ARTEFACTO .tflite O .onnx
+
+    Parámetros:
+    -----------
+    model_path : str
+        Ruta al artefacto exportado
+    class_names : list
+        Etiquetas (por defecto se leen de class_names.json)
+    num_threads : int
+        Hilos de CPU para el intérprete
+    """
+
+    def __init__(self, model_path, class_names=None, num_threads=None):
+        self.model_path = model_path
+        self.class_names = class_names
+        if class_names is None and os.path.exists("class_names.json"):
+            self.class_names = load_class_names("class_names.json")
+
+        extension = os.path.splitext(model_path)[1].lower()
+        if extension == '.tflite':
+            self.backend = 'tflite'
+            self.interpreter = _load_tflite_interpreter(model_path, num_threads)
+            self.interpreter.allocate_tensors()
+            self.input_detail = self.interpreter.get_input_details()[0]
+            self.output_detail = self.interpreter.get_output_details()[0]
+            self.batch_size = int(self.input_detail['shape'][0])
+            self.input_shape = tuple(int(d) for d in self.input_detail['shape'][1:3])
+        elif extension == '.onnx':
+            import onnxruntime as ort
+            self.backend = 'onnx'
+            options = ort.SessionOptions()
+            if num_threads:
+                options.intra_op_num_threads = num_threads
+            self.session = ort.InferenceSession(model_path, options,
+                                                providers=['CPUExecutionProvider'])
+            self.input_name = self.session.get_inputs()[0].name
+            shape = self.session.get_inputs()[0].shape
+            self.input_shape = tuple(d if isinstance(d, int) else 100 for d in shape[1:3])
+        else:
+            raise ValueError(f"❌ Formato no soportado: {extension}")
+
+    def _predict_tflite(self, images):
+        if images.shape[0] != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input_detail['index'], images.shape)
+            self.interpreter.allocate_tensors()
+            self.input_detail = self.interpreter.get_input_details()[0]
+            self.output_detail = self.interpreter.get_output_details()[0]
+            self.batch_size = images.shape[0]
+
+        input_dtype = self.input_detail['dtype']
+        if np.issubdtype(input_dtype, np.integer):
+            scale, zero_point = self.input_detail['quantization']
+            images = _quantize(images, input_dtype, scale, zero_point)
+        else:
+            images = images.astype(input_dtype)
+
+        self.interpreter.set_tensor(self.input_detail['index'], images)
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self.output_detail['index'])
+
+        if np.issubdtype(output.dtype, np.integer):
+            scale, zero_point = self.output_detail['quantization']
+            output = _dequantize(output, scale, zero_point)
+        return output
+
+    def predict(self, images):
+        """Probabilidades (batch, num_classes) para imágenes float32 en [0, 1]"""
+        images = np.asarray(images, dtype=np.float32)
+        if images.ndim == 3:
+            images = images[np.newaxis]
+        if self.backend == 'tflite':
+            return self._predict_tflite(images)
+        return self.session.run(None, {self.input_name: images})[0]
+
+    def predict_top_k(self, images, k=5):
+        """Top-k etiquetas por imagen"""
+        return top_k_predictions(self.predict(images), self.class_names, k)
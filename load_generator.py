@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+GENERADOR DE CARGA PARA inference_server.py
+===========================================
+Lanza N clientes concurrentes (conexiones keep-alive) que envían imágenes
+a /predict y mide throughput y latencias p50/p99 del lado del cliente.
+"""
+
+import io
+import json
+import time
+import asyncio
+import numpy as np
+
+def synthetic_jpeg(size=(100, 100), seed=0):
+    """Imagen JPEG aleatoria con la forma de Fruit360"""
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    array = rng.integers(0, 256, size=(size[0], size[1], 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(array).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+async def _request(reader, writer, host, method, path, body=b''):
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\n"
+        f"Host: {host}\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value.strip())
+    payload = await reader.readexactly(length)
+    return status, json.loads(payload)
+
+async def _client(host, port, payloads, num_requests, latencies, errors, k):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(num_requests):
+            body = payloads[i % len(payloads)]
+            start = time.perf_counter()
+            status, _ = await _request(reader, writer, host, 'POST', f'/predict?k={k}', body)
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors.append(status)
+    finally:
+        writer.close()
+
+async def run_load(host='127.0.0.1', port=8000, concurrency=16, total_requests=1000,
+                   payloads=None, k=5):
+    """
+    EJECUTA LA PRUEBA DE CARGA
+
+    Retorna:
+    --------
+    dict: resultados del cliente y métricas del servidor
+    """
+    payloads = payloads or [synthetic_jpeg(seed=i) for i in range(32)]
+    per_client = [total_requests // concurrency] * concurrency
+    for i in range(total_requests % concurrency):
+        per_client[i] += 1
+
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _client(host, port, payloads, n, latencies, errors, k) for n in per_client if n
+    ])
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, server_metrics = await _request(reader, writer, host, 'GET', '/metrics')
+    writer.close()
+
+    lat = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_per_s': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(float(np.percentile(lat, 50)), 3),
+        'p99_ms': round(float(np.percentile(lat, 99)), 3),
+        'server': server_metrics,
+    }
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--image', type=str, nargs='*',
+                        help='Imágenes a enviar (por defecto, JPEGs sintéticos)')
+    parser.add_argument('--k', type=int, default=5)
+
+    args = parser.parse_args()
+
+    payloads = None
+    if args.image:
+        payloads = []
+        for path in args.image:
+            with open(path, 'rb') as f:
+                payloads.append(f.read())
+
+    print("⚡ GENERADOR DE CARGA - FRUIT360")
+    print(f"   - Concurrencia: {args.concurrency}")
+    print(f"   - Peticiones: {args.requests}")
+
+    results = asyncio.run(run_load(args.host, args.port, args.concurrency,
+                                   args.requests, payloads, args.k))
+
+    print(f"\n📊 Resultados:")
+    print(f"   - Throughput: {results['throughput_per_s']} img/s")
+    print(f"   - Latencia p50: {results['p50_ms']} ms")
+    print(f"   - Latencia p99: {results['p99_ms']} ms")
+    print(f"   - Errores: {results['errors']}")
+    print(f"   - Lote medio (servidor): {results['server'].get('avg_batch_size')}")
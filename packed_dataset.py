@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+EMPAQUETADO DE FRUIT360 EN TENSORES uint8 (MEMMAP)
+==================================================
+Decodifica todas las imágenes UNA sola vez y las guarda como un único
+array contiguo N×H×W×3 en formato .npy. El entrenamiento y la evaluación
+lo leen con np.memmap (sin copias ni decodificación por archivo), y varios
+procesos en la misma máquina comparten la page cache.
+"""
+
+import os
+import json
+import time
+import hashlib
+import numpy as np
+import tensorflow as tf
+from concurrent.futures import ThreadPoolExecutor
+from preprocess_data import list_image_files, make_train_val_split
+
+PACKED_SPLITS = ('train', 'val', 'test')
+MANIFEST_NAME = "manifest.json"
+
+def compute_manifest_hash(paths, root):
+    """Hash del listado del dataset (ruta relativa, tamaño y mtime)"""
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        rel_path = os.path.relpath(path, root)
+        digest.update(f"{rel_path}|{stat.st_size}|{int(stat.st_mtime)}\n".encode())
+    return digest.hexdigest()
+
+def load_image_uint8(path, target_size=(100, 100)):
+    """Decodifica una imagen a uint8 (alto, ancho, 3)"""
+    from PIL import Image
+    with Image.open(path) as img:
+        img = img.convert('RGB')
+        if img.size != (target_size[1], target_size[0]):
+            # Misma interpolación por defecto que load_img de Keras
+            img = img.resize((target_size[1], target_size[0]), Image.NEAREST)
+        return np.asarray(img, dtype=np.uint8)
+
+def _write_split(output_dir, split, paths, labels, target_size, num_workers):
+    """Escribe imágenes y etiquetas de un split en disco"""
+    images_path = os.path.join(output_dir, f"images_{split}.npy")
+    labels_path = os.path.join(output_dir, f"labels_{split}.npy")
+
+    images = np.lib.format.open_memmap(
+        images_path, mode='w+', dtype=np.uint8,
+        shape=(len(paths), target_size[0], target_size[1], 3)
+    )
+
+    def _decode(i):
+        images[i] = load_image_uint8(paths[i], target_size)
+
+    # PIL libera el GIL al decodificar, así que los hilos escalan bien
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        for _ in executor.map(_decode, range(len(paths)), chunksize=256):
+            pass
+
+    images.flush()
+    del images
+    np.save(labels_path, np.asarray(labels, dtype=np.int32))
+
+    with open(os.path.join(output_dir, f"paths_{split}.txt"), 'w') as f:
+        f.write("\n".join(paths))
+
+    return {
+        'count': len(paths),
+        'images': os.path.basename(images_path),
+        'labels': os.path.basename(labels_path),
+    }
+
+def pack_fruit360_data(data_dir="../data_raw/fruits-360_100x100/fruits-360",
+                       output_dir="../data_packed/fruits-360_100x100",
+                       target_size=(100, 100),
+                       validation_split=0.2,
+                       num_workers=None,
+                       overwrite=False,
+                       dedup=False,
+                       max_per_cluster=None):
+    """
+    EMPAQUETA EL DATASET EN ARRAYS uint8 (PASO ÚNICO)
+    ==================================================
+    Usa el mismo split 80/20 y el mismo orden de clases que
+    preprocess_fruit360_data.
+
+    Parámetros:
+    -----------
+    data_dir : str
+        Directorio base del dataset (contiene Training/ y Test/)
+    output_dir : str
+        Directorio donde se escriben images_*.npy, labels_*.npy y manifest.json
+    target_size : tuple
+        Tamaño (alto, ancho) de las imágenes empaquetadas
+    validation_split : float
+        Proporción de Training/ que va a validación
+    num_workers : int
+        Hilos de decodificación (None = automático)
+    overwrite : bool
+        Reempaquetar aunque el manifest coincida
+    dedup : bool
+        Split por clusters de casi-duplicados (ver dedup.py)
+    max_per_cluster : int
+        Con dedup, máximo de imágenes de train por cluster
+
+    Retorna:
+    --------
+    dict: manifest del dataset empaquetado
+    """
+    print("📦 EMPAQUETANDO DATASET EN MEMMAP uint8")
+    print("=" * 50)
+
+    train_dir = os.path.join(data_dir, "Training")
+    test_dir = os.path.join(data_dir, "Test")
+    if not os.path.exists(train_dir) or not os.path.exists(test_dir):
+        raise ValueError("❌ No se encontraron los directorios Training/Test")
+
+    class_names = sorted([d for d in os.listdir(train_dir)
+                         if os.path.isdir(os.path.join(train_dir, d))])
+
+    paths, labels = list_image_files(train_dir, class_names)
+    test_paths, test_labels = list_image_files(test_dir, class_names)
+
+    content_hash = compute_manifest_hash(paths + test_paths, data_dir)
+    # El hash del manifest identifica contenido + forma de empaquetar/separar
+    manifest_hash = hashlib.sha1(
+        f"{content_hash}|{tuple(target_size)}|{validation_split}|{dedup}|{max_per_cluster}".encode()
+    ).hexdigest()
+
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    if os.path.exists(manifest_path) and not overwrite:
+        with open(manifest_path) as f:
+            existing = json.load(f)
+        if (existing.get('manifest_hash') == manifest_hash
+                and existing.get('target_size') == list(target_size)
+                and existing.get('validation_split') == validation_split
+                and existing.get('dedup', False) == dedup
+                and existing.get('max_per_cluster') == max_per_cluster):
+            print(f"✅ Dataset ya empaquetado en: {output_dir}")
+            return existing
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    (train_paths, train_labels), (val_paths, val_labels) = make_train_val_split(
+        paths, labels, validation_split, dedup, max_per_cluster,
+        cache_path=os.path.join(data_dir, ".dhash_cache.npz")
+    )
+
+    splits = {
+        'train': (train_paths, train_labels),
+        'val': (val_paths, val_labels),
+        'test': (test_paths, test_labels),
+    }
+
+    start = time.time()
+    split_info = {}
+    for split, (split_paths, split_labels) in splits.items():
+        print(f"   ⏳ {split}: {len(split_paths)} imágenes...")
+        split_info[split] = _write_split(output_dir, split, split_paths,
+                                         split_labels, target_size, num_workers)
+
+    manifest = {
+        'data_dir': os.path.abspath(data_dir),
+        'class_names': class_names,
+        'num_classes': len(class_names),
+        'target_size': list(target_size),
+        'validation_split': validation_split,
+        'dedup': dedup,
+        'max_per_cluster': max_per_cluster,
+        'content_hash': content_hash,
+        'manifest_hash': manifest_hash,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'splits': split_info,
+    }
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"✅ Empaquetado completado en {time.time() - start:.1f}s")
+    print(f"   📁 {output_dir}")
+    return manifest
+
+def load_manifest(packed_dir):
+    """Lee el manifest de un dataset empaquetado"""
+    manifest_path = os.path.join(packed_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        raise ValueError(f"❌ No hay dataset empaquetado en: {packed_dir}")
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def load_packed_split(packed_dir, split):
+    """
+    ABRE UN SPLIT EMPAQUETADO SIN COPIAS
+
+    Retorna:
+    --------
+    tuple: (images, labels) con images como np.memmap de solo lectura
+    """
+    if split not in PACKED_SPLITS:
+        raise ValueError(f"❌ Split no válido: {split}")
+    manifest = load_manifest(packed_dir)
+    info = manifest['splits'][split]
+    images = np.load(os.path.join(packed_dir, info['images']), mmap_mode='r')
+    labels = np.load(os.path.join(packed_dir, info['labels']))
+    return images, labels
+
+class PackedSequence(tf.keras.utils.Sequence):
+    """
+    SECUENCIA DE KERAS SOBRE UN SPLIT EMPAQUETADO
+    Lee lotes directamente del memmap y los normaliza a [0, 1]
+    """
+
+    def __init__(self, images, labels, num_classes, batch_size=32,
+                 shuffle=False, augment=False, seed=42):
+        super().__init__()
+        self.images = images
+        self.labels = labels
+        self.num_classes = num_classes
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+        self.indices = np.arange(len(labels))
+        self.augmentation = None
+        if augment:
+            from preprocess_data import build_augmentation_layers
+            self.augmentation = build_augmentation_layers(seed)
+        if shuffle:
+            self.rng.shuffle(self.indices)
+
+    @property
+    def samples(self):
+        return len(self.labels)
+
+    def __len__(self):
+        return int(np.ceil(len(self.indices) / self.batch_size))
+
+    def __getitem__(self, index):
+        batch_idx = self.indices[index * self.batch_size:(index + 1) * self.batch_size]
+        # Índices ordenados = lecturas más secuenciales en el memmap
+        batch_idx = np.sort(batch_idx)
+        x = self.images[batch_idx].astype(np.float32) / 255.0
+        y = np.eye(self.num_classes, dtype=np.float32)[self.labels[batch_idx]]
+        if self.augmentation is not None:
+            x = self.augmentation(x, training=True).numpy()
+        return x, y
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.indices)
+
+def load_packed_data(packed_dir="../data_packed/fruits-360_100x100",
+                     batch_size=32, augment_training=True, seed=42,
+                     target_size=None, validation_split=None):
+    """
+    CARGA TRAIN/VAL/TEST DESDE EL DATASET EMPAQUETADO
+    Tamaño y split se fijaron al empaquetar: si se piden target_size o
+    validation_split distintos de los del manifest se lanza un error (None
+    acepta los empaquetados; redimensionar queda a cargo del llamador).
+
+    Retorna:
+    --------
+    tuple: (train_seq, val_seq, test_seq, class_names, num_classes)
+    """
+    manifest = load_manifest(packed_dir)
+    if target_size is not None and list(target_size) != manifest['target_size']:
+        raise ValueError(f"❌ {packed_dir} está empaquetado a {tuple(manifest['target_size'])}, "
+                         f"no a {tuple(target_size)}: vuelve a empaquetar o usa otro backend")
+    if validation_split is not None and validation_split != manifest['validation_split']:
+        raise ValueError(f"❌ {packed_dir} está empaquetado con validation_split="
+                         f"{manifest['validation_split']}, no {validation_split}")
+    class_names = manifest['class_names']
+    num_classes = manifest['num_classes']
+
+    train_images, train_labels = load_packed_split(packed_dir, 'train')
+    val_images, val_labels = load_packed_split(packed_dir, 'val')
+    test_images, test_labels = load_packed_split(packed_dir, 'test')
+
+    train_seq = PackedSequence(train_images, train_labels, num_classes, batch_size,
+                               shuffle=True, augment=augment_training, seed=seed)
+    val_seq = PackedSequence(val_images, val_labels, num_classes, batch_size)
+    test_seq = PackedSequence(test_images, test_labels, num_classes, batch_size)
+
+    print(f"\n✅ Dataset empaquetado cargado (memmap): {packed_dir}")
+    print(f"   - Ejemplos de entrenamiento: {train_seq.samples}")
+    print(f"   - Ejemplos de validación: {val_seq.samples}")
+    print(f"   - Ejemplos de prueba: {test_seq.samples}")
+
+    return train_seq, val_seq, test_seq, class_names, num_classes
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data_dir', type=str, default="../data_raw/fruits-360_100x100/fruits-360")
+    parser.add_argument('--output_dir', type=str, default="../data_packed/fruits-360_100x100")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--overwrite', action='store_true')
+    parser.add_argument('--dedup', action='store_true',
+                        help='Split por clusters de casi-duplicados')
+    parser.add_argument('--max_per_cluster', type=int, default=None)
+
+    args = parser.parse_args()
+
+    pack_fruit360_data(
+        data_dir=args.data_dir,
+        output_dir=args.output_dir,
+        num_workers=args.workers,
+        overwrite=args.overwrite,
+        dedup=args.dedup,
+        max_per_cluster=args.max_per_cluster
+    )
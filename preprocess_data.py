@@ -6,14 +6,26 @@ Versión corregida que evita contaminación entre train/validation
 
 import os
 import numpy as np
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
 import json
+from dataset_index import get_dataset_index
+
+# TensorFlow se importa dentro de las funciones que lo usan: listar
+# archivos, separar splits o guardar class_names.json no lo necesitan.
+
+# Mismas extensiones que acepta flow_from_directory
+IMAGE_EXTENSIONS = ('png', 'jpg', 'jpeg', 'bmp', 'ppm', 'tif', 'tiff')
 
 def preprocess_fruit360_data(data_dir="../data_raw/fruits-360_100x100/fruits-360", 
                             target_size=(100, 100), 
                             validation_split=0.2,
                             batch_size=32,
-                            augment_training=True):
+                            augment_training=True,
+                            backend='keras',
+                            seed=42,
+                            packed_dir="../data_packed/fruits-360_100x100",
+                            dedup=False,
+                            max_per_cluster=None,
+                            shard_dir="../data_shards/fruits-360_original-size"):
     """
     PREPROCESAMIENTO CORREGIDO - EVITA DATA LEAKAGE
     ================================================
@@ -24,13 +36,30 @@ def preprocess_fruit360_data(data_dir="../data_raw/fruits-360_100x100/fruits-360
     data_dir : str
         Directorio base del dataset (contiene Training/ y Test/)
     target_size : tuple
-        Tamaño al que se redimensionarán las imágenes (alto, ancho)
+        Tamaño al que se redimensionarán las imágenes (alto, ancho). Con
+        'packed' debe coincidir con el empaquetado (None lo acepta tal cual)
     validation_split : float
         Proporción de datos de entrenamiento para validation (0.2 = 20%)
     batch_size : int
         Tamaño del lote para generadores
     augment_training : bool
         Si aplicar aumento de datos para entrenamiento
+    backend : str
+        'keras' (ImageDataGenerator, por defecto), 'tfdata' (tf.data.Dataset
+        con decodificación paralela y aumento vectorizado por lotes),
+        'packed' (arrays uint8 en memmap creados con packed_dataset.py) o
+        'tfrecord' (shards TFRecord en streaming, ver tfrecord_shards.py)
+    seed : int
+        Semilla para el barajado y el aumento de datos
+    packed_dir : str
+        Directorio del dataset empaquetado (solo backend='packed')
+    dedup : bool
+        Split por clusters de casi-duplicados (dedup.py) en vez del 80/20
+        por archivo. Solo backend='tfdata'; para 'packed' se elige al empaquetar
+    max_per_cluster : int
+        Con dedup, máximo de imágenes de train por cluster
+    shard_dir : str
+        Directorio de shards TFRecord (solo backend='tfrecord')
     
     Retorna:
     --------
@@ -40,6 +69,19 @@ def preprocess_fruit360_data(data_dir="../data_raw/fruits-360_100x100/fruits-360
     print("🍎 PREPROCESAMIENTO CORREGIDO - SIN DATA LEAKAGE")
     print("=" * 50)
     
+    if backend == 'packed':
+        # Las imágenes ya están decodificadas: no hace falta el árbol original
+        from packed_dataset import load_packed_data
+        return load_packed_data(packed_dir, batch_size=batch_size,
+                                augment_training=augment_training, seed=seed,
+                                target_size=target_size, validation_split=validation_split)
+    
+    if backend == 'tfrecord':
+        # El split se fijó al escribir los shards
+        from tfrecord_shards import load_shard_data
+        return load_shard_data(shard_dir, batch_size=batch_size, target_size=target_size,
+                               augment_training=augment_training, seed=seed)
+    
     # ==========================================================================
     # 1. VERIFICACIÓN DE DIRECTORIOS
     # ==========================================================================
@@ -65,6 +107,26 @@ def preprocess_fruit360_data(data_dir="../data_raw/fruits-360_100x100/fruits-360
     print(f"   - Tamaño de imagen: {target_size}")
     print(f"   - Batch size: {batch_size}")
     print(f"   - Validation split: {validation_split}")
+    print(f"   - Backend: {backend}")
+    
+    if backend == 'tfdata':
+        train_ds, val_ds, test_ds = build_tfdata_datasets(
+            train_dir, test_dir, class_names,
+            target_size=target_size,
+            validation_split=validation_split,
+            batch_size=batch_size,
+            augment_training=augment_training,
+            seed=seed,
+            dedup=dedup,
+            max_per_cluster=max_per_cluster
+        )
+        return train_ds, val_ds, test_ds, class_names, num_classes
+    elif backend != 'keras':
+        raise ValueError(f"❌ Backend no soportado: {backend}")
+    elif dedup:
+        raise ValueError("❌ dedup requiere backend='tfdata' o 'packed'")
+    
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
     
     # ==========================================================================
     # 3. GENERADOR PARA TRAIN/VALIDATION (MISMO DIRECTORIO, SUBSETS DIFERENTES)
@@ -138,11 +200,12 @@ def preprocess_fruit360_data(data_dir="../data_raw/fruits-360_100x100/fruits-360
     
     # Verificación crítica contra data leakage
     total_train_val = train_generator.samples + val_generator.samples
+    train_files = get_dataset_index(data_dir).count_files("Training")
     print(f"   - Total train+val: {total_train_val}")
-    print(f"   - Imágenes en directorio Training: {sum([len(files) for r, d, files in os.walk(train_dir)])}")
+    print(f"   - Imágenes en directorio Training: {train_files}")
     
     # Verificar que no hay solapamiento
-    if train_generator.samples + val_generator.samples > sum([len(files) for r, d, files in os.walk(train_dir)]):
+    if train_generator.samples + val_generator.samples > train_files:
         print("⚠️  ADVERTENCIA: Posible data leakage detectado!")
     else:
         print("✅ Integridad de datos verificada")
@@ -154,6 +217,163 @@ def preprocess_fruit360_data(data_dir="../data_raw/fruits-360_100x100/fruits-360
     
     return train_generator, val_generator, test_generator, class_names, num_classes
 
+def list_image_files(directory, class_names):
+    """
+    LISTA LAS IMÁGENES DE UN DIRECTORIO POR CLASE
+    Recorre los archivos en el mismo orden que flow_from_directory
+    (clases en el orden dado, archivos ordenados alfabéticamente)
+    
+    Retorna:
+    --------
+    tuple: (paths, labels) con labels como índices de class_names
+    """
+    paths, labels = [], []
+    for class_index, class_name in enumerate(class_names):
+        class_dir = os.path.join(directory, class_name)
+        if not os.path.isdir(class_dir):
+            continue
+        for root, _, files in sorted(os.walk(class_dir), key=lambda x: x[0]):
+            for fname in sorted(files):
+                if fname.lower().endswith(IMAGE_EXTENSIONS):
+                    paths.append(os.path.join(root, fname))
+                    labels.append(class_index)
+    return paths, labels
+
+def split_train_val(paths, labels, validation_split=0.2):
+    """
+    SEPARA TRAIN/VALIDATION IGUAL QUE ImageDataGenerator
+    Por cada clase, el primer `validation_split` de los archivos (ordenados)
+    va a validación y el resto a entrenamiento.
+    
+    Retorna:
+    --------
+    tuple: ((train_paths, train_labels), (val_paths, val_labels))
+    """
+    by_class = {}
+    for path, label in zip(paths, labels):
+        by_class.setdefault(label, []).append(path)
+    
+    train_paths, train_labels, val_paths, val_labels = [], [], [], []
+    for label in sorted(by_class):
+        class_paths = by_class[label]
+        split = int(validation_split * len(class_paths))
+        val_paths.extend(class_paths[:split])
+        val_labels.extend([label] * split)
+        train_paths.extend(class_paths[split:])
+        train_labels.extend([label] * (len(class_paths) - split))
+    return (train_paths, train_labels), (val_paths, val_labels)
+
+def make_train_val_split(paths, labels, validation_split=0.2, dedup=False,
+                         max_per_cluster=None, seed=42, cache_path=None):
+    """
+    SPLIT TRAIN/VALIDATION: 80/20 POR ARCHIVO O POR CLUSTERS (dedup.py)
+    
+    Retorna:
+    --------
+    tuple: ((train_paths, train_labels), (val_paths, val_labels))
+    """
+    if not dedup:
+        return split_train_val(paths, labels, validation_split)
+    from dedup import dedup_split
+    train, val, _ = dedup_split(paths, labels, validation_split,
+                                max_per_cluster=max_per_cluster, seed=seed,
+                                cache_path=cache_path)
+    return train, val
+
+def build_augmentation_layers(seed=42):
+    """
+    AUMENTO DE DATOS VECTORIZADO (POR LOTES)
+    Aproxima la configuración de ImageDataGenerator con capas de Keras.
+    El shear no tiene equivalente y el brillo es aditivo en vez de
+    multiplicativo.
+    """
+    import tensorflow as tf
+    from tensorflow.keras import layers
+    return tf.keras.Sequential([
+        layers.RandomRotation(30 / 360, fill_mode='nearest', seed=seed),
+        layers.RandomTranslation(0.2, 0.2, fill_mode='nearest', seed=seed + 1),
+        layers.RandomZoom(0.2, fill_mode='nearest', seed=seed + 2),
+        layers.RandomFlip('horizontal', seed=seed + 3),
+        layers.RandomBrightness(0.2, value_range=(0.0, 1.0), seed=seed + 4),
+    ], name='fruit360_augmentation')
+
+def decode_image(path, target_size=(100, 100)):
+    """Lee, decodifica y redimensiona una imagen (valores en [0, 1])"""
+    import tensorflow as tf
+    image = tf.io.decode_image(tf.io.read_file(path), channels=3,
+                               expand_animations=False)
+    image = tf.image.resize(image, target_size, method='nearest')
+    return tf.cast(image, tf.float32) / 255.0
+
+def make_image_dataset(paths, labels, num_classes, target_size=(100, 100),
+                       batch_size=32, shuffle=False, augment=False, seed=42):
+    """
+    CONSTRUYE UN tf.data.Dataset A PARTIR DE UNA LISTA DE ARCHIVOS
+    Decodificación JPEG en paralelo, aumento por lotes y prefetch(AUTOTUNE)
+    """
+    import tensorflow as tf
+    autotune = tf.data.AUTOTUNE
+    
+    ds = tf.data.Dataset.from_tensor_slices((list(paths), list(labels)))
+    if shuffle:
+        ds = ds.shuffle(len(paths), seed=seed, reshuffle_each_iteration=True)
+    
+    def _load(path, label):
+        return decode_image(path, target_size), tf.one_hot(label, num_classes)
+    
+    ds = ds.map(_load, num_parallel_calls=autotune)
+    ds = ds.batch(batch_size)
+    
+    if augment:
+        augmentation = build_augmentation_layers(seed)
+        # Sin num_parallel_calls: el generador aleatorio de las capas se
+        # consume en orden y el resultado es reproducible con la semilla.
+        ds = ds.map(lambda x, y: (augmentation(x, training=True), y))
+    
+    options = tf.data.Options()
+    options.deterministic = True
+    ds = ds.with_options(options)
+    
+    return ds.prefetch(autotune)
+
+def build_tfdata_datasets(train_dir, test_dir, class_names, target_size=(100, 100),
+                          validation_split=0.2, batch_size=32,
+                          augment_training=True, seed=42, dedup=False,
+                          max_per_cluster=None):
+    """
+    BACKEND tf.data PARA preprocess_fruit360_data
+    Mismo split 80/20 y mismo orden de clases que flow_from_directory
+    
+    Retorna:
+    --------
+    tuple: (train_ds, val_ds, test_ds)
+    """
+    num_classes = len(class_names)
+    
+    paths, labels = list_image_files(train_dir, class_names)
+    (train_paths, train_labels), (val_paths, val_labels) = make_train_val_split(
+        paths, labels, validation_split, dedup, max_per_cluster, seed,
+        cache_path=os.path.join(os.path.dirname(train_dir), ".dhash_cache.npz")
+    )
+    test_paths, test_labels = list_image_files(test_dir, class_names)
+    
+    print("   - Aumento de datos: " + ("✅ ACTIVADO" if augment_training else "❌ DESACTIVADO"))
+    
+    train_ds = make_image_dataset(train_paths, train_labels, num_classes,
+                                  target_size, batch_size, shuffle=True,
+                                  augment=augment_training, seed=seed)
+    val_ds = make_image_dataset(val_paths, val_labels, num_classes,
+                                target_size, batch_size, seed=seed)
+    test_ds = make_image_dataset(test_paths, test_labels, num_classes,
+                                 target_size, batch_size, seed=seed)
+    
+    print(f"\n✅ Preprocesamiento completado (tf.data):")
+    print(f"   - Ejemplos de entrenamiento: {len(train_paths)}")
+    print(f"   - Ejemplos de validación: {len(val_paths)}")
+    print(f"   - Ejemplos de prueba: {len(test_paths)}")
+    
+    return train_ds, val_ds, test_ds
+
 def verify_data_integrity(train_gen, val_gen, test_gen):
     """
     VERIFICACIÓN EXTRA DE INTEGRIDAD DE DATOS
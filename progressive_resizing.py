@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+ENTRENAMIENTO CON RESOLUCIÓN PROGRESIVA
+=======================================
+Las primeras épocas entrenan a menor resolución (64x64 cuesta ~2.4x
+menos FLOPs en el modelo base que 100x100) y las últimas suben hasta la
+resolución final. El modelo se crea con entrada (None, None, 3): el
+GlobalAveragePooling de la cabeza lo hace independiente del tamaño, así
+que cambiar de etapa solo retraza el paso de entrenamiento, sin
+reconstruir el modelo.
+
+Por etapa se prepara la entrada a su tamaño:
+    - packed: se redimensiona cada lote del memmap (ResizedSequence)
+    - keras / tfdata / tfrecord: se vuelve a crear el pipeline con
+      target_size de la etapa, de modo que con fruits-360_original-size
+      se decodifica directamente a la resolución de la etapa (también
+      por encima de 100x100)
+
+La validación y el test van siempre a la resolución final.
+
+Uso:
+    python progressive_resizing.py --schedule 64:3,100:3 --backend packed
+    python progressive_resizing.py --schedule 64:2,100:2,160:2 --backend tfdata \\
+        --data_dir ../data_raw/fruits-360_original-size/fruits-360
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+import tensorflow as tf
+from experiment_store import RunHistory
+
+def parse_schedule(spec):
+    """
+    Convierte "64:3,100:5" en ((64, 3), (100, 5)): (lado en píxeles, épocas).
+    """
+    schedule = []
+    for item in spec.split(','):
+        size, epochs = item.split(':')
+        schedule.append((int(size), int(epochs)))
+    if not schedule:
+        raise ValueError("❌ Calendario de resolución vacío")
+    return tuple(schedule)
+
+def relative_flops(size, reference=100):
+    """FLOPs de una red convolucional a size×size respecto a reference×reference"""
+    return (size / reference) ** 2
+
+class ResizedSequence(tf.keras.utils.Sequence):
+    """
+    REDIMENSIONA LOS LOTES DE OTRA SECUENCIA (p. ej. PackedSequence)
+    Conserva etiquetas y sample_weight; bilineal con antialias al reducir.
+    """
+
+    def __init__(self, sequence, size):
+        super().__init__()
+        self.sequence = sequence
+        self.size = (int(size), int(size))
+
+    def __len__(self):
+        return len(self.sequence)
+
+    def __getitem__(self, index):
+        batch = self.sequence[index]
+        x = tf.image.resize(batch[0], self.size, method='bilinear', antialias=True).numpy()
+        return (x,) + tuple(batch[1:])
+
+    def on_epoch_end(self):
+        self.sequence.on_epoch_end()
+
+def _packed_size(data):
+    images = getattr(data, 'images', None)
+    return tuple(images.shape[1:3]) if images is not None else None
+
+def _steps_per_epoch(data):
+    """Lotes por época (None si el dataset no tiene longitud conocida)"""
+    try:
+        steps = len(data)
+    except TypeError:
+        return None
+    return steps if steps > 0 else None
+
+def make_stage_loader(train_data, backend, batch_size, preprocess_kwargs=None, initial=None):
+    """
+    FUNCIÓN tamaño → datos de entrenamiento a ese tamaño
+
+    Parámetros:
+    -----------
+    train_data : Sequence o tf.data.Dataset
+        Entrenamiento ya cargado (a la resolución final)
+    backend : str
+        Backend de preprocess_fruit360_data
+    preprocess_kwargs : dict
+        Argumentos para volver a llamar a preprocess_fruit360_data
+        (data_dir, packed_dir, shard_dir, ...) con otro target_size
+    initial : dict
+        {tamaño: datos} ya cargados, para no volver a llamar a
+        preprocess_fruit360_data con ese tamaño
+    """
+    cache = dict(initial or {})
+
+    def stage_data(size):
+        if size in cache:
+            return cache[size]
+        if backend == 'packed':
+            stored = _packed_size(train_data)
+            data = train_data if stored == (size, size) else ResizedSequence(train_data, size)
+            if stored and size > stored[0]:
+                print(f"⚠️  {size}px > {stored[0]}px empaquetados: se interpola hacia arriba "
+                      f"(para más resolución usa fruits-360_original-size con tfdata/tfrecord)")
+        else:
+            from preprocess_data import preprocess_fruit360_data
+            data = preprocess_fruit360_data(target_size=(size, size), batch_size=batch_size,
+                                            backend=backend, **(preprocess_kwargs or {}))[0]
+        cache[size] = data
+        return data
+
+    return stage_data
+
+def at_final_size(data, size):
+    """Val/test de packed a la resolución final (el resto ya se cargó a ese tamaño)"""
+    stored = _packed_size(data)
+    return ResizedSequence(data, size) if stored and stored != (size, size) else data
+
+def train_progressive(model, schedule, stage_data, val_data, callbacks=None, batch_size=None):
+    """
+    ENTRENA POR ETAPAS DE RESOLUCIÓN
+    ================================
+    Un fit por etapa con initial_epoch acumulado (la numeración de épocas
+    sigue), la misma lista de callbacks y el mismo modelo.
+
+    Retorna:
+    --------
+    tuple: (history, report) con history.history de todas las épocas y
+           una fila por etapa (tamaño, épocas, segundos, imágenes/s, FLOPs
+           relativos a la resolución final)
+    """
+    final_size = schedule[-1][0]
+    merged, report = {}, []
+    epoch = 0
+    for size, epochs in schedule:
+        data = stage_data(size)
+        print(f"   🖼️  Etapa {size}x{size}: {epochs} épocas "
+              f"({relative_flops(size, final_size):.2f}x FLOPs de {final_size}x{final_size})")
+        start = time.time()
+        history = model.fit(
+            data,
+            initial_epoch=epoch,
+            epochs=epoch + epochs,
+            validation_data=val_data,
+            callbacks=callbacks,
+            verbose=2
+        )
+        elapsed = time.time() - start
+        trained = len(history.history.get('loss', []))
+        for key, values in history.history.items():
+            merged.setdefault(key, []).extend(values)
+        row = {
+            'size': size,
+            'epochs': trained,
+            'seconds': round(elapsed, 1),
+            'relative_flops': round(relative_flops(size, final_size), 3),
+            'val_accuracy': round(float(history.history['val_accuracy'][-1]), 4)
+            if history.history.get('val_accuracy') else None,
+        }
+        steps = _steps_per_epoch(data)
+        if batch_size and trained and steps:
+            row['images_per_sec'] = round(steps * batch_size * trained / elapsed, 1)
+        report.append(row)
+        epoch += trained
+        if trained < epochs:
+            # EarlyStopping cortó la etapa: no tiene sentido seguir subiendo
+            break
+    return RunHistory(merged), report
+
+def with_fixed_input(model, size):
+    """
+    COPIA DEL MODELO CON ENTRADA FIJA size×size
+    Para exportar/servir: TFLite, ONNX y el servidor leen model.input_shape
+    """
+    inputs = tf.keras.Input(shape=(size, size, 3))
+    fixed = tf.keras.models.clone_model(model, input_tensors=inputs)
+    fixed.set_weights(model.get_weights())
+    return fixed
+
+# ==============================================================================
+# COMPARACIÓN CONTRA RESOLUCIÓN FIJA
+# ==============================================================================
+def compare_to_fixed(base_model='MobileNetV2', schedule=((64, 3), (100, 3)), backend='packed',
+                     batch_size=64, data_dir="../data_raw/fruits-360_100x100/fruits-360",
+                     packed_dir="../data_packed/fruits-360_100x100",
+                     shard_dir="../data_shards/fruits-360_original-size", seed=42,
+                     results_dir="training_results"):
+    """
+    RESOLUCIÓN PROGRESIVA VS FIJA
+    =============================
+    Mismos pesos iniciales y mismas épocas totales; la fija entrena todas
+    a la resolución final.
+
+    Retorna:
+    --------
+    dict: segundos, accuracy de val/test y etapas de cada modo, y el
+          ahorro relativo de tiempo
+    """
+    from preprocess_data import preprocess_fruit360_data
+    from transferLearning import create_transfer_learning_model, compile_model
+
+    print("🖼️  RESOLUCIÓN PROGRESIVA VS FIJA")
+    print("=" * 50)
+    final_size = schedule[-1][0]
+    total_epochs = sum(epochs for _, epochs in schedule)
+    preprocess_kwargs = {'data_dir': data_dir, 'packed_dir': packed_dir,
+                         'shard_dir': shard_dir, 'seed': seed}
+    train_data, val_data, test_data, _, num_classes = preprocess_fruit360_data(
+        target_size=None if backend == 'packed' else (final_size, final_size),
+        batch_size=batch_size, backend=backend,
+        **preprocess_kwargs)
+    val_data, test_data = at_final_size(val_data, final_size), at_final_size(test_data, final_size)
+    # Fuera de packed train_data ya está a la resolución final
+    initial = None if backend == 'packed' else {final_size: train_data}
+    stage_data = make_stage_loader(train_data, backend, batch_size, preprocess_kwargs,
+                                   initial=initial)
+
+    tf.keras.utils.set_random_seed(seed)
+    model = create_transfer_learning_model(base_model, num_classes, input_shape=(None, None, 3))
+    initial_weights = model.get_weights()
+
+    results = {}
+    for mode, mode_schedule in (('fixed', ((final_size, total_epochs),)),
+                                ('progressive', schedule)):
+        print(f"\n🚀 {mode}: {mode_schedule}")
+        tf.keras.utils.set_random_seed(seed)
+        model.set_weights(initial_weights)
+        compile_model(model)  # optimizador nuevo en cada modo
+        start = time.time()
+        history, report = train_progressive(model, mode_schedule, stage_data, val_data,
+                                            batch_size=batch_size)
+        seconds = time.time() - start
+        results[mode] = {
+            'seconds': round(seconds, 1),
+            'val_accuracy': round(float(history.history['val_accuracy'][-1]), 4),
+            'test_accuracy': round(float(model.evaluate(test_data, verbose=0)[1]), 4),
+            'stages': report,
+        }
+    results['seconds_saved_fraction'] = round(
+        1 - results['progressive']['seconds'] / results['fixed']['seconds'], 4)
+
+    print(f"\n{'Modo':<12} {'Segundos':>9} {'Val acc':>8} {'Test acc':>9}")
+    for mode in ('fixed', 'progressive'):
+        r = results[mode]
+        print(f"{mode:<12} {r['seconds']:>9.1f} {r['val_accuracy']:>8.4f} {r['test_accuracy']:>9.4f}")
+    print(f"⏱️  Progresivo: {results['seconds_saved_fraction']:.0%} menos tiempo, "
+          f"{results['progressive']['test_accuracy'] - results['fixed']['test_accuracy']:+.4f} "
+          f"de accuracy de test")
+
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir,
+                        f"progressive_resizing_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump({'base_model': base_model, 'backend': backend, 'batch_size': batch_size,
+                   'schedule': [list(stage) for stage in schedule], 'results': results},
+                  f, indent=2)
+    print(f"💾 Resultados: {path}")
+    return results
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', type=str, default='MobileNetV2')
+    parser.add_argument('--schedule', type=str, default="64:3,100:3",
+                        help='Etapas "lado:épocas,..." (la última es la resolución final)')
+    parser.add_argument('--backend', type=str, default='packed',
+                        choices=['keras', 'tfdata', 'packed', 'tfrecord'])
+    parser.add_argument('--batch_size', type=int, default=64)
+    parser.add_argument('--data_dir', type=str, default="../data_raw/fruits-360_100x100/fruits-360")
+    parser.add_argument('--packed_dir', type=str, default="../data_packed/fruits-360_100x100")
+    parser.add_argument('--shard_dir', type=str, default="../data_shards/fruits-360_original-size")
+
+    args = parser.parse_args()
+
+    compare_to_fixed(
+        base_model=args.model,
+        schedule=parse_schedule(args.schedule),
+        backend=args.backend,
+        batch_size=args.batch_size,
+        data_dir=args.data_dir,
+        packed_dir=args.packed_dir,
+        shard_dir=args.shard_dir
+    )
@@ -1,14 +1,19 @@
 #!/usr/bin/env python3
 """
 RECUPERAR_HISTORIAL.py - Visualiza tu entrenamiento anterior SIN reentrenar
+Lee las ejecuciones del almacén de experimentos (ver experiment_store.py)
 """
 
+import json
 import numpy as np
-from visualize_training import visualize_training_results
+from experiment_store import ExperimentStore, RunHistory, DEFAULT_DB
+from visualize_training import visualize_training_results, save_training_history
 
 # ==============================================================================
 # DATOS DE TU ENTRENAMIENTO ANTERIOR (de los logs que me compartiste)
+# Anterior al almacén de experimentos: se importa una vez como ejecución
 # ==============================================================================
+LEGACY_STARTED_AT = "legacy"
 history_data = {
     'accuracy': [0.6554, 0.7960, 0.8207, 0.8821, 0.8997, 0.9061, 0.9104, 0.9156],
     'val_accuracy': [0.8238, 0.8577, 0.8700, 0.9025, 0.9135, 0.9086, 0.9128, 0.9134],
@@ -18,26 +23,75 @@ history_data = {
     'val_top_k_categorical_accuracy': [0.9758, 0.9843, 0.9869] + [np.nan]*5
 }
 
-# Crear objeto history compatible
-class MockHistory:
-    def __init__(self, history_dict):
-        self.history = history_dict
+def import_legacy_run(db_path=DEFAULT_DB):
+    """Importa el historial de arriba (solo la primera vez); devuelve su run_id"""
+    store = ExperimentStore(db_path)
+    row = store.conn.execute("SELECT run_id FROM runs WHERE started_at = ?",
+                             (LEGACY_STARTED_AT,)).fetchone()
+    store.close()
+    if row:
+        return row[0]
+    return save_training_history(RunHistory(history_data), 0.9403, "MobileNetV2",
+                                 db_path=db_path, started_at=LEGACY_STARTED_AT)
+
+def import_history_file(path="training_history.json", db_path=DEFAULT_DB):
+    """
+    IMPORTA UN training_history.json ANTIGUO (save_training_history previo)
+    El timestamp del archivo evita importarlo dos veces.
+
+    Retorna:
+    --------
+    int: run_id
+    """
+    with open(path) as f:
+        saved = json.load(f)
+    store = ExperimentStore(db_path)
+    row = store.conn.execute("SELECT run_id FROM runs WHERE started_at = ?",
+                             (saved['timestamp'],)).fetchone()
+    store.close()
+    if row:
+        return row[0]
+    history = {key: [np.nan if v is None else v for v in values]
+               for key, values in saved['training_history'].items()}
+    return save_training_history(RunHistory(history), saved['test_accuracy'],
+                                 saved['model_name'], db_path=db_path,
+                                 started_at=saved['timestamp'])
 
 # ==============================================================================
 # EJECUCIÓN PRINCIPAL
 # ==============================================================================
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--run_id', type=int, default=None,
+                        help='Ejecución a visualizar (por defecto, la última)')
+    parser.add_argument('--db', type=str, default=DEFAULT_DB)
+    parser.add_argument('--history', type=str, default=None,
+                        help='Importar y visualizar un training_history.json antiguo')
+    parser.add_argument('--text_only', action='store_true',
+                        help='Solo el reporte de texto (sin matplotlib)')
+    args = parser.parse_args()
+
     print("📊 RECUPERANDO HISTORIAL DE ENTRENAMIENTO ANTERIOR")
     print("=" * 60)
-    
-    # Crear objeto history
-    history = MockHistory(history_data)
-    
-    # Visualizar resultados (test_accuracy = 0.9403 de tu entrenamiento)
+
+    run_id = args.run_id
+    if args.history:
+        run_id = import_history_file(args.history, args.db)
+    else:
+        store = ExperimentStore(args.db)
+        empty = store.latest_run_id() is None
+        store.close()
+        if empty:
+            # Almacén nuevo: empezar por el entrenamiento anterior
+            run_id = import_legacy_run(args.db)
+
+    # Visualizar resultados
     try:
-        visualize_training_results(history, test_accuracy=0.9403, model_name="MobileNetV2")
+        visualize_training_results(run_id, db_path=args.db, text_only=args.text_only)
         print("✅ Visualización completada!")
         print("📁 Revisa la carpeta 'training_results/'")
     except Exception as e:
         print(f"❌ Error: {e}")
-        print("💡 Asegúrate de tener el archivo visualize_training.py")
\ No newline at end of file
+        print("💡 Lista las ejecuciones con: python experiment_store.py list")
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+CLASIFICACIÓN DE VÍDEO / CÁMARA EN TIEMPO REAL
+==============================================
+Clasifica un flujo de fotogramas (cinta transportadora, vídeo de prueba o
+una carpeta de fotogramas como sustituto local del flujo):
+
+    captura (hilo) → salto adaptativo → decodificación + resize
+      → búfer acotado (se descartan los más antiguos)
+      → lote con todo lo pendiente → modelo → suavizado temporal
+
+- Tiempo real: el hilo de captura marca el ritmo de la fuente. Si el
+  modelo no llega, primero se agrupan más fotogramas por lote y, solo si
+  aun así se descartan fotogramas, se procesa 1 de cada N (los saltados
+  no se decodifican). Cuando el retraso desaparece, N vuelve a bajar.
+  El búfer acotado limita la latencia: si se llena se descarta el
+  fotograma más antiguo.
+- Suavizado: media de probabilidades en una ventana de los últimos
+  fotogramas procesados; la etiqueta (de class_names.json) solo se
+  imprime cuando cambia.
+
+Reporta FPS sostenidos, fotogramas saltados y descartados y la latencia
+de extremo a extremo (captura → predicción suavizada, p50/p99).
+
+Vídeo y cámara requieren OpenCV (pip install opencv-python); una carpeta
+de fotogramas solo necesita Pillow. Fruit360 se grabó en vídeo: una
+carpeta de clase del Test sirve como flujo de prueba.
+
+Uso:
+    python stream_classifier.py --source cinta.mp4
+    python stream_classifier.py --source 0 --model fruit360_int8.tflite
+    python stream_classifier.py --source ../data_raw/fruits-360_100x100/fruits-360/Test/Banana\\ 1 --fps 30
+    python stream_classifier.py --source cinta.mp4 --no_realtime --output frames.jsonl
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from collections import deque, namedtuple
+import numpy as np
+from inference_utils import load_class_names, preprocess_image, LatencyStats
+
+# index: posición en la fuente; captured_at: time.perf_counter() al leerlo
+Frame = namedtuple('Frame', 'index captured_at image')
+
+# ==============================================================================
+# FUENTES
+# ==============================================================================
+def _natural_key(path):
+    """'10_100.jpg' después de '9_100.jpg' (orden de grabación de Fruit360)"""
+    return [int(part) if part.isdigit() else part.lower()
+            for part in re.split(r'(\d+)', os.path.basename(path))]
+
+class ImageFolderSource:
+    """
+    CARPETA DE FOTOGRAMAS COMO FLUJO (SUSTITUTO LOCAL DE LA CÁMARA)
+    grab() avanza sin leer el archivo; retrieve() lo decodifica.
+    """
+
+    is_camera = False
+
+    def __init__(self, directory, fps=30.0):
+        from batch_predict import iter_image_paths
+        self.paths = sorted(iter_image_paths(directory), key=_natural_key)
+        if not self.paths:
+            raise ValueError(f"❌ No hay imágenes en {directory}")
+        self.fps = float(fps)
+        self.position = 0
+
+    def grab(self):
+        self.position += 1
+        return self.position <= len(self.paths)
+
+    def retrieve(self):
+        from PIL import Image
+        with Image.open(self.paths[self.position - 1]) as image:
+            return np.asarray(image.convert('RGB'))
+
+    def close(self):
+        pass
+
+class VideoSource:
+    """
+    VÍDEO O CÁMARA CON OPENCV
+    source: ruta del vídeo, URL (rtsp://...) o índice de cámara ('0')
+    grab() lee el fotograma sin decodificarlo; retrieve() lo decodifica.
+    """
+
+    def __init__(self, source, fps=None):
+        try:
+            import cv2
+        except ImportError:
+            raise ValueError("❌ Librería 'opencv-python' no instalada. "
+                             "Ejecuta: pip install opencv-python")
+        self.cv2 = cv2
+        self.is_camera = str(source).isdigit()
+        self.capture = cv2.VideoCapture(int(source) if self.is_camera else source)
+        if not self.capture.isOpened():
+            raise ValueError(f"❌ No se pudo abrir la fuente de vídeo: {source}")
+        self.fps = float(fps or self.capture.get(cv2.CAP_PROP_FPS) or 30.0)
+
+    def grab(self):
+        return self.capture.grab()
+
+    def retrieve(self):
+        ok, frame = self.capture.retrieve()
+        return self.cv2.cvtColor(frame, self.cv2.COLOR_BGR2RGB) if ok else None
+
+    def close(self):
+        self.capture.release()
+
+def open_source(source, fps=None):
+    """Carpeta → ImageFolderSource; vídeo, URL o índice de cámara → VideoSource"""
+    if os.path.isdir(source):
+        return ImageFolderSource(source, fps or 30.0)
+    return VideoSource(source, fps)
+
+# ==============================================================================
+# CAPTURA EN SEGUNDO PLANO
+# ==============================================================================
+class FrameReader(threading.Thread):
+    """
+    LEE, SALTA, DECODIFICA Y REDIMENSIONA FOTOGRAMAS EN UN HILO
+    ===========================================================
+    Parámetros:
+    -----------
+    source : ImageFolderSource o VideoSource
+    target_size : tuple
+        Entrada del modelo (alto, ancho)
+    realtime : bool
+        True: se respeta el ritmo de la fuente (un vídeo se reproduce a sus
+        FPS, como una cámara) y si el búfer se llena se descarta el
+        fotograma más antiguo. False: se procesa todo, sin descartes
+    max_buffer : int
+        Fotogramas decodificados en espera como máximo
+    """
+
+    def __init__(self, source, target_size=(100, 100), realtime=True, max_buffer=32):
+        super().__init__(daemon=True)
+        self.source = source
+        self.target_size = target_size
+        self.realtime = realtime
+        self.buffer = deque()
+        self.max_buffer = max(int(max_buffer), 1)
+        self.condition = threading.Condition()
+        self.stride = 1  # 1 de cada stride fotogramas se decodifica
+        self.frames = self.skipped = self.dropped = 0
+        self.finished = False
+        self.stopped = False
+        self.error = None
+
+    def run(self):
+        from PIL import Image
+        interval = 1.0 / self.source.fps
+        next_frame = time.perf_counter()
+        try:
+            while not self.stopped:
+                if self.realtime and not self.source.is_camera:
+                    # Reproducción a los FPS de la fuente (la cámara ya marca su ritmo)
+                    delay = next_frame - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_frame = max(next_frame + interval, time.perf_counter() - interval)
+                if not self.source.grab():
+                    break
+                captured_at = time.perf_counter()
+                index = self.frames
+                self.frames += 1
+                if index % self.stride:
+                    self.skipped += 1
+                    continue
+                raw = self.source.retrieve()
+                if raw is None:
+                    break
+                image = preprocess_image(Image.fromarray(raw), self.target_size)
+                self._push(Frame(index, captured_at, image))
+        except Exception as e:
+            self.error = e
+        finally:
+            with self.condition:
+                self.finished = True
+                self.condition.notify_all()
+
+    def _push(self, frame):
+        with self.condition:
+            if self.realtime:
+                if len(self.buffer) >= self.max_buffer:
+                    self.buffer.popleft()
+                    self.dropped += 1
+            else:
+                while len(self.buffer) >= self.max_buffer and not self.stopped:
+                    self.condition.wait()
+            self.buffer.append(frame)
+            self.condition.notify_all()
+
+    def take(self, max_batch):
+        """
+        HASTA max_batch FOTOGRAMAS PENDIENTES (bloquea si no hay ninguno)
+
+        Retorna:
+        --------
+        list: fotogramas en orden ([] cuando la fuente terminó)
+        """
+        with self.condition:
+            while not self.buffer and not self.finished:
+                self.condition.wait()
+            batch = [self.buffer.popleft() for _ in range(min(max_batch, len(self.buffer)))]
+            self.condition.notify_all()
+        if not batch and self.error is not None:
+            raise self.error
+        return batch
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+# ==============================================================================
+# SUAVIZADO TEMPORAL
+# ==============================================================================
+class TemporalSmoother:
+    """
+    MEDIA MÓVIL DE PROBABILIDADES SOBRE LOS ÚLTIMOS window FOTOGRAMAS
+    Suma acumulada: cada actualización es O(clases).
+    """
+
+    def __init__(self, num_classes, window=8):
+        self.window = deque(maxlen=max(int(window), 1))
+        self.total = np.zeros(num_classes, dtype=np.float64)
+
+    def update(self, probabilities):
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        if len(self.window) == self.window.maxlen:
+            self.total -= self.window[0]
+        self.window.append(probabilities)
+        self.total += probabilities
+        return self.total / len(self.window)
+
+# ==============================================================================
+# BUCLE DE CLASIFICACIÓN
+# ==============================================================================
+def adapt_stride(stride, dropped, mean_batch, max_batch):
+    """
+    SALTO DE FOTOGRAMAS SEGÚN EL RETRASO
+    Sube si se descartaron fotogramas en la ventana (los lotes ya no
+    bastan) y baja cuando los lotes van a menos de la mitad de max_batch
+    sin descartes (hay margen para procesar más).
+    """
+    if dropped > 0:
+        return stride + 1
+    if stride > 1 and mean_batch <= max_batch / 2:
+        return stride - 1
+    return stride
+
+def classify_stream(predict_fn, source, class_names, target_size=(100, 100), realtime=True,
+                    max_batch=8, max_buffer=None, window=8, min_confidence=0.5,
+                    adapt_every=10, on_prediction=None, report_every=5.0):
+    """
+    CLASIFICA UN FLUJO HASTA QUE TERMINA (O Ctrl+C)
+    ===============================================
+    Parámetros:
+    -----------
+    predict_fn : callable
+        Imágenes (N, alto, ancho, 3) → probabilidades (N, clases)
+    source : ImageFolderSource o VideoSource
+    max_batch : int
+        Fotogramas pendientes que se agrupan como máximo en un lote
+    max_buffer : int
+        Fotogramas en espera (por defecto 2 lotes); acota la latencia
+    window : int
+        Fotogramas de la media móvil
+    min_confidence : float
+        Por debajo, la etiqueta suavizada es None (sin decisión)
+    adapt_every : int
+        Lotes entre ajustes del salto de fotogramas (solo en tiempo real;
+        ver adapt_stride)
+    on_prediction : callable
+        Se llama con un dict por fotograma procesado
+
+    Retorna:
+    --------
+    dict: FPS de la fuente y sostenidos, fotogramas leídos / procesados /
+          saltados / descartados, lote medio, salto final, latencia
+          p50/p99 y cambios de etiqueta con y sin suavizado
+    """
+    reader = FrameReader(source, target_size, realtime, max_buffer or 2 * max_batch)
+    smoother = TemporalSmoother(len(class_names), window)
+    latency = LatencyStats()
+    processed = batches = 0
+    predict_seconds = 0.0
+    raw_label = smooth_label = None
+    raw_switches = smooth_switches = 0
+    window_frames = window_dropped = 0
+    start = last_report = time.perf_counter()
+    reader.start()
+    try:
+        while True:
+            batch = reader.take(max_batch)
+            if not batch:
+                break
+            predict_start = time.perf_counter()
+            probabilities = np.asarray(predict_fn(np.stack([f.image for f in batch])))
+            predict_seconds += time.perf_counter() - predict_start
+            for frame, frame_probabilities in zip(batch, probabilities):
+                smoothed = smoother.update(frame_probabilities)
+                now = time.perf_counter()
+                latency.record(now - frame.captured_at)
+                top = int(smoothed.argmax())
+                label = class_names[top] if smoothed[top] >= min_confidence else None
+                raw = int(frame_probabilities.argmax())
+                raw_switches += raw_label is not None and raw != raw_label
+                raw_label = raw
+                if label != smooth_label:
+                    smooth_switches += smooth_label is not None
+                    smooth_label = label
+                    print(f"   🎥 fotograma {frame.index}: {label or '—'} ({smoothed[top]:.2f})")
+                if on_prediction is not None:
+                    on_prediction({
+                        'frame': frame.index,
+                        'label': label,
+                        'confidence': round(float(smoothed[top]), 4),
+                        'raw_label': class_names[raw],
+                        'latency_ms': round((now - frame.captured_at) * 1000, 2),
+                    })
+            processed += len(batch)
+            batches += 1
+
+            # Primero lotes; saltar solo si aun así se descartan fotogramas
+            window_frames += len(batch)
+            if realtime and batches % adapt_every == 0:
+                stride = adapt_stride(reader.stride, reader.dropped - window_dropped,
+                                      window_frames / adapt_every, max_batch)
+                if stride != reader.stride:
+                    print(f"   ⏩ Procesando 1 de cada {stride} fotogramas "
+                          f"({reader.dropped - window_dropped} descartados, "
+                          f"lote medio {window_frames / adapt_every:.1f})")
+                    reader.stride = stride
+                window_frames, window_dropped = 0, reader.dropped
+
+            if report_every and time.perf_counter() - last_report >= report_every:
+                last_report = time.perf_counter()
+                print(f"   ⏱️  {processed / (last_report - start):.1f} FPS · "
+                      f"saltados {reader.skipped} · descartados {reader.dropped} · "
+                      f"latencia p99 {latency.percentile(99) * 1000:.0f} ms")
+    except KeyboardInterrupt:
+        print("\n⏹️  Detenido")
+    finally:
+        reader.stop()
+        reader.join(timeout=5)
+        source.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'source_fps': round(source.fps, 2),
+        'frames': reader.frames,
+        'processed': processed,
+        'skipped': reader.skipped,
+        'dropped': reader.dropped,
+        'sustained_fps': round(processed / elapsed, 2) if elapsed > 0 else 0.0,
+        'model_fps': round(processed / predict_seconds, 2) if predict_seconds > 0 else 0.0,
+        'mean_batch': round(processed / batches, 2) if batches else 0.0,
+        'final_stride': reader.stride,
+        'latency_p50_ms': round(latency.percentile(50) * 1000, 2),
+        'latency_p99_ms': round(latency.percentile(99) * 1000, 2),
+        'label_switches_raw': raw_switches,
+        'label_switches_smoothed': smooth_switches,
+        'elapsed_s': round(elapsed, 2),
+    }
+
+def print_stream_summary(summary):
+    """Resumen legible de classify_stream"""
+    print("\n📊 RESUMEN DEL FLUJO")
+    print("=" * 50)
+    print(f"   - FPS sostenidos: {summary['sustained_fps']:.1f} "
+          f"(fuente {summary['source_fps']:.1f}, modelo {summary['model_fps']:.1f})")
+    print(f"   - Fotogramas: {summary['frames']} leídos · {summary['processed']} procesados · "
+          f"{summary['skipped']} saltados · {summary['dropped']} descartados")
+    print(f"   - Lote medio: {summary['mean_batch']:.1f} · salto final: 1 de cada "
+          f"{summary['final_stride']}")
+    print(f"   - Latencia extremo a extremo: p50 {summary['latency_p50_ms']:.1f} ms · "
+          f"p99 {summary['latency_p99_ms']:.1f} ms")
+    print(f"   - Cambios de etiqueta: {summary['label_switches_raw']} sin suavizar → "
+          f"{summary['label_switches_smoothed']} suavizados")
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--source', type=str, required=True,
+                        help='Vídeo, URL, índice de cámara (0) o carpeta de fotogramas')
+    parser.add_argument('--model', type=str, default='fruit360_transfer_learning.h5',
+                        help='.h5/.keras/SavedModel, .tflite u .onnx')
+    parser.add_argument('--classes', type=str, default='class_names.json')
+    parser.add_argument('--fps', type=float, default=None,
+                        help='FPS de la fuente (por defecto los del vídeo; 30 para carpetas)')
+    parser.add_argument('--max_batch', type=int, default=8)
+    parser.add_argument('--window', type=int, default=8, help='Fotogramas del suavizado')
+    parser.add_argument('--min_confidence', type=float, default=0.5)
+    parser.add_argument('--target_size', type=int, nargs=2, default=[100, 100])
+    parser.add_argument('--no_realtime', action='store_true',
+                        help='Procesar todos los fotogramas sin ritmo ni descartes')
+    parser.add_argument('--output', type=str, default=None,
+                        help='JSONL con la predicción de cada fotograma procesado')
+
+    args = parser.parse_args()
+
+    from batch_predict import load_predict_fn
+
+    class_names = load_class_names(args.classes)
+    predict_fn = load_predict_fn(args.model)
+    source = open_source(args.source, args.fps)
+    print(f"🎥 Clasificando {args.source} ({source.fps:.1f} FPS, "
+          f"{'tiempo real' if not args.no_realtime else 'sin descartes'})")
+
+    output = open(args.output, 'w') if args.output else None
+    try:
+        summary = classify_stream(
+            predict_fn, source, class_names,
+            target_size=tuple(args.target_size),
+            realtime=not args.no_realtime,
+            max_batch=args.max_batch,
+            window=args.window,
+            min_confidence=args.min_confidence,
+            on_prediction=(lambda record: output.write(json.dumps(record, ensure_ascii=False)
+                                                       + "\n")) if output else None
+        )
+    finally:
+        if output:
+            output.close()
+    print_stream_summary(summary)
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+BARRIDO PARALELO DE HIPERPARÁMETROS Y MODELOS BASE
+==================================================
+Genera trials (grid o aleatorio) sobre los parámetros de
+create_transfer_learning_model / train_transfer_learning y los ejecuta en
+un pool de procesos. Cada proceso se fija a su propio grupo de núcleos
+(sched_setaffinity + hilos intra/inter-op) para no sobre-suscribir la CPU.
+Los trials débiles se podan con successive halving. Todos los trials leen
+el mismo dataset empaquetado (memmap, compartido por la page cache) y los
+resultados van a una única tabla SQLite.
+"""
+
+import os
+import json
+import math
+import time
+import random
+import sqlite3
+import itertools
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+# Espacio de búsqueda por defecto
+DEFAULT_SPACE = {
+    'base_model': ['EfficientNetB0', 'MobileNetV2', 'ResNet50'],
+    'batch_size': [32, 64],
+    'learning_rate': [1e-3, 3e-4],
+}
+
+# Valores de los hiperparámetros que no están en el espacio de búsqueda
+TRIAL_DEFAULTS = {
+    'base_model': 'EfficientNetB0',
+    'batch_size': 64,
+    'learning_rate': 0.001,
+    'precision': 'float32',
+    'augment_training': True,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trials (
+    sweep_id TEXT,
+    trial_id INTEGER,
+    rung INTEGER,
+    epochs INTEGER,
+    base_model TEXT,
+    batch_size INTEGER,
+    learning_rate REAL,
+    params TEXT,
+    val_accuracy REAL,
+    val_loss REAL,
+    seconds REAL,
+    images_per_sec REAL,
+    status TEXT,
+    created_at TEXT,
+    PRIMARY KEY (sweep_id, trial_id, rung)
+);
+"""
+
+# ==============================================================================
+# ESPACIO DE BÚSQUEDA
+# ==============================================================================
+def _sample_value(spec, rng):
+    """Lista = elección; ('loguniform', a, b) o ('uniform', a, b) = continuo"""
+    if isinstance(spec, tuple) and spec and spec[0] in ('loguniform', 'uniform'):
+        kind, low, high = spec
+        if kind == 'loguniform':
+            return float(10 ** rng.uniform(math.log10(low), math.log10(high)))
+        return float(rng.uniform(low, high))
+    return rng.choice(list(spec))
+
+def generate_trials(space=None, mode='grid', num_trials=10, seed=42):
+    """
+    GENERA LA LISTA DE TRIALS
+
+    Parámetros:
+    -----------
+    space : dict
+        {parámetro: lista de valores | ('loguniform', a, b) | ('uniform', a, b)}
+    mode : str
+        'grid' (producto cartesiano) o 'random'
+    num_trials : int
+        Número de trials en modo 'random'
+
+    Retorna:
+    --------
+    list: diccionarios de parámetros
+    """
+    space = space or DEFAULT_SPACE
+    if mode == 'grid':
+        keys = list(space)
+        return [dict(zip(keys, values))
+                for values in itertools.product(*(list(space[k]) for k in keys))]
+    if mode == 'random':
+        rng = random.Random(seed)
+        return [{k: _sample_value(v, rng) for k, v in space.items()}
+                for _ in range(num_trials)]
+    raise ValueError(f"❌ Modo de búsqueda no soportado: {mode}")
+
+# ==============================================================================
+# WORKERS (un proceso por slot de núcleos)
+# ==============================================================================
+def _init_worker(core_slots, threads_per_trial):
+    """Fija el proceso a un grupo de núcleos y limita los hilos de TensorFlow"""
+    cores = core_slots.get()
+    if cores and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    os.environ['OMP_NUM_THREADS'] = str(threads_per_trial)
+    os.environ['CUDA_VISIBLE_DEVICES'] = '-1'
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads_per_trial)
+    tf.config.threading.set_inter_op_parallelism_threads(min(2, threads_per_trial))
+
+def _run_trial(trial_id, params, packed_dir, sweep_dir, start_epoch, epochs):
+    """
+    ENTRENA UN TRIAL HASTA `epochs` (REANUDANDO DESDE start_epoch)
+    Los pesos se guardan entre rungs; el estado del optimizador no.
+    """
+    import tensorflow as tf
+    from packed_dataset import load_packed_data
+    from transferLearning import create_transfer_learning_model
+    from training_callbacks import StepTimeCallback
+
+    # El proceso del pool se reutiliza: no acumular grafos de trials anteriores
+    tf.keras.backend.clear_session()
+    params = {**TRIAL_DEFAULTS, **params}
+    train_seq, val_seq, _, _, num_classes = load_packed_data(
+        packed_dir, batch_size=params['batch_size'],
+        augment_training=params['augment_training']
+    )
+    model = create_transfer_learning_model(
+        params['base_model'], num_classes,
+        precision=params['precision'],
+        learning_rate=params['learning_rate']
+    )
+    weights_path = os.path.join(sweep_dir, f"trial_{trial_id}.weights.h5")
+    if start_epoch > 0 and os.path.exists(weights_path):
+        model.load_weights(weights_path)
+
+    step_timer = StepTimeCallback(batch_size=params['batch_size'])
+    start = time.time()
+    model.fit(train_seq, initial_epoch=start_epoch, epochs=epochs,
+              validation_data=val_seq, callbacks=[step_timer], verbose=0)
+    seconds = time.time() - start
+    val_loss, val_acc = model.evaluate(val_seq, verbose=0)[:2]
+    model.save_weights(weights_path)
+
+    return {
+        'trial_id': trial_id,
+        'val_accuracy': float(val_acc),
+        'val_loss': float(val_loss),
+        'seconds': round(seconds, 2),
+        'images_per_sec': step_timer.summary().get('images_per_sec'),
+    }
+
+# ==============================================================================
+# RESULTADOS
+# ==============================================================================
+def open_results(db_path="sweep_results.sqlite"):
+    """Abre (o crea) la tabla de resultados"""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(_SCHEMA)
+    return conn
+
+def _record(conn, sweep_id, rung, epochs, params, result, status):
+    params = {**TRIAL_DEFAULTS, **params}  # se guardan los valores efectivos
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO trials VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (sweep_id, result['trial_id'], rung, epochs,
+             params.get('base_model'), params.get('batch_size'), params.get('learning_rate'),
+             json.dumps(params), result.get('val_accuracy'), result.get('val_loss'),
+             result.get('seconds'), result.get('images_per_sec'), status,
+             time.strftime('%Y-%m-%dT%H:%M:%S'))
+        )
+
+def best_trials(db_path="sweep_results.sqlite", sweep_id=None, limit=10):
+    """
+    MEJORES TRIALS (ÚLTIMO RUNG DE CADA UNO)
+
+    Retorna:
+    --------
+    list: filas (sweep_id, trial_id, rung, epochs, base_model, batch_size,
+          learning_rate, val_accuracy, seconds)
+    """
+    conn = open_results(db_path)
+    query = """
+        SELECT t.sweep_id, t.trial_id, t.rung, t.epochs, t.base_model, t.batch_size,
+               t.learning_rate, t.val_accuracy, t.seconds
+        FROM trials t
+        JOIN (SELECT sweep_id, trial_id, MAX(rung) AS rung FROM trials
+              WHERE status != 'failed' GROUP BY sweep_id, trial_id) last
+          ON t.sweep_id = last.sweep_id AND t.trial_id = last.trial_id AND t.rung = last.rung
+    """
+    params = ()
+    if sweep_id:
+        query += " WHERE t.sweep_id = ?"
+        params = (sweep_id,)
+    query += " ORDER BY t.epochs DESC, t.val_accuracy DESC LIMIT ?"
+    rows = conn.execute(query, params + (limit,)).fetchall()
+    conn.close()
+    return rows
+
+# ==============================================================================
+# SUCCESSIVE HALVING
+# ==============================================================================
+def run_sweep(trials, packed_dir="../data_packed/fruits-360_100x100",
+              sweep_dir="sweeps", db_path="sweep_results.sqlite",
+              parallel_trials=None, threads_per_trial=None,
+              min_epochs=1, max_epochs=9, eta=3, sweep_id=None):
+    """
+    EJECUTA EL BARRIDO CON SUCCESSIVE HALVING
+    =========================================
+    Rung k entrena los supervivientes hasta min_epochs * eta^k épocas
+    (máximo max_epochs) y promueve el mejor 1/eta según val_accuracy.
+
+    Parámetros:
+    -----------
+    trials : list
+        Parámetros de cada trial (generate_trials)
+    parallel_trials : int
+        Procesos simultáneos (por defecto núcleos / threads_per_trial)
+    threads_per_trial : int
+        Núcleos asignados a cada trial
+
+    Retorna:
+    --------
+    str: sweep_id (consultable con best_trials)
+    """
+    sweep_id = sweep_id or time.strftime('sweep_%Y%m%d_%H%M%S')
+    sweep_dir = os.path.join(sweep_dir, sweep_id)
+    os.makedirs(sweep_dir, exist_ok=True)
+
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') \
+        else list(range(os.cpu_count() or 1))
+    threads_per_trial = threads_per_trial or max(1, len(cores) // (parallel_trials or 4))
+    threads_per_trial = min(threads_per_trial, len(cores))
+    # Cada proceso necesita su propio grupo de núcleos (nunca vacío)
+    max_parallel = len(cores) // threads_per_trial
+    if parallel_trials and parallel_trials > max_parallel:
+        print(f"⚠️  {parallel_trials} procesos x {threads_per_trial} núcleos no caben en "
+              f"{len(cores)} núcleos: se usan {max_parallel}")
+    parallel_trials = min(parallel_trials or max_parallel, max_parallel, len(trials))
+
+    print("🔬 BARRIDO DE HIPERPARÁMETROS - FRUIT360")
+    print("=" * 50)
+    print(f"   - Trials: {len(trials)}")
+    print(f"   - Procesos: {parallel_trials} x {threads_per_trial} núcleos")
+    print(f"   - Successive halving: eta={eta}, épocas {min_epochs}→{max_epochs}")
+
+    # 'spawn': TensorFlow no soporta fork tras inicializarse
+    ctx = mp.get_context('spawn')
+    manager = ctx.Manager()
+    core_slots = manager.Queue()
+    for i in range(parallel_trials):
+        core_slots.put(set(cores[i * threads_per_trial:(i + 1) * threads_per_trial]))
+
+    conn = open_results(db_path)
+    survivors = list(range(len(trials)))
+    previous_epochs, rung = 0, 0
+
+    with ProcessPoolExecutor(max_workers=parallel_trials, mp_context=ctx,
+                             initializer=_init_worker,
+                             initargs=(core_slots, threads_per_trial)) as pool:
+        while survivors:
+            epochs = min(min_epochs * eta ** rung, max_epochs)
+            print(f"\n🪜 Rung {rung}: {len(survivors)} trials hasta {epochs} épocas")
+
+            futures = {pool.submit(_run_trial, i, trials[i], packed_dir, sweep_dir,
+                                   previous_epochs, epochs): i for i in survivors}
+            results = []
+            for future, trial_id in futures.items():
+                try:
+                    result = future.result()
+                    results.append(result)
+                    _record(conn, sweep_id, rung, epochs, trials[trial_id], result, 'completed')
+                    print(f"   ✅ Trial {trial_id} {trials[trial_id]} → "
+                          f"val_acc={result['val_accuracy']:.4f} ({result['seconds']}s)")
+                except Exception as e:
+                    _record(conn, sweep_id, rung, epochs, trials[trial_id],
+                            {'trial_id': trial_id}, 'failed')
+                    print(f"   ❌ Trial {trial_id} falló: {e}")
+
+            if epochs >= max_epochs or len(results) <= 1:
+                break
+
+            results.sort(key=lambda r: r['val_accuracy'], reverse=True)
+            keep = max(1, len(results) // eta)
+            for pruned in results[keep:]:
+                with conn:
+                    conn.execute("UPDATE trials SET status = 'pruned' WHERE sweep_id = ? "
+                                 "AND trial_id = ? AND rung = ?",
+                                 (sweep_id, pruned['trial_id'], rung))
+            survivors = [r['trial_id'] for r in results[:keep]]
+            previous_epochs = epochs
+            rung += 1
+
+    conn.close()
+    manager.shutdown()
+
+    print(f"\n🏆 Mejores trials ({sweep_id}):")
+    for row in best_trials(db_path, sweep_id, limit=5):
+        lr = f"{row[6]:.1e}" if row[6] is not None else "-"
+        print(f"   Trial {row[1]}: {row[4]} bs={row[5]} lr={lr} "
+              f"→ val_acc={row[7]:.4f} ({row[3]} épocas)")
+    return sweep_id
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--packed_dir', type=str, default="../data_packed/fruits-360_100x100")
+    parser.add_argument('--space', type=str, default=None,
+                        help='JSON con el espacio de búsqueda (por defecto DEFAULT_SPACE)')
+    parser.add_argument('--mode', type=str, default='grid', choices=['grid', 'random'])
+    parser.add_argument('--num_trials', type=int, default=10)
+    parser.add_argument('--parallel', type=int, default=None)
+    parser.add_argument('--threads_per_trial', type=int, default=None)
+    parser.add_argument('--min_epochs', type=int, default=1)
+    parser.add_argument('--max_epochs', type=int, default=9)
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--db', type=str, default='sweep_results.sqlite')
+
+    args = parser.parse_args()
+
+    space = None
+    if args.space:
+        with open(args.space) as f:
+            # Los rangos continuos se escriben como listas ["loguniform", a, b]
+            space = {k: tuple(v) if v and v[0] in ('loguniform', 'uniform') else v
+                     for k, v in json.load(f).items()}
+
+    trials = generate_trials(space, args.mode, args.num_trials)
+    run_sweep(trials, args.packed_dir, db_path=args.db,
+              parallel_trials=args.parallel, threads_per_trial=args.threads_per_trial,
+              min_epochs=args.min_epochs, max_epochs=args.max_epochs, eta=args.eta)
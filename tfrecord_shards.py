@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+SHARDS TFRecord PARA DATASETS QUE NO CABEN EN MEMORIA
+=====================================================
+Convierte un árbol Training/ y Test/ (fruits-360_original-size,
+fruits-360_multi, ...) en shards TFRecord de ~150 MB, barajados y con las
+clases repartidas de forma uniforme entre shards, más un index.json con el
+número de registros y la distribución de clases de cada shard.
+
+El lector (ShardedStream) intercala varios shards en paralelo con lecturas
+secuenciales, reparte los shards entre workers y puede reanudar a mitad de
+época (época + batches ya consumidos, ver StreamPositionCallback).
+
+Uso:
+    python tfrecord_shards.py --data_dir ../data_raw/fruits-360_original-size/fruits-360 \
+        --output_dir ../data_shards/fruits-360_original-size --target_size 100
+"""
+
+import os
+import io
+import json
+import time
+import numpy as np
+import tensorflow as tf
+from concurrent.futures import ThreadPoolExecutor
+from preprocess_data import list_image_files, make_train_val_split
+
+INDEX_NAME = "index.json"
+SHARD_SPLITS = ('train', 'val', 'test')
+
+# ==============================================================================
+# ESCRITURA
+# ==============================================================================
+def balanced_shuffle(labels, seed=42):
+    """
+    ORDEN BARAJADO CON CLASES UNIFORMEMENTE REPARTIDAS
+    Cada imagen recibe la clave (posición en su clase + U(0,1)) / tamaño de
+    su clase; ordenar por esa clave intercala las clases en proporción a su
+    tamaño, así que cualquier tramo contiguo (un shard) tiene una
+    distribución de clases parecida a la del split completo.
+
+    Retorna:
+    --------
+    np.ndarray: permutación de índices
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.asarray(labels)
+    keys = np.empty(len(labels), dtype=np.float64)
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        rng.shuffle(members)
+        keys[members] = (np.arange(len(members)) + rng.random(len(members))) / len(members)
+    return np.argsort(keys, kind='stable')
+
+def encode_image(path, target_size=None, quality=95):
+    """Bytes JPEG de la imagen (los originales si no hay que redimensionar)"""
+    if target_size is None and path.lower().endswith(('.jpg', '.jpeg')):
+        with open(path, 'rb') as f:
+            return f.read()
+    from PIL import Image
+    with Image.open(path) as img:
+        img = img.convert('RGB')
+        if target_size is not None and img.size != (target_size[1], target_size[0]):
+            img = img.resize((target_size[1], target_size[0]), Image.NEAREST)
+        buffer = io.BytesIO()
+        img.save(buffer, format='JPEG', quality=quality)
+        return buffer.getvalue()
+
+def _serialize_example(image_bytes, label, path):
+    feature = {
+        'image': tf.train.Feature(bytes_list=tf.train.BytesList(value=[image_bytes])),
+        'label': tf.train.Feature(int64_list=tf.train.Int64List(value=[label])),
+        'path': tf.train.Feature(bytes_list=tf.train.BytesList(value=[path.encode()])),
+    }
+    return tf.train.Example(features=tf.train.Features(feature=feature)).SerializeToString()
+
+def _estimate_record_bytes(paths, target_size, sample=64, seed=0):
+    """Tamaño medio por registro (muestra de imágenes codificadas)"""
+    rng = np.random.default_rng(seed)
+    sample_idx = rng.choice(len(paths), size=min(sample, len(paths)), replace=False)
+    return float(np.mean([len(encode_image(paths[i], target_size)) for i in sample_idx]))
+
+def _write_shard(shard_path, paths, labels, target_size, num_classes, root):
+    counts = np.zeros(num_classes, dtype=np.int64)
+    with tf.io.TFRecordWriter(shard_path) as writer:
+        for path, label in zip(paths, labels):
+            writer.write(_serialize_example(encode_image(path, target_size), int(label),
+                                            os.path.relpath(path, root)))
+            counts[label] += 1
+    return {
+        'file': os.path.basename(shard_path),
+        'num_records': len(paths),
+        'bytes': os.path.getsize(shard_path),
+        'class_counts': counts.tolist(),
+    }
+
+def write_tfrecord_shards(data_dir="../data_raw/fruits-360_original-size/fruits-360",
+                          output_dir="../data_shards/fruits-360_original-size",
+                          target_size=None,
+                          shard_size_mb=150,
+                          validation_split=0.2,
+                          dedup=False,
+                          num_workers=None,
+                          seed=42,
+                          overwrite=False):
+    """
+    ESCRIBE LOS SPLITS COMO SHARDS TFRecord (PASO ÚNICO)
+    ====================================================
+    Mismo split train/val y orden de clases que preprocess_fruit360_data.
+
+    Parámetros:
+    -----------
+    data_dir : str
+        Directorio base del dataset (contiene Training/ y Test/)
+    output_dir : str
+        Directorio de salida (shards + index.json)
+    target_size : tuple o None
+        Redimensionar y recodificar a (alto, ancho); None guarda los JPEG
+        originales sin recodificar
+    shard_size_mb : float
+        Tamaño objetivo de cada shard
+    num_workers : int
+        Shards escritos en paralelo (None = automático)
+
+    Retorna:
+    --------
+    dict: índice de los shards
+    """
+    print("🧱 ESCRIBIENDO SHARDS TFRecord")
+    print("=" * 50)
+
+    index_path = os.path.join(output_dir, INDEX_NAME)
+    if os.path.exists(index_path) and not overwrite:
+        print(f"✅ Shards ya existen en: {output_dir} (usa --overwrite para rehacerlos)")
+        return load_shard_index(output_dir)
+
+    train_dir = os.path.join(data_dir, "Training")
+    test_dir = os.path.join(data_dir, "Test")
+    if not os.path.exists(train_dir) or not os.path.exists(test_dir):
+        raise ValueError("❌ No se encontraron los directorios Training/Test")
+
+    class_names = sorted([d for d in os.listdir(train_dir)
+                         if os.path.isdir(os.path.join(train_dir, d))])
+    num_classes = len(class_names)
+
+    paths, labels = list_image_files(train_dir, class_names)
+    (train_paths, train_labels), (val_paths, val_labels) = make_train_val_split(
+        paths, labels, validation_split, dedup, seed=seed,
+        cache_path=os.path.join(data_dir, ".dhash_cache.npz")
+    )
+    test_paths, test_labels = list_image_files(test_dir, class_names)
+    splits = {
+        'train': (train_paths, train_labels),
+        'val': (val_paths, val_labels),
+        'test': (test_paths, test_labels),
+    }
+
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.time()
+    split_info = {}
+    for split, (split_paths, split_labels) in splits.items():
+        if not split_paths:
+            split_info[split] = {'num_records': 0, 'shards': []}
+            continue
+        order = balanced_shuffle(split_labels, seed)
+        split_paths = [split_paths[i] for i in order]
+        split_labels = [split_labels[i] for i in order]
+
+        record_bytes = _estimate_record_bytes(split_paths, target_size)
+        num_shards = max(int(np.ceil(record_bytes * len(split_paths)
+                                     / (shard_size_mb * 2**20))), 1)
+        bounds = np.linspace(0, len(split_paths), num_shards + 1).astype(int)
+        print(f"   ⏳ {split}: {len(split_paths)} imágenes → {num_shards} shards")
+
+        def _write(shard_id):
+            lo, hi = bounds[shard_id], bounds[shard_id + 1]
+            shard_path = os.path.join(
+                output_dir, f"{split}-{shard_id:05d}-of-{num_shards:05d}.tfrecord")
+            return _write_shard(shard_path, split_paths[lo:hi], split_labels[lo:hi],
+                                target_size, num_classes, data_dir)
+
+        # La lectura y la escritura liberan el GIL; un hilo por shard
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            shards = list(executor.map(_write, range(num_shards)))
+        split_info[split] = {'num_records': len(split_paths), 'shards': shards}
+
+    index = {
+        'data_dir': os.path.abspath(data_dir),
+        'class_names': class_names,
+        'num_classes': num_classes,
+        'target_size': list(target_size) if target_size else None,
+        'validation_split': validation_split,
+        'dedup': dedup,
+        'seed': seed,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'splits': split_info,
+    }
+    with open(index_path, 'w') as f:
+        json.dump(index, f, indent=2)
+
+    total_mb = sum(s['bytes'] for info in split_info.values()
+                   for s in info['shards']) / 2**20
+    print(f"✅ {total_mb:.0f} MB escritos en {time.time() - start:.1f}s")
+    print(f"   📁 {output_dir}")
+    return index
+
+def load_shard_index(shard_dir):
+    """Lee el index.json de un directorio de shards"""
+    index_path = os.path.join(shard_dir, INDEX_NAME)
+    if not os.path.exists(index_path):
+        raise ValueError(f"❌ No hay shards TFRecord en: {shard_dir}")
+    with open(index_path) as f:
+        return json.load(f)
+
+# ==============================================================================
+# LECTURA EN STREAMING
+# ==============================================================================
+class ShardedStream:
+    """
+    LECTOR EN STREAMING DE UN SPLIT
+    ===============================
+    Cada worker se queda con los shards worker_index::num_workers. Por
+    época, el orden de los shards y el buffer de barajado dependen solo de
+    (seed, época), así que una época se puede reconstruir en otro proceso y
+    reanudar saltando los registros ya consumidos (sin decodificarlos).
+
+    dataset() devuelve un tf.data.Dataset de UNA época que se construye al
+    crear cada iterador. Sin más, el stream avanza una época por iterador.
+    Con un StreamPositionCallback asociado (position), la época y los
+    batches a saltar los fija el contador del callback, que solo avanza al
+    terminar cada época de entrenamiento (no con evaluate ni con cada fit).
+    """
+
+    def __init__(self, shard_dir, split='train', batch_size=32, target_size=(100, 100),
+                 shuffle=False, augment=False, worker_index=0, num_workers=1,
+                 cycle_length=8, shuffle_buffer=4096, seed=42):
+        self.index = load_shard_index(shard_dir)
+        self.class_names = self.index['class_names']
+        self.num_classes = self.index['num_classes']
+        shards = self.index['splits'][split]['shards']
+        if num_workers > 1 and len(shards) < num_workers:
+            raise ValueError(f"❌ {len(shards)} shards de {split} para {num_workers} workers")
+        self.shards = shards[worker_index::num_workers]
+        self.files = [os.path.join(shard_dir, s['file']) for s in self.shards]
+        self.samples = sum(s['num_records'] for s in self.shards)
+        self.batch_size = batch_size
+        self.target_size = tuple(target_size)
+        self.shuffle = shuffle
+        self.augment = augment
+        self.cycle_length = max(min(cycle_length, len(self.files)), 1)
+        self.shuffle_buffer = shuffle_buffer
+        self.seed = seed
+        self.epoch = 0
+        self.position = None  # StreamPositionCallback, si lo hay
+
+    def __len__(self):
+        return int(np.ceil(self.samples / self.batch_size))
+
+    def _next_epoch(self):
+        if self.position is not None:
+            return (np.int64(self.position.epoch),
+                    np.int64(self.position.batches * self.batch_size))
+        self.epoch += 1
+        return np.int64(self.epoch - 1), np.int64(0)
+
+    def _epoch_records(self, epoch, skip_records):
+        """Registros serializados de una época (orden determinista)"""
+        epoch_seed = tf.cast(self.seed, tf.int64) + epoch
+        files = tf.data.Dataset.from_tensor_slices(self.files)
+        if self.shuffle:
+            files = files.shuffle(len(self.files), seed=epoch_seed,
+                                  reshuffle_each_iteration=False)
+        # Varios shards abiertos a la vez: lecturas secuenciales grandes en paralelo
+        records = files.interleave(
+            lambda f: tf.data.TFRecordDataset(f, buffer_size=8 * 2**20),
+            cycle_length=self.cycle_length,
+            num_parallel_calls=tf.data.AUTOTUNE,
+            deterministic=True
+        )
+        if self.shuffle:
+            records = records.shuffle(self.shuffle_buffer, seed=epoch_seed,
+                                      reshuffle_each_iteration=False)
+        return records.skip(skip_records)
+
+    def _parse(self, serialized):
+        features = tf.io.parse_single_example(serialized, {
+            'image': tf.io.FixedLenFeature([], tf.string),
+            'label': tf.io.FixedLenFeature([], tf.int64),
+        })
+        image = tf.io.decode_image(features['image'], channels=3, expand_animations=False)
+        image = tf.image.resize(image, self.target_size, method='nearest')
+        return tf.cast(image, tf.float32) / 255.0, tf.one_hot(features['label'], self.num_classes)
+
+    def dataset(self):
+        """
+        tf.data.Dataset DE UNA ÉPOCA (x en [0, 1], y one-hot)
+
+        Retorna:
+        --------
+        tf.data.Dataset
+        """
+        autotune = tf.data.AUTOTUNE
+        start = tf.data.Dataset.from_tensors(0).map(
+            lambda _: tf.numpy_function(self._next_epoch, [], (tf.int64, tf.int64))
+        )
+        ds = start.flat_map(self._epoch_records)
+        ds = ds.map(self._parse, num_parallel_calls=autotune, deterministic=True)
+        ds = ds.batch(self.batch_size)
+        if self.augment:
+            from preprocess_data import build_augmentation_layers
+            augmentation = build_augmentation_layers(self.seed)
+            ds = ds.map(lambda x, y: (augmentation(x, training=True), y))
+        return ds.prefetch(autotune)
+
+class StreamPositionCallback(tf.keras.callbacks.Callback):
+    """
+    POSICIÓN DEL STREAM DE ENTRENAMIENTO (época, batches consumidos)
+    ================================================================
+    El callback es dueño del contador: la época avanza en on_epoch_end y
+    sigue entre llamadas a fit (fase 1 y etapas de fine-tuning), y el
+    ShardedStream asociado lo lee al crear cada iterador.
+
+    Cada `every` batches y al final de cada época guarda la posición en
+    JSON. Con checkpoints (CheckpointManager) guarda además el modelo en
+    model_path y escribe la posición solo cuando ese archivo ya está en
+    disco, así posición y pesos siempre corresponden.
+    """
+
+    def __init__(self, path, stream, every=500, checkpoints=None, model_path=None):
+        super().__init__()
+        self.path = path
+        self.every = every
+        self.checkpoints = checkpoints
+        self.model_path = model_path
+        self.epoch = 0
+        self.batches = 0
+        stream.position = self
+
+    def resume(self, epoch, batches_done=0):
+        """El siguiente iterador del stream empieza en `epoch`, saltando batches_done"""
+        self.epoch, self.batches = int(epoch), int(batches_done)
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.batches += 1
+        if self.every and self.batches % self.every == 0:
+            self._save()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.epoch, self.batches = self.epoch + 1, 0
+        self._save()
+
+    def _save(self):
+        position = {'epoch': self.epoch, 'batches_done': self.batches}
+        if self.checkpoints is None:
+            _write_position(self.path, position)
+            return
+        position['model'] = self.model_path
+        self.checkpoints.save(self.model, self.epoch, path=self.model_path,
+                              on_written=lambda: _write_position(self.path, position))
+
+def _write_position(path, position):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(position, f)
+    os.replace(tmp_path, path)
+
+def load_stream_position(path):
+    """
+    POSICIÓN GUARDADA POR StreamPositionCallback
+
+    Retorna:
+    --------
+    dict o None: {'epoch', 'batches_done'} (y 'model' si se guardaron pesos)
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def worker_steps(shard_dir, split, num_workers, batch_size):
+    """Batches por época que TODOS los workers pueden completar con sus shards"""
+    shards = load_shard_index(shard_dir)['splits'][split]['shards']
+    records = min(sum(s['num_records'] for s in shards[w::num_workers])
+                  for w in range(num_workers))
+    return max(records // batch_size, 1)
+
+def load_shard_data(shard_dir, batch_size=32, target_size=(100, 100),
+                    augment_training=True, seed=42, worker_index=0, num_workers=1,
+                    return_streams=False):
+    """
+    CARGA TRAIN/VAL/TEST DESDE LOS SHARDS
+    Los shards de train se reparten entre workers (worker_index::num_workers).
+
+    Retorna:
+    --------
+    tuple: (train_ds, val_ds, test_ds, class_names, num_classes); con
+           return_streams=True, los ShardedStream en lugar de sus
+           dataset() (para StreamPositionCallback)
+    """
+    train = ShardedStream(shard_dir, 'train', batch_size, target_size, shuffle=True,
+                          augment=augment_training, worker_index=worker_index,
+                          num_workers=num_workers, seed=seed)
+    val = ShardedStream(shard_dir, 'val', batch_size, target_size)
+    test = ShardedStream(shard_dir, 'test', batch_size, target_size)
+
+    print(f"\n✅ Shards TFRecord: {shard_dir}")
+    print(f"   - Ejemplos de entrenamiento: {train.samples} ({len(train.files)} shards)")
+    print(f"   - Ejemplos de validación: {val.samples}")
+    print(f"   - Ejemplos de prueba: {test.samples}")
+
+    if return_streams:
+        return train, val, test, train.class_names, train.num_classes
+    return train.dataset(), val.dataset(), test.dataset(), train.class_names, train.num_classes
+
+# ==============================================================================
+# EJECUCIÓN PRINCIPAL
+# ==============================================================================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data_dir', type=str,
+                        default="../data_raw/fruits-360_original-size/fruits-360")
+    parser.add_argument('--output_dir', type=str,
+                        default="../data_shards/fruits-360_original-size")
+    parser.add_argument('--target_size', type=int, default=None,
+                        help='Lado al que redimensionar (por defecto JPEG originales)')
+    parser.add_argument('--shard_size_mb', type=float, default=150)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--dedup', action='store_true')
+    parser.add_argument('--overwrite', action='store_true')
+
+    args = parser.parse_args()
+
+    write_tfrecord_shards(
+        data_dir=args.data_dir,
+        output_dir=args.output_dir,
+        target_size=(args.target_size, args.target_size) if args.target_size else None,
+        shard_size_mb=args.shard_size_mb,
+        dedup=args.dedup,
+        num_workers=args.workers,
+        overwrite=args.overwrite
+    )
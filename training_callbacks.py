@@ -0,0 +1,273 @@
+"""
+CALLBACKS DE MEDICIÓN DEL ENTRENAMIENTO
+=======================================
+Callbacks de Keras para medir tiempos de paso y throughput, de forma que
+distintas configuraciones (precisión, backend de datos, ...) se puedan
+comparar directamente.
+"""
+
+import os
+import sys
+import json
+import time
+from datetime import datetime
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.callbacks import Callback
+
+class StepTimeCallback(Callback):
+    """
+    TIEMPO POR PASO DE ENTRENAMIENTO
+    Guarda la duración de cada batch (sin el primero de cada época, que
+    incluye el trazado de tf.function) y el tiempo total por época.
+    """
+
+    def __init__(self, batch_size=None):
+        super().__init__()
+        self.batch_size = batch_size
+        self.step_times = []
+        self.epoch_times = []
+        self._step_start = None
+        self._epoch_start = None
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.epoch_times.append(time.perf_counter() - self._epoch_start)
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self._step_start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        if batch > 0:
+            self.step_times.append(time.perf_counter() - self._step_start)
+
+    def summary(self):
+        """Resumen: ms por paso (media/p50/p90), imágenes/s y segundos por época"""
+        if not self.step_times:
+            return {}
+        steps = np.array(self.step_times)
+        result = {
+            'steps': len(steps),
+            'step_ms_mean': round(float(steps.mean() * 1000), 3),
+            'step_ms_p50': round(float(np.percentile(steps, 50) * 1000), 3),
+            'step_ms_p90': round(float(np.percentile(steps, 90) * 1000), 3),
+            'epoch_seconds': [round(t, 2) for t in self.epoch_times],
+        }
+        if self.batch_size:
+            result['images_per_sec'] = round(self.batch_size / float(steps.mean()), 1)
+        return result
+
+class ExperimentLogger(Callback):
+    """
+    MÉTRICAS POR ÉPOCA AL ALMACÉN DE EXPERIMENTOS
+    Escribe cada época al terminarla (una ejecución interrumpida conserva
+    lo ya entrenado). La numeración de épocas sigue entre llamadas a fit,
+    así que la fase 1 y el fine-tuning forman un único historial; cambiar
+    phase antes de cada fit etiqueta sus épocas.
+    """
+
+    def __init__(self, store, run_id, phase='head'):
+        super().__init__()
+        self.store = store
+        self.run_id = run_id
+        self.phase = phase
+        self.epoch = 0
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.store.log_epoch(self.run_id, self.epoch, logs, self.phase)
+        self.epoch += 1
+
+def current_rss_mb():
+    """Memoria residente (RSS) actual del proceso en MB"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, IndexError):
+        # Fuera de Linux: pico de RSS (ru_maxrss en KB en Linux, bytes en macOS)
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+class ThroughputProfiler(Callback):
+    """
+    PERFILADO POR PASO: ESPERA DE DATOS VS CÓMPUTO
+    ==============================================
+    En tf.keras la lectura del siguiente batch ocurre dentro de
+    train_function, así que el callback envuelve esa función durante el
+    entrenamiento: saca el batch del iterador fuera del grafo (tiempo de
+    espera de datos) y ejecuta model.train_step compilado (tiempo de
+    cómputo). Con más de una réplica solo se mide el tiempo total.
+
+    Por paso guarda: espera de datos, cómputo, imágenes/s y RSS.
+    Opcionalmente captura una traza de TensorBoard Profiler para los pasos
+    profile_steps=(inicio, fin) (contados desde el inicio del fit).
+
+    Parámetros:
+    -----------
+    batch_size : int
+        Tamaño de batch (para imágenes/s si el batch no se puede medir)
+    profile_steps : tuple o None
+        Ventana de pasos a trazar con tf.profiler
+    profile_dir : str
+        Directorio de logs de TensorBoard
+    rss_every : int
+        Cada cuántos pasos se mide la memoria
+    """
+
+    def __init__(self, batch_size=None, profile_steps=None,
+                 profile_dir="training_results/profile", rss_every=10):
+        super().__init__()
+        self.batch_size = batch_size
+        self.profile_steps = profile_steps
+        self.profile_dir = profile_dir
+        self.rss_every = max(int(rss_every), 1)
+        self.records = []
+        self._original_train_function = None
+        self._pending = None
+        self._global_step = 0
+        self._tracing = False
+        self._step_start = None
+
+    # -- Envoltura de train_function --------------------------------------
+    def _wrap_train_function(self):
+        model = self.model
+        if model.distribute_strategy.num_replicas_in_sync != 1 or \
+                getattr(model, '_steps_per_execution', None) is not None and \
+                int(model._steps_per_execution.numpy()) != 1:
+            return
+        self._original_train_function = model.train_function
+        step_fn = tf.function(model.train_step, reduce_retracing=True)
+        counter = getattr(model, '_train_counter', None)
+
+        def profiled_train_function(iterator):
+            wait_start = time.perf_counter()
+            data = next(iterator)
+            compute_start = time.perf_counter()
+            logs = step_fn(data)
+            # Forzar la sincronización para medir el cómputo real
+            tf.nest.map_structure(lambda t: t.numpy(), logs)
+            end = time.perf_counter()
+            if counter is not None:
+                counter.assign_add(1)
+            self._pending = (compute_start - wait_start, end - compute_start,
+                             _batch_length(data))
+            return logs
+
+        model.train_function = profiled_train_function
+
+    def on_train_begin(self, logs=None):
+        self._wrap_train_function()
+
+    def on_train_end(self, logs=None):
+        if self._original_train_function is not None:
+            self.model.train_function = self._original_train_function
+            self._original_train_function = None
+        self._stop_trace()
+
+    # -- Ventana del profiler ---------------------------------------------
+    def _start_trace(self):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        tf.profiler.experimental.start(self.profile_dir)
+        self._tracing = True
+        print(f"🔬 Trazando pasos {self.profile_steps[0]}-{self.profile_steps[1]} "
+              f"→ {self.profile_dir}")
+
+    def _stop_trace(self):
+        if self._tracing:
+            tf.profiler.experimental.stop()
+            self._tracing = False
+
+    # -- Pasos ------------------------------------------------------------
+    def on_train_batch_begin(self, batch, logs=None):
+        if self.profile_steps and self._global_step == self.profile_steps[0]:
+            self._start_trace()
+        self._pending = None
+        self._step_start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        total = time.perf_counter() - self._step_start
+        record = {'step': self._global_step, 'total_ms': total * 1000}
+        if self._pending is not None:
+            data_wait, compute, images = self._pending
+            record['data_wait_ms'] = data_wait * 1000
+            record['compute_ms'] = compute * 1000
+        else:
+            images = self.batch_size
+        if images:
+            record['images'] = images
+            record['images_per_sec'] = images / total
+        if self._global_step % self.rss_every == 0:
+            record['rss_mb'] = current_rss_mb()
+        # El primer paso de cada fit incluye el trazado de tf.function
+        record['warmup'] = batch == 0
+        self.records.append(record)
+
+        if self.profile_steps and self._global_step == self.profile_steps[1]:
+            self._stop_trace()
+        self._global_step += 1
+
+    # -- Resumen ----------------------------------------------------------
+    def summary(self):
+        """
+        RESUMEN DE THROUGHPUT
+
+        Retorna:
+        --------
+        dict: ms por paso, % de espera de datos, imágenes/s, RSS y
+              diagnóstico ('input-bound' / 'compute-bound')
+        """
+        steps = [r for r in self.records if not r['warmup']]
+        if not steps:
+            return {}
+        total = np.array([r['total_ms'] for r in steps])
+        result = {
+            'steps': len(steps),
+            'step_ms_mean': round(float(total.mean()), 3),
+            'step_ms_p50': round(float(np.percentile(total, 50)), 3),
+            'step_ms_p90': round(float(np.percentile(total, 90)), 3),
+        }
+        images = sum(r.get('images', 0) for r in steps)
+        if images:
+            result['images_per_sec'] = round(images / (total.sum() / 1000), 1)
+        waits = [r['data_wait_ms'] for r in steps if 'data_wait_ms' in r]
+        if waits:
+            compute = np.array([r['compute_ms'] for r in steps if 'compute_ms' in r])
+            waits = np.array(waits)
+            wait_fraction = float(waits.sum() / (waits.sum() + compute.sum()))
+            result.update({
+                'data_wait_ms_mean': round(float(waits.mean()), 3),
+                'data_wait_ms_p90': round(float(np.percentile(waits, 90)), 3),
+                'compute_ms_mean': round(float(compute.mean()), 3),
+                'data_wait_fraction': round(wait_fraction, 4),
+                'bottleneck': 'input-bound' if wait_fraction > 0.2 else 'compute-bound',
+            })
+        rss = [r['rss_mb'] for r in self.records if 'rss_mb' in r]
+        if rss:
+            result['rss_mb_start'] = round(rss[0], 1)
+            result['rss_mb_peak'] = round(max(rss), 1)
+        if self.profile_steps:
+            result['profile_dir'] = self.profile_dir
+        return result
+
+    def save(self, results_dir="training_results", timestamp=None):
+        """Guarda resumen y registros por paso en results_dir/throughput_<ts>.json"""
+        os.makedirs(results_dir, exist_ok=True)
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(results_dir, f"throughput_{timestamp}.json")
+        with open(path, 'w') as f:
+            json.dump({'summary': self.summary(),
+                       'steps': [{k: round(v, 3) if isinstance(v, float) else v
+                                  for k, v in r.items()} for r in self.records]},
+                      f, indent=2)
+        print(f"💾 Perfil de throughput: {path}")
+        return path
+
+def _batch_length(data):
+    """Número de ejemplos del batch (x, y) o x"""
+    x = data[0] if isinstance(data, (tuple, list)) else data
+    first = tf.nest.flatten(x)[0]
+    return int(first.shape[0]) if first.shape.rank and first.shape[0] is not None \
+        else int(tf.shape(first)[0])
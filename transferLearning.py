@@ -5,127 +5,466 @@ Usa una red pre-entrenada para entrenar en minutos instead de horas
 """
 
 import tensorflow as tf
-from tensorflow.keras.applications import EfficientNetB0, MobileNetV2, ResNet50
 from tensorflow.keras.models import Model
 from tensorflow.keras.layers import Dense, GlobalAveragePooling2D, Dropout
 from tensorflow.keras.optimizers import Adam
-from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
+from tensorflow.keras.callbacks import EarlyStopping
 from preprocess_data import preprocess_fruit360_data
+from training_callbacks import StepTimeCallback, ThroughputProfiler, ExperimentLogger
+from experiment_store import ExperimentStore, dataset_manifest_hash, DEFAULT_DB
+from checkpoint_manager import CheckpointManager, AsyncCheckpoint, run_checkpoint_dir
+from evaluation import evaluate_models, keras_predict_fn, save_evaluation, print_evaluation
 import numpy as np
+import json
+import os
+import time
+from datetime import datetime
 
-def create_transfer_learning_model(base_model_name='EfficientNetB0', num_classes=208):
+# Políticas de precisión soportadas (tf.keras.mixed_precision)
+PRECISIONS = ('float32', 'mixed_bfloat16')
+
+def create_base_model(base_model_name='EfficientNetB0', input_shape=(100, 100, 3),
+                      weights='imagenet'):
     """
-    CREA MODELO DE TRANSFER LEARNING
+    CREA EL MODELO BASE PRE-ENTRENADO (SIN CABEZA)
+    weights=None crea la arquitectura sin descargar pesos (benchmarks)
     """
-    print(f"🧠 Creando modelo de transfer learning con {base_model_name}")
-    
     # Seleccionar modelo base pre-entrenado
     if base_model_name == 'EfficientNetB0':
+        from tensorflow.keras.applications import EfficientNetB0
         base_model = EfficientNetB0(
-            weights='imagenet',
+            weights=weights,
             include_top=False,
-            input_shape=(100, 100, 3)
+            input_shape=input_shape
         )
     elif base_model_name == 'MobileNetV2':
+        from tensorflow.keras.applications import MobileNetV2
         base_model = MobileNetV2(
-            weights='imagenet',
+            weights=weights,
             include_top=False,
-            input_shape=(100, 100, 3)
+            input_shape=input_shape
         )
     elif base_model_name == 'ResNet50':
+        from tensorflow.keras.applications import ResNet50
         base_model = ResNet50(
-            weights='imagenet',
+            weights=weights,
             include_top=False,
-            input_shape=(100, 100, 3)
+            input_shape=input_shape
         )
     else:
         raise ValueError("Modelo no soportado")
     
-    # Congelar capas del modelo base
-    base_model.trainable = False
-    
-    # Añadir capas personalizadas
-    x = base_model.output
-    x = GlobalAveragePooling2D()(x)
-    x = Dense(512, activation='relu')(x)
-    x = Dropout(0.5)(x)
-    predictions = Dense(num_classes, activation='softmax')(x)
-    
-    # Modelo final
-    model = Model(inputs=base_model.input, outputs=predictions)
-    
-    # Compilar
+    return base_model
+
+def build_classification_head(x, num_classes):
+    """
+    CAPAS PERSONALIZADAS SOBRE LAS FEATURES DEL MODELO BASE
+    Los nombres de las capas permiten copiar pesos entre modelos
+    """
+    x = Dense(512, activation='relu', name='head_dense')(x)
+    x = Dropout(0.5, name='head_dropout')(x)
+    # La softmax final siempre en float32 (estable con precisión mixta)
+    return Dense(num_classes, activation='softmax', name='predictions', dtype='float32')(x)
+
+def compile_model(model, learning_rate=0.001):
+    """Compila con Adam y las métricas del proyecto"""
     model.compile(
-        optimizer=Adam(learning_rate=0.001),
+        optimizer=Adam(learning_rate=learning_rate),
         loss='categorical_crossentropy',
         metrics=['accuracy', 'top_k_categorical_accuracy']
     )
+    return model
+
+def create_transfer_learning_model(base_model_name='EfficientNetB0', num_classes=208,
+                                   precision='float32', learning_rate=0.001,
+                                   weights='imagenet', input_shape=(100, 100, 3)):
+    """
+    CREA MODELO DE TRANSFER LEARNING
+    
+    precision='mixed_bfloat16' construye el modelo con la política de
+    precisión mixta de Keras (cómputo bf16, pesos y softmax en float32).
+    input_shape=(None, None, 3) acepta cualquier resolución (ver
+    progressive_resizing.py).
+    """
+    print(f"🧠 Creando modelo de transfer learning con {base_model_name}")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Precisión no soportada: {precision}")
+    
+    # La política solo afecta a las capas que se crean mientras está activa
+    previous_policy = tf.keras.mixed_precision.global_policy()
+    tf.keras.mixed_precision.set_global_policy(precision)
+    try:
+        base_model = create_base_model(base_model_name, input_shape=input_shape,
+                                       weights=weights)
+        
+        # Congelar capas del modelo base
+        base_model.trainable = False
+        
+        # Añadir capas personalizadas
+        x = base_model.output
+        x = GlobalAveragePooling2D(name='head_pool')(x)
+        predictions = build_classification_head(x, num_classes)
+        
+        # Modelo final
+        model = Model(inputs=base_model.input, outputs=predictions)
+    finally:
+        tf.keras.mixed_precision.set_global_policy(previous_policy)
+    
+    # Compilar
+    compile_model(model, learning_rate=learning_rate)
     
     return model
 
-def train_transfer_learning(epochs=10, batch_size=64, base_model='EfficientNetB0'):
+def apply_precision(model, precision='mixed_bfloat16'):
+    """
+    CAMBIA LA PRECISIÓN DE UN MODELO YA ENTRENADO (PARA INFERENCIA)
+    Clona el modelo con la política indicada en todas las capas salvo la
+    entrada y la softmax final (float32) y copia los pesos.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Precisión no soportada: {precision}")
+    
+    def clone_layer(layer):
+        config = layer.get_config()
+        if not isinstance(layer, tf.keras.layers.InputLayer) and layer.name != 'predictions':
+            config['dtype'] = precision
+        return layer.__class__.from_config(config)
+    
+    clone = tf.keras.models.clone_model(model, clone_function=clone_layer)
+    clone.set_weights(model.get_weights())
+    return clone
+
+def predict_images(model, images, batch_size=256, precision=None):
+    """
+    PREDICCIÓN (OPCIONALMENTE EN OTRA PRECISIÓN)
+    Devuelve probabilidades float32 (batch, num_classes)
+    """
+    if precision is not None:
+        model = apply_precision(model, precision)
+    return np.asarray(model.predict(images, batch_size=batch_size, verbose=0), dtype=np.float32)
+
+def save_run_summary(summary, results_dir="training_results"):
+    """Guarda el resumen de la ejecución (precisión, tiempos, accuracy) en JSON"""
+    os.makedirs(results_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(results_dir, f"run_summary_{timestamp}.json")
+    with open(path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f"💾 Resumen de la ejecución: {path}")
+    return path
+
+def train_transfer_learning(epochs=10, batch_size=64, base_model='EfficientNetB0',
+                            backend='keras', packed_dir="../data_packed/fruits-360_100x100",
+                            feature_cache=False, augmented_views=0,
+                            dedup=False, max_per_cluster=None,
+                            fine_tune_stages="2:1e-4:2,4:5e-5:2",
+                            precision='float32', profile_steps=None,
+                            profile_throughput=False,
+                            shard_dir="../data_shards/fruits-360_original-size",
+                            data_dir="../data_raw/fruits-360_100x100/fruits-360",
+                            experiment_db=DEFAULT_DB, checkpoint_dir="checkpoints",
+                            checkpoint_format='keras', keep_last=2, keep_best=1,
+                            importance_sampling=False, progressive=None, resume_dir=None,
+                            stream_save_every=500, hash_dataset=False):
     """
     ENTRENAMIENTO CON TRANSFER LEARNING
+    
+    Con feature_cache=True (requiere backend='packed') la fase 1 entrena la
+    cabeza sobre features del modelo base calculadas una sola vez y
+    guardadas en disco (ver feature_cache.py).
+    
+    fine_tune_stages define las etapas de fine-tuning como
+    "bloques:lr:épocas,..." (o "none"); ver fine_tuning.py.
+    
+    precision: 'float32' o 'mixed_bfloat16' (CPUs con AMX/AVX-512 bf16).
+    El tiempo por paso y la accuracy se guardan en training_results/ para
+    comparar ejecuciones. Con profile_throughput=True (o profile_steps) se
+    guarda además el perfil de throughput de la fase 1 (espera de datos vs
+    cómputo, imágenes/s, RSS); ese perfilador sustituye train_function, así
+    que por defecto no se instala. profile_steps=(a, b) captura además una
+    traza de TensorBoard Profiler de esos pasos.
+    
+    Cada ejecución se registra en experiment_db (ver experiment_store.py):
+    hiperparámetros, huella del dataset, métricas por época y por paso,
+    throughput y artefactos. La huella del dataset no lee las imágenes
+    salvo con hash_dataset=True (ver dataset_manifest_hash).
+    
+    Los checkpoints se escriben en segundo plano en formato .keras o
+    SavedModel (checkpoint_format) dentro de checkpoint_dir/run_<id>/,
+    conservando los keep_last últimos y los keep_best mejores por val_loss
+    (ver checkpoint_manager.py).
+    
+    importance_sampling=True (requiere backend='packed') sortea los lotes
+    a favor de los ejemplos con más loss, con suelo uniforme y pesos de
+    corrección (ver importance_sampling.py).
+    
+    Con backend='tfrecord' la posición del stream de entrenamiento (época y
+    batches consumidos) se guarda cada stream_save_every batches junto a
+    una copia del modelo en run_<id>/resume.keras. resume_dir (el
+    checkpoint_dir/run_<id> de una ejecución interrumpida) recupera esos
+    pesos y continúa la fase 1 en la misma época y batch; las etapas de
+    fine-tuning se repiten completas.
+    
+    progressive="64:3,100:5" sustituye epochs en la fase 1 por etapas de
+    resolución creciente "lado:épocas,..." con un modelo de entrada
+    variable; la última etapa fija la resolución de fine-tuning, val y
+    test (ver progressive_resizing.py).
     """
     print("🍎 TRANSFER LEARNING - FRUIT360")
     print("=" * 50)
     
+    schedule = None
+    final_size = 100
+    if progressive:
+        if feature_cache:
+            raise ValueError("❌ progressive no es compatible con feature_cache")
+        from progressive_resizing import (parse_schedule, make_stage_loader, at_final_size,
+                                          train_progressive, with_fixed_input)
+        schedule = parse_schedule(progressive) if isinstance(progressive, str) else progressive
+        final_size = schedule[-1][0]
+    
     # 1. Cargar datos
     print("📥 Cargando datos...")
-    train_gen, val_gen, test_gen, classes, num_classes = preprocess_fruit360_data(
-        batch_size=batch_size
-    )
+    train_stream = None
+    if backend == 'tfrecord' and not schedule:
+        # Se conserva el stream de train para guardar/reanudar su posición
+        from tfrecord_shards import load_shard_data
+        train_stream, val_gen, test_gen, classes, num_classes = load_shard_data(
+            shard_dir, batch_size=batch_size, target_size=(final_size, final_size),
+            return_streams=True)
+        train_gen, val_gen, test_gen = train_stream.dataset(), val_gen.dataset(), test_gen.dataset()
+    else:
+        if resume_dir:
+            raise ValueError("❌ resume_dir requiere backend='tfrecord' sin progressive")
+        train_gen, val_gen, test_gen, classes, num_classes = preprocess_fruit360_data(
+            data_dir=data_dir,
+            # packed + progressive: se carga lo empaquetado y at_final_size redimensiona
+            target_size=None if schedule and backend == 'packed' else (final_size, final_size),
+            batch_size=batch_size,
+            backend=backend,
+            packed_dir=packed_dir,
+            dedup=dedup,
+            max_per_cluster=max_per_cluster,
+            shard_dir=shard_dir
+        )
+    
+    sample_refresher = None
+    if importance_sampling:
+        if backend != 'packed' or feature_cache:
+            raise ValueError("❌ importance_sampling requiere backend='packed' sin feature_cache")
+        from importance_sampling import build_importance_sampler
+        train_gen, sample_refresher = build_importance_sampler(train_gen, batch_size)
+    if schedule:
+        stage_data = make_stage_loader(train_gen, backend, batch_size, {
+            'data_dir': data_dir, 'packed_dir': packed_dir, 'shard_dir': shard_dir,
+            'dedup': dedup, 'max_per_cluster': max_per_cluster},
+            # Fuera de packed train_gen ya se cargó a la resolución final
+            initial=None if backend == 'packed' else {final_size: train_gen})
+        train_gen = stage_data(final_size)
+        val_gen, test_gen = at_final_size(val_gen, final_size), at_final_size(test_gen, final_size)
     
-    # 2. Crear modelo
-    model = create_transfer_learning_model(base_model, num_classes)
+    # 2. Crear modelo (entrada variable en modo progresivo)
+    model = create_transfer_learning_model(
+        base_model, num_classes, precision=precision,
+        input_shape=(None, None, 3) if schedule else (final_size, final_size, 3))
     model.summary()
     
-    # 3. Callbacks
+    # 3. Registro del experimento y callbacks
+    store = ExperimentStore(experiment_db)
+    dataset_root = {'packed': packed_dir, 'tfrecord': shard_dir}.get(backend, data_dir)
+    run_id = store.start_run(base_model, params={
+        'epochs': epochs,
+        'batch_size': batch_size,
+        'backend': backend,
+        'data_dir': dataset_root,
+        'feature_cache': feature_cache,
+        'augmented_views': augmented_views,
+        'dedup': dedup,
+        'max_per_cluster': max_per_cluster,
+        'fine_tune_stages': fine_tune_stages,
+        'precision': precision,
+        'learning_rate': 0.001,
+        'num_classes': num_classes,
+        'importance_sampling': importance_sampling,
+        'progressive': [list(stage) for stage in schedule] if schedule else None,
+        'resume_dir': resume_dir,
+    }, dataset_hash=dataset_manifest_hash(dataset_root, content=hash_dataset))
+    print(f"🧪 Experimento {run_id} → {experiment_db}")
+    
+    step_timer = StepTimeCallback(batch_size=batch_size)
+    profiler = None
+    if profile_throughput or profile_steps:
+        profiler = ThroughputProfiler(batch_size=batch_size, profile_steps=profile_steps)
+    experiment_logger = ExperimentLogger(store, run_id, phase='head')
+    run_dir = run_checkpoint_dir(checkpoint_dir, run_id)
+    checkpoints = CheckpointManager(run_dir, keep_last=keep_last, keep_best=keep_best,
+                                    save_format=checkpoint_format)
+    checkpoint_callback = AsyncCheckpoint(checkpoints)
     callbacks = [
         EarlyStopping(patience=5, restore_best_weights=True),
-        ModelCheckpoint('transfer_learning_best.h5', save_best_only=True)
+        checkpoint_callback,
+        step_timer,
+        experiment_logger
     ]
+    if profiler is not None:
+        callbacks.append(profiler)
+    # Los que siguen activos en el fine-tuning
+    fine_tune_callbacks = [experiment_logger, checkpoint_callback]
+    if sample_refresher is not None:
+        callbacks.append(sample_refresher)
+        fine_tune_callbacks.append(sample_refresher)
+    initial_epoch = 0
+    if train_stream is not None:
+        from tfrecord_shards import StreamPositionCallback, load_stream_position
+        stream_position = StreamPositionCallback(
+            os.path.join(run_dir, 'stream_position.json'), train_stream,
+            every=stream_save_every, checkpoints=checkpoints,
+            model_path=os.path.join(run_dir, 'resume.keras'))
+        callbacks.append(stream_position)
+        fine_tune_callbacks.append(stream_position)
+        position = load_stream_position(os.path.join(resume_dir, 'stream_position.json')) \
+            if resume_dir else None
+        if resume_dir and position is None:
+            raise ValueError(f"❌ No hay stream_position.json en {resume_dir}")
+        if position:
+            model.set_weights(tf.keras.models.load_model(position['model'],
+                                                         compile=False).get_weights())
+            stream_position.resume(position['epoch'], position['batches_done'])
+            initial_epoch = min(position['epoch'], epochs)
+            checkpoint_callback.epoch = experiment_logger.epoch = initial_epoch
+            print(f"⏯️  Reanudando en la época {position['epoch'] + 1}, "
+                  f"batch {position['batches_done']} ({resume_dir})")
+    try:
+        # 4. Entrenar solo las capas nuevas (rápido)
+        print("🚀 Entrenando capas nuevas...")
+        if feature_cache:
+            if backend != 'packed':
+                raise ValueError("❌ feature_cache requiere backend='packed'")
+            from feature_cache import compute_bottleneck_features, train_head_on_features
+            cache_dir = compute_bottleneck_features(
+                base_model, packed_dir,
+                augmented_views=augmented_views
+            )
+            history = train_head_on_features(
+                model, cache_dir,
+                epochs=epochs,
+                batch_size=batch_size
+            )
+            experiment_logger.epoch = store.log_history(run_id, history.history, phase='head')
+        elif schedule:
+            history, resolution_stages = train_progressive(
+                model, schedule, stage_data, val_gen,
+                callbacks=callbacks,
+                batch_size=batch_size
+            )
+        else:
+            history = model.fit(
+                train_gen,
+                initial_epoch=initial_epoch,
+                epochs=epochs,
+                validation_data=val_gen,
+                callbacks=callbacks,
+                verbose=2  # Métricas por época
+            )
+        
+        # 5. Fine-tuning por etapas (descongela los bloques superiores del modelo base)
+        from fine_tuning import fine_tune_in_stages, parse_stages
+        if isinstance(fine_tune_stages, str):
+            fine_tune_stages = parse_stages(fine_tune_stages)
+        if fine_tune_stages:
+            experiment_logger.phase = 'fine_tune'
+            fine_tune_in_stages(
+                model, base_model, train_gen, val_gen,
+                stages=fine_tune_stages,
+                callbacks=fine_tune_callbacks
+            )
+        
+        # 6. Evaluar (una pasada: accuracy, top-5 y matriz de confusión)
+        print("📊 Evaluando modelo...")
+        eval_start = time.time()
+        evaluators, _ = evaluate_models({base_model: keras_predict_fn(model)}, test_gen,
+                                        num_classes, top_k=(5,), report_every=0)
+        evaluation = evaluators[base_model].summary(classes)
+        eval_seconds = time.time() - eval_start
+        results = [evaluation['loss'], evaluation['accuracy'], evaluation['top5_accuracy']]
+        print(f"Test accuracy: {results[1]:.4f}")
+        print(f"Top-5 accuracy: {results[2]:.4f}")
+    except BaseException:
+        store.finish_run(run_id, status='failed',
+                         throughput=profiler.summary() if profiler else None,
+                         artifacts={'checkpoint_dir': run_dir})
+        try:
+            checkpoints.close()
+        except Exception as e:
+            print(f"⚠️  Error escribiendo checkpoints: {e}")
+        raise
     
-    # 4. Entrenar solo las capas nuevas (rápido)
-    print("🚀 Entrenando capas nuevas...")
-    history = model.fit(
-        train_gen,
-        epochs=epochs,
-        validation_data=val_gen,
-        callbacks=callbacks,
-        verbose=2  # Métricas por época
-    )
-    
-    # 5. Fine-tuning (opcional)
-    print("🔧 Fine-tuning (opcional)...")
-    # Descongelar algunas capas
-    base_model = model.layers[0]
-    base_model.trainable = True
-    
-    # Recompilar con learning rate más bajo
-    model.compile(
-        optimizer=Adam(learning_rate=0.0001),
-        loss='categorical_crossentropy',
-        metrics=['accuracy']
-    )
+    step_summary = step_timer.summary()
+    if step_summary:
+        print(f"⏱️  Precisión {precision}: {step_summary['step_ms_mean']:.1f} ms/paso "
+              f"({step_summary.get('images_per_sec', 0):.0f} img/s)")
+    if profiler is not None:
+        throughput = profiler.summary()
+    else:
+        # Sin perfilador: imágenes/s del StepTimeCallback para comparar ejecuciones
+        throughput = {}
+        if step_summary and step_summary.get('images_per_sec') is not None:
+            throughput['images_per_sec'] = step_summary['images_per_sec']
+    if 'bottleneck' in throughput:
+        print(f"⚡ {throughput['data_wait_fraction']:.0%} del paso esperando datos "
+              f"→ {throughput['bottleneck']}")
+    artifacts = {'checkpoint_dir': run_dir}
+    if profiler and profiler.records:
+        artifacts['throughput'] = profiler.save()
+        store.log_steps(run_id, profiler.records)
+    if 'profile_dir' in throughput:
+        artifacts['profile_dir'] = throughput['profile_dir']
+    artifacts['evaluation'] = save_evaluation(evaluators, {}, classes)
+    print_evaluation(base_model, evaluation, top_pairs=5, worst=5)
     
-    # Entrenar un poco más
-    history_ft = model.fit(
-        train_gen,
-        epochs=5,
-        validation_data=val_gen,
-        verbose=2
-    )
+    # 7. Guardar (en segundo plano; fruit360_transfer_learning.h5 es la
+    # copia que cargan por defecto los demás scripts)
+    if schedule:
+        # Exportación y servidor leen model.input_shape: entrada fija final
+        model = with_fixed_input(model, final_size)
+        throughput['progressive'] = resolution_stages
+    final_epoch = checkpoint_callback.epoch
+    for path in (os.path.join(run_dir, 'model.keras'), 'fruit360_transfer_learning.h5'):
+        checkpoints.save(model, final_epoch, path=path)
+    checkpoints.close()
+    checkpointing = checkpoints.summary()
+    if checkpointing:
+        print(f"💾 Checkpoints: {checkpointing['blocking_ms_mean']:.0f} ms/época bloqueando "
+              f"(síncrono: {checkpointing['sync_equivalent_ms_mean']:.0f} ms) → {run_dir}")
+    print(f"💾 Modelo guardado: {run_dir}/model.keras y fruit360_transfer_learning.h5")
+    artifacts.update({
+        'model': os.path.join(run_dir, 'model.keras'),
+        'published_model': 'fruit360_transfer_learning.h5',
+        'best_checkpoint': checkpoints.best_path(),
+    })
+    throughput['checkpointing'] = checkpointing
+    if sample_refresher is not None:
+        throughput['importance_sampling'] = dict(sample_refresher.sequence.summary(),
+                                                 refresh_seconds=round(sample_refresher.seconds, 2))
     
-    # 6. Evaluar
-    print("📊 Evaluando modelo...")
-    results = model.evaluate(test_gen, verbose=0)
-    print(f"Test accuracy: {results[1]:.4f}")
-    print(f"Top-5 accuracy: {results[2]:.4f}")
+    artifacts['run_summary'] = save_run_summary({
+        'run_id': run_id,
+        'model_name': base_model,
+        'precision': precision,
+        'backend': backend,
+        'batch_size': batch_size,
+        'test_accuracy': float(results[1]),
+        'test_top5_accuracy': float(results[2]),
+        'test_macro_f1': evaluation['macro_f1'],
+        'eval_seconds': round(eval_seconds, 2),
+        'train_steps': step_summary,
+        'throughput': throughput,
+    })
     
-    # 7. Guardar
-    model.save('fruit360_transfer_learning.h5')
-    print("💾 Modelo guardado: fruit360_transfer_learning.h5")
+    store.finish_run(run_id, test_accuracy=results[1], test_top5_accuracy=results[2],
+                     throughput=throughput, artifacts=artifacts)
+    store.close()
+    print(f"📊 Reporte: python recuperar_historial.py --run_id {run_id}")
     
     return model, history
 
@@ -139,16 +478,77 @@ if __name__ == "__main__":
     parser.add_argument('--epochs', type=int, default=10)
     parser.add_argument('--batch_size', type=int, default=64)
     parser.add_argument('--model', type=str, default='EfficientNetB0')
+    parser.add_argument('--backend', type=str, default='keras',
+                        choices=['keras', 'tfdata', 'packed', 'tfrecord'])
+    parser.add_argument('--packed_dir', type=str, default="../data_packed/fruits-360_100x100")
+    parser.add_argument('--shard_dir', type=str, default="../data_shards/fruits-360_original-size",
+                        help='Shards TFRecord (--backend tfrecord, ver tfrecord_shards.py)')
+    parser.add_argument('--feature_cache', action='store_true',
+                        help='Fase 1 sobre features cacheadas (requiere --backend packed)')
+    parser.add_argument('--augmented_views', type=int, default=0)
+    parser.add_argument('--dedup', action='store_true',
+                        help='Split por clusters de casi-duplicados (--backend tfdata)')
+    parser.add_argument('--max_per_cluster', type=int, default=None)
+    parser.add_argument('--fine_tune_stages', type=str, default="2:1e-4:2,4:5e-5:2",
+                        help='Etapas "bloques:lr:épocas,..." o "none"')
+    parser.add_argument('--precision', type=str, default='float32', choices=list(PRECISIONS))
+    parser.add_argument('--profile_steps', type=str, default=None,
+                        help='Ventana "inicio:fin" para la traza de TensorBoard Profiler')
+    parser.add_argument('--profile_throughput', action='store_true',
+                        help='Perfil por paso de espera de datos vs cómputo (fase 1)')
+    parser.add_argument('--data_dir', type=str, default="../data_raw/fruits-360_100x100/fruits-360")
+    parser.add_argument('--experiment_db', type=str, default=DEFAULT_DB,
+                        help='Almacén SQLite de experimentos (ver experiment_store.py)')
+    parser.add_argument('--checkpoint_dir', type=str, default="checkpoints")
+    parser.add_argument('--checkpoint_format', type=str, default='keras',
+                        choices=['keras', 'savedmodel'])
+    parser.add_argument('--keep_last', type=int, default=2)
+    parser.add_argument('--keep_best', type=int, default=1)
+    parser.add_argument('--importance_sampling', action='store_true',
+                        help='Lotes a favor de ejemplos difíciles (requiere --backend packed)')
+    parser.add_argument('--progressive', type=str, default=None,
+                        help='Resolución progresiva "lado:épocas,..." (p. ej. 64:3,100:5)')
+    parser.add_argument('--resume_dir', type=str, default=None,
+                        help='checkpoints/run_<id> interrumpido a reanudar (--backend tfrecord)')
+    parser.add_argument('--stream_save_every', type=int, default=500,
+                        help='Batches entre posiciones guardadas del stream (--backend tfrecord)')
+    parser.add_argument('--hash_dataset', action='store_true',
+                        help='Huella del dataset con el SHA1 de cada imagen (lento la primera vez)')
     
     args = parser.parse_args()
     
     print(f"⚡ Transfer Learning - {args.model}")
     print(f"   - Epochs: {args.epochs}")
     print(f"   - Batch size: {args.batch_size}")
+    print(f"   - Backend: {args.backend}")
+    print(f"   - Precisión: {args.precision}")
     
     # Entrenar
     model, history = train_transfer_learning(
         epochs=args.epochs,
         batch_size=args.batch_size,
-        base_model=args.model
+        base_model=args.model,
+        backend=args.backend,
+        packed_dir=args.packed_dir,
+        feature_cache=args.feature_cache,
+        augmented_views=args.augmented_views,
+        dedup=args.dedup,
+        max_per_cluster=args.max_per_cluster,
+        fine_tune_stages=args.fine_tune_stages,
+        precision=args.precision,
+        profile_steps=tuple(int(s) for s in args.profile_steps.split(':'))
+        if args.profile_steps else None,
+        profile_throughput=args.profile_throughput,
+        shard_dir=args.shard_dir,
+        data_dir=args.data_dir,
+        experiment_db=args.experiment_db,
+        checkpoint_dir=args.checkpoint_dir,
+        checkpoint_format=args.checkpoint_format,
+        keep_last=args.keep_last,
+        keep_best=args.keep_best,
+        importance_sampling=args.importance_sampling,
+        progressive=args.progressive,
+        resume_dir=args.resume_dir,
+        stream_save_every=args.stream_save_every,
+        hash_dataset=args.hash_dataset
     )
\ No newline at end of file
@@ -1,26 +1,46 @@
 #!/usr/bin/env python3
 """
 VISUALIZACIÓN DE RESULTADOS DE ENTRENAMIENTO
-Guarda gráficas y reporte completo de métricas
+Guarda gráficas y reporte completo de métricas a partir del almacén de
+experimentos (ver experiment_store.py)
 """
 
-import matplotlib.pyplot as plt
 import numpy as np
-import json
 import os
 from datetime import datetime
+from experiment_store import ExperimentStore, DEFAULT_DB
 
-def visualize_training_results(history, test_accuracy=0.9403, model_name="MobileNetV2"):
+def visualize_training_results(run_id=None, db_path=DEFAULT_DB, text_only=False):
     """
-    CREA GRÁFICAS Y REPORTE COMPLETO DEL ENTRENAMIENTO
+    CREA GRÁFICAS Y REPORTE COMPLETO DE UNA EJECUCIÓN
+    Lee historial, accuracy de test y throughput del almacén de
+    experimentos; run_id=None usa la última ejecución terminada.
+    text_only=True genera solo el reporte (sin importar matplotlib).
     """
-    print("📊 Generando visualización de resultados...")
+    store = ExperimentStore(db_path)
+    try:
+        history = store.load_run(run_id)
+    finally:
+        store.close()
+    run = history.run
+    model_name = run['model_name']
+    test_accuracy = run['test_accuracy'] if run['test_accuracy'] is not None else np.nan
+    throughput = run['throughput'] or None
+    
+    print(f"📊 Generando visualización de la ejecución {run['run_id']}...")
     
     # Crear directorio de resultados
     results_dir = "training_results"
     os.makedirs(results_dir, exist_ok=True)
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = f"run{run['run_id']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    if text_only:
+        create_text_report(history, test_accuracy, model_name, results_dir, timestamp, throughput)
+        print(f"📝 Reporte: {results_dir}/training_report_{timestamp}.txt")
+        return
+    
+    # matplotlib solo se importa al dibujar (create_text_report no lo necesita)
+    import matplotlib.pyplot as plt
     
     # 1. GRÁFICA DE ACCURACY
     plt.figure(figsize=(12, 8))
@@ -90,14 +110,15 @@ def visualize_training_results(history, test_accuracy=0.9403, model_name="Mobile
     plt.close()
     
     # 5. REPORTE DETALLADO EN TEXTO
-    create_text_report(history, test_accuracy, model_name, results_dir, timestamp)
+    create_text_report(history, test_accuracy, model_name, results_dir, timestamp, throughput)
     
     print(f"✅ Resultados guardados en: {results_dir}/")
     print(f"   📈 Gráficas: training_results_{timestamp}.png")
     print(f"   📝 Reporte: training_report_{timestamp}.txt")
 
-def create_text_report(history, test_accuracy, model_name, results_dir, timestamp):
-    """Crea un reporte detallado en texto"""
+def create_text_report(history, test_accuracy, model_name, results_dir, timestamp,
+                       throughput=None):
+    """Crea un reporte detallado en texto (con sección de throughput si se pasa)"""
     
     report = f"""
 {'='*60}
@@ -165,35 +186,56 @@ Total Epochs: {len(history.history['accuracy']) if 'accuracy' in history.history
   con Accuracy: {np.max(history.history['accuracy']):.4f}
 """
     
+    if throughput:
+        report += throughput_section(throughput)
+    
     # Guardar reporte
     with open(f'{results_dir}/training_report_{timestamp}.txt', 'w') as f:
         f.write(report)
 
-def save_training_history(history, test_accuracy, model_name):
-    """Guarda el historial completo en JSON"""
-    
-    history_dict = {
-        'model_name': model_name,
-        'timestamp': datetime.now().isoformat(),
-        'test_accuracy': float(test_accuracy),
-        'training_history': {},
-        'final_metrics': {
-            'train_accuracy': float(history.history['accuracy'][-1]) if 'accuracy' in history.history else 0,
-            'val_accuracy': float(history.history['val_accuracy'][-1]) if 'val_accuracy' in history.history else 0,
-            'train_loss': float(history.history['loss'][-1]) if 'loss' in history.history else 0,
-            'val_loss': float(history.history['val_loss'][-1]) if 'val_loss' in history.history else 0
-        }
-    }
-    
-    # Copiar todas las métricas del history
-    for key, values in history.history.items():
-        history_dict['training_history'][key] = [float(v) if not np.isnan(v) else None for v in values]
-    
-    # Guardar JSON
-    with open('training_history.json', 'w') as f:
-        json.dump(history_dict, f, indent=2)
-    
-    print("💾 Historial guardado en: training_history.json")
+def throughput_section(throughput):
+    """Sección de throughput del reporte a partir de ThroughputProfiler.summary()"""
+    section = f"""
+{'='*60}
+⚡ THROUGHPUT:
+{'='*60}
+• Pasos medidos: {throughput.get('steps', 0)}
+• Tiempo por paso: {throughput.get('step_ms_mean', 0):.1f} ms (p50 {throughput.get('step_ms_p50', 0):.1f}, p90 {throughput.get('step_ms_p90', 0):.1f})
+"""
+    if 'images_per_sec' in throughput:
+        section += f"• Imágenes/s: {throughput['images_per_sec']:.1f}\n"
+    if 'data_wait_fraction' in throughput:
+        section += f"""• Espera de datos: {throughput['data_wait_ms_mean']:.1f} ms/paso (p90 {throughput['data_wait_ms_p90']:.1f})
+• Cómputo: {throughput['compute_ms_mean']:.1f} ms/paso
+• Fracción esperando datos: {throughput['data_wait_fraction']:.1%} → {throughput['bottleneck'].upper()}
+"""
+    if 'rss_mb_peak' in throughput:
+        section += f"• Memoria RSS: {throughput['rss_mb_start']:.0f} MB al inicio, pico {throughput['rss_mb_peak']:.0f} MB\n"
+    if 'profile_dir' in throughput:
+        section += f"• Traza del profiler: tensorboard --logdir {throughput['profile_dir']}\n"
+    checkpointing = throughput.get('checkpointing')
+    if checkpointing:
+        section += (f"• Checkpoints ({checkpointing['save_format']}): {checkpointing['blocking_ms_mean']:.0f} ms/época "
+                    f"bloqueando vs {checkpointing['sync_equivalent_ms_mean']:.0f} ms en síncrono "
+                    f"(ahorro {checkpointing['saved_ms_per_epoch']:.0f} ms/época)\n")
+    return section
+
+def save_training_history(history, test_accuracy, model_name, params=None,
+                          db_path=DEFAULT_DB, started_at=None):
+    """
+    AÑADE UN HISTORIAL (keras History o similar) AL ALMACÉN DE EXPERIMENTOS
+    Cada llamada crea una ejecución nueva; devuelve su run_id
+    """
+    store = ExperimentStore(db_path)
+    try:
+        run_id = store.start_run(model_name, params=params, started_at=started_at)
+        store.log_history(run_id, history.history)
+        store.finish_run(run_id, test_accuracy=test_accuracy)
+    finally:
+        store.close()
+    
+    print(f"💾 Historial guardado en: {db_path} (ejecución {run_id})")
+    return run_id
 
 # ==============================================================================
 # EJECUCIÓN DIRECTA (para testing)